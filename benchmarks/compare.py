@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# =============================================================================
+# PURPOSE
+# -------
+#    This script is used to compare two benchmark results files, as written
+#    by the run.py script, and report the change of each benchmark.  The
+#    program exits with code 1 when any benchmark is slower than the baseline
+#    by more than the threshold, so that it can be used as a CI gate.
+#
+#       benchmarks/compare.py benchmarks/results/v0.1.json benchmarks/results/v0.2.json
+# =============================================================================
+
+import sys
+import json
+
+import click
+from tabulate import tabulate
+
+
+def load_results(filename):
+    """ Returns the run info, and dict of (benchmark, engine, devices) to record """
+    with open(filename) as ifile:
+        body = json.load(ifile)
+
+    return body['info'], {
+        (rec['benchmark'], rec['engine'], rec['devices']): rec
+        for rec in body['results']
+    }
+
+
+def compare(base, new, threshold):
+    """
+    Returns the list of table rows, and the number of regressions.  A
+    benchmark is a regression when the new best time is more than `threshold`
+    percent slower than the base best time.
+    """
+    rows = list()
+    n_regressions = 0
+
+    for key in sorted(set(base) | set(new), key=lambda k: (k[0], k[1] or '', k[2])):
+        base_sec = base.get(key, {}).get('seconds')
+        new_sec = new.get(key, {}).get('seconds')
+
+        if base_sec is None or new_sec is None:
+            status = 'new' if key not in base else 'missing' if key not in new else 'failed'
+            change = ''
+        else:
+            change_pct = (new_sec - base_sec) / base_sec * 100
+            change = f'{change_pct:+.1f}%'
+            if change_pct > threshold:
+                status = 'REGRESSION'
+                n_regressions += 1
+            elif change_pct < -threshold:
+                status = 'faster'
+            else:
+                status = 'ok'
+
+        benchmark, engine, devices = key
+        rows.append([benchmark, engine or '-', devices,
+                     f'{base_sec:.3f}' if base_sec is not None else '',
+                     f'{new_sec:.3f}' if new_sec is not None else '',
+                     change, status])
+
+    return rows, n_regressions
+
+
+@click.command()
+@click.argument('base_file', type=click.Path(exists=True, dir_okay=False))
+@click.argument('new_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--threshold', type=float, default=10.0, show_default=True,
+              help='Percent slower than the base that is reported as a regression')
+def main(base_file, new_file, threshold):
+    """
+    Compare the benchmark results in NEW_FILE to the baseline BASE_FILE.
+    """
+    base_info, base = load_results(base_file)
+    new_info, new = load_results(new_file)
+
+    for name, info in (('BASE', base_info), ('NEW', new_info)):
+        print(f"{name}: {info['label']} ({info['revision']}) {info['timestamp']}, "
+              f"python {info['python']}, {info['cpu_count']} CPUs")
+
+    # the stub latency changes every result, the other parameters only select
+    # which results are present.
+
+    for param in ('latency', 'jitter'):
+        if base_info['params'][param] != new_info['params'][param]:
+            print(f"WARNING: the runs used a different stub {param}; "
+                  f"base {base_info['params'][param]}, new {new_info['params'][param]}")
+
+    rows, n_regressions = compare(base, new, threshold)
+
+    print()
+    print(tabulate(
+        headers=['Benchmark', 'Engine', 'Devices', 'Base (s)', 'New (s)', 'Change', 'Status'],
+        tabular_data=rows
+    ))
+
+    if n_regressions:
+        print(f'\n{n_regressions} regressions over {threshold}%')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
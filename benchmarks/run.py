@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+# =============================================================================
+# PURPOSE
+# -------
+#    This script is used to measure the throughput of the cvp-pyez programs at
+#    fleet scale without production gear.  A stub CVP server with N synthetic
+#    devices and a stub eAPI server, with configurable latency and jitter, are
+#    started locally, and then each benchmark is timed at each fleet size:
+#
+#       inventory   - CVPInventory construction, via get_inventory()
+#       find-mac    - the cvp-find-host nr_find_host_by_macaddr() sweep
+#       cvp-get-run - the complete "cvp-get run" program
+#       logs2csv    - the complete "cvp-logs2csv" program
+#
+#    The results are stored as JSON in the results directory, named by the
+#    run label (default the git revision), so that the runs of two versions
+#    can be compared using the compare.py script.  The default results
+#    directory, benchmarks/results, is not tracked by git:
+#
+#       benchmarks/run.py --sizes 100,1000
+#       benchmarks/compare.py benchmarks/results/<base>.json benchmarks/results/<new>.json
+# =============================================================================
+
+import os
+import sys
+import json
+import time
+import socket
+import platform
+import tempfile
+import subprocess
+from pathlib import Path
+from statistics import median
+from contextlib import contextmanager
+
+import click
+from tabulate import tabulate
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+BIN_DIR = REPO_DIR / 'bin'
+
+sys.path.insert(0, str(REPO_DIR))
+
+from cvppyez.nornir import get_inventory    # noqa: E402
+from cvppyez.tasks.find_host import nr_find_host_by_macaddr    # noqa: E402
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                               CONSTANTS
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+BENCHMARKS = ('inventory', 'find-mac', 'cvp-get-run', 'logs2csv')
+ENGINES = ('nornir', 'asyncio')
+
+DEFAULT_SIZES = '100,1000,10000'
+DEFAULT_RESULTS_DIR = REPO_DIR / 'benchmarks' / 'results'
+DEFAULT_LOG_LINES = 50                      # syslog lines per device
+
+SERVER_START_TIMEOUT = 60
+BENCH_MACADDR = '00:1c:73:00:be:ef'
+
+RUN_COMMANDS = """
+- name: version
+  command: show version
+- name: interfaces
+  command: show interfaces
+- name: arp
+  command: show ip arp
+- name: macs
+  command: show mac address-table
+- name: running-config
+  command: show running-config
+  encoding: text
+"""
+
+SYSLOG_LINES = (
+    "{date} {host} Ebra: %LINEPROTO-5-UPDOWN: Line protocol on Interface Ethernet{n}, "
+    "changed state to up",
+    "{date} {host} Lldp: %LLDP-5-NEIGHBOR_NEW: LLDP neighbor with chassisId 001c.7300.{n:04x} "
+    "and portId \"Ethernet49\" added on interface Ethernet{n}",
+    "{date} {host} ConfigAgent: %SYS-5-CONFIG_I: Configured from console by admin on vty3",
+    "{date} {host} Stp: %SPANTREE-6-INTERFACE_STATE: Interface Ethernet{n} instance Vl10 "
+    "moving from learning to forwarding"
+)
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                              STUB SERVERS
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def make_certificate(workdir):
+    """ Create a self-signed certificate so the stubs serve HTTPS """
+    certfile, keyfile = workdir / 'stub-cert.pem', workdir / 'stub-key.pem'
+    subprocess.run([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+        '-subj', '/CN=localhost', '-keyout', str(keyfile), '-out', str(certfile)
+    ], check=True, capture_output=True)
+    return certfile, keyfile
+
+
+@contextmanager
+def stub_server(module, certfile, keyfile, *args):
+    """
+    Run the stub server `module`, for example "cvppyez.eapi.stub", as a
+    separate process so that the stub does not compete with the benchmark
+    for the GIL.  Yields the server port.
+    """
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', module, '--port', str(port),
+         '--certfile', str(certfile), '--keyfile', str(keyfile), *map(str, args)],
+        env=dict(os.environ, PYTHONPATH=str(REPO_DIR)),
+        stdout=subprocess.DEVNULL
+    )
+
+    try:
+        wait_for_port(proc, port)
+        yield port
+
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def wait_for_port(proc, port):
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'stub server exited with code {proc.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+
+    raise RuntimeError(f'stub server not listening on port {port}')
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                               BENCHMARKS
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+def timed(func, repeat):
+    """ Returns the list of `func` run durations, in seconds """
+    durations = list()
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - t0)
+    return durations
+
+
+def run_program(workdir, *args, stdin=None):
+    """ Run the bin program, raise RuntimeError with the output tail on failure """
+    res = subprocess.run(
+        [sys.executable, str(BIN_DIR / args[0]), *map(str, args[1:])],
+        cwd=workdir, input=stdin, capture_output=True, text=True,
+        env=dict(os.environ, PYTHONPATH=str(REPO_DIR))
+    )
+    if res.returncode:
+        tail = '\n'.join((res.stdout + res.stderr).splitlines()[-10:])
+        raise RuntimeError(f'{args[0]} failed with code {res.returncode}:\n{tail}')
+
+
+def bench_inventory(n_devices, engine, workdir, repeat):
+    def build():
+        nr = get_inventory()
+        if len(nr.inventory.hosts) != n_devices:
+            raise RuntimeError(f'inventory has {len(nr.inventory.hosts)} hosts, '
+                               f'expected {n_devices}')
+
+    return timed(build, repeat), n_devices
+
+
+def bench_find_mac(n_devices, engine, workdir, repeat):
+    durations = list()
+
+    for _ in range(repeat):
+        # a new inventory for each run, so the NAPALM connections are not
+        # re-used between runs.
+
+        nr = get_inventory()
+        durations.extend(timed(lambda: nr_find_host_by_macaddr(
+            nr, BENCH_MACADDR, all_ports=False, progress=lambda: None, engine=engine
+        ), 1))
+
+        nr.close_connections()
+        if nr.data.failed_hosts:
+            raise RuntimeError(f'{len(nr.data.failed_hosts)} hosts failed')
+
+    return durations, n_devices
+
+
+def bench_cvp_get_run(n_devices, engine, workdir, repeat):
+    commands_file = workdir / 'commands.yaml'
+    commands_file.write_text(RUN_COMMANDS)
+    run_dir = workdir / 'cvp-get-run'
+    run_dir.mkdir(exist_ok=True)
+
+    durations = timed(lambda: run_program(
+        run_dir, 'cvp-get', 'run', '--commands', commands_file, '--engine', engine,
+        stdin='Y\n'
+    ), repeat)
+
+    n_files = len(list(run_dir.glob('*.json')))
+    if n_files != n_devices:
+        raise RuntimeError(f'cvp-get run wrote {n_files} files, expected {n_devices}')
+
+    return durations, n_devices
+
+
+def write_syslog(filename, n_devices, n_lines):
+    with open(filename, 'w') as ofile:
+        for line_n in range(n_lines):
+            date = time.strftime('%b %e %H:%M:%S', time.gmtime(1600000000 + line_n))
+            for dev_n in range(n_devices):
+                ofile.write(SYSLOG_LINES[(line_n + dev_n) % len(SYSLOG_LINES)].format(
+                    date=date, host=f'sw{dev_n:05d}', n=(line_n % 48) + 1) + '\n')
+
+
+def bench_logs2csv(n_devices, engine, workdir, repeat, n_lines=DEFAULT_LOG_LINES):
+    logfile = workdir / 'syslog.log'
+    write_syslog(logfile, n_devices, n_lines)
+
+    durations = timed(lambda: run_program(
+        workdir, 'cvp-logs2csv', logfile, '--output', workdir / 'logs.csv'
+    ), repeat)
+
+    return durations, n_devices * n_lines
+
+
+BENCH_FUNCS = {
+    'inventory': (bench_inventory, False),
+    'find-mac': (bench_find_mac, True),
+    'cvp-get-run': (bench_cvp_get_run, True),
+    'logs2csv': (bench_logs2csv, False)
+}
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                                 RESULTS
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+def git_revision():
+    res = subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=REPO_DIR,
+                         capture_output=True, text=True)
+    return res.stdout.strip() or None
+
+
+def run_info(label, params):
+    return dict(
+        label=label,
+        revision=git_revision(),
+        timestamp=time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        python=platform.python_version(),
+        platform=platform.platform(),
+        cpu_count=os.cpu_count(),
+        params=params
+    )
+
+
+def result_record(benchmark, engine, n_devices, durations, n_items, error=None):
+    record = dict(benchmark=benchmark, engine=engine, devices=n_devices, error=error)
+    if durations:
+        best = min(durations)
+        record.update(seconds=best, median=median(durations), runs=durations,
+                      items=n_items, rate=n_items / best if best else None)
+    return record
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                                 MAIN
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+def csv_list(choices=None, convert=str):
+    def callback(ctx, param, value):
+        items = [convert(item) for item in value.split(',') if item]
+        if choices:
+            for item in items:
+                if item not in choices:
+                    raise click.BadParameter(f'{item} is not one of: {", ".join(choices)}')
+        return items
+    return callback
+
+
+@click.command()
+@click.option('--sizes', default=DEFAULT_SIZES, show_default=True,
+              callback=csv_list(convert=int),
+              help='Comma separated list of fleet sizes')
+@click.option('--bench', 'benchmarks', default=','.join(BENCHMARKS), show_default=True,
+              callback=csv_list(BENCHMARKS),
+              help='Comma separated list of benchmarks')
+@click.option('--engines', default=','.join(ENGINES), show_default=True,
+              callback=csv_list(ENGINES),
+              help='Comma separated list of task execution engines')
+@click.option('--latency', type=float, default=0.02, show_default=True,
+              help='Stub server response latency, in seconds')
+@click.option('--jitter', type=float, default=0.01, show_default=True,
+              help='Stub server random added latency, in seconds')
+@click.option('--repeat', type=click.IntRange(min=1), default=1, show_default=True,
+              help='Number of runs of each benchmark, the best run is reported')
+@click.option('--label', help='Results name, default the git revision')
+@click.option('--results-dir', type=click.Path(file_okay=False), default=str(DEFAULT_RESULTS_DIR),
+              show_default=True, help='Directory to store the results')
+def main(sizes, benchmarks, engines, latency, jitter, repeat, label, results_dir):
+    """
+    Benchmark the cvp-pyez programs against stub CVP and eAPI servers.
+    """
+    label = label or git_revision() or time.strftime('%Y%m%d-%H%M%S')
+    info = run_info(label, dict(sizes=sizes, benchmarks=benchmarks, engines=engines,
+                                latency=latency, jitter=jitter, repeat=repeat))
+    results = list()
+
+    with tempfile.TemporaryDirectory(prefix='cvp-bench-') as tmpdir:
+        tmpdir = Path(tmpdir)
+        certfile, keyfile = make_certificate(tmpdir)
+
+        with stub_server('cvppyez.eapi.stub', certfile, keyfile,
+                         '--latency', latency, '--jitter', jitter) as eapi_port:
+
+            for n_devices in sizes:
+                with stub_server('cvppyez.rest.stub', certfile, keyfile,
+                                 '--devices', n_devices,
+                                 '--latency', latency, '--jitter', jitter) as cvp_port:
+
+                    os.environ.update(
+                        CVP_SERVER=f'127.0.0.1:{cvp_port}',
+                        CVP_USER='bench',
+                        CVP_PASSWORD='bench',
+                        CVP_EAPI_PORT=str(eapi_port),
+                        CVP_INVENTORY_CACHE_TTL='0',
+                        CVP_INVENTORY_GROUPBY='pod,rack'
+                    )
+
+                    for benchmark in benchmarks:
+                        bench_func, per_engine = BENCH_FUNCS[benchmark]
+                        for engine in (engines if per_engine else [None]):
+                            workdir = Path(tempfile.mkdtemp(dir=tmpdir))
+                            label_str = f'{benchmark}[{engine}]' if engine else benchmark
+                            print(f'{label_str} @ {n_devices} devices ... ', end='', flush=True)
+
+                            try:
+                                durations, n_items = bench_func(n_devices, engine, workdir, repeat)
+                                record = result_record(benchmark, engine, n_devices,
+                                                       durations, n_items)
+                                print(f"{record['seconds']:.3f}s")
+
+                            except Exception as exc:
+                                record = result_record(benchmark, engine, n_devices, None, 0,
+                                                       error=str(exc))
+                                print(f'FAILED: {exc}')
+
+                            results.append(record)
+
+    results_dir = Path(results_dir)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    results_file = results_dir / f'{label}.json'
+    results_file.write_text(json.dumps(dict(info=info, results=results), indent=3))
+
+    print()
+    print(tabulate(
+        headers=['Benchmark', 'Engine', 'Devices', 'Best (s)', 'Median (s)', 'Rate (/s)'],
+        tabular_data=[
+            [rec['benchmark'], rec['engine'] or '-', rec['devices']] + (
+                [f"{rec['seconds']:.3f}", f"{rec['median']:.3f}", f"{rec['rate']:.1f}"]
+                if 'seconds' in rec else ['FAILED', '', '']
+            )
+            for rec in results
+        ]
+    ))
+    print(f'\nRESULTS: {results_file}')
+
+    if any(rec['error'] for rec in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,15 +9,42 @@
 #   CVP_USER: the login user-name
 #   CVP_PASSWORD: the login password
 #
+# The following Environment variables are optional; the first two are used
+# as by the cvp-pyez programs:
+#
+#   CVP_INVENTORY_GROUPBY: the CVP label types, comma separated, used to
+#       create the Ansible groups; for example "pod,rack".
+#   CVP_INVENTORY_CACHE_TTL: the seconds the cached inventory is used before
+#       it is fetched again from CVP, 0 disables the cache; default 300.
+#   CVP_INVENTORY_CACHE_DIR: the cache directory, default ~/.cache/cvp-pyez
+#
 # The output of this program is the Ansible inventory in JSON as described in
 # their documentation online:
 # https://docs.ansible.com/ansible/2.8/dev_guide/developing_inventory.html#developing-inventory
+#
+# The inventory is cached in a file shared by all of the Ansible jobs, so
+# that concurrent jobs do not each login to CVP: the job that finds the cache
+# expired takes the cache lock and fetches the inventory, and the jobs that
+# wait for the lock then use the refreshed cache.  The --list output is the
+# cache file content, and --host looks up the host in the cached hostvars.
 
-import sys
 import os
+import re
+import sys
 import json
+import time
+import fcntl
+import shutil
+import hashlib
+import argparse
+import tempfile
+from multiprocessing.pool import ThreadPool
+
 import requests
-from collections import defaultdict
+
+DEFAULT_CACHE_TTL = 300
+DEFAULT_CACHE_DIR = '~/.cache/cvp-pyez'
+MAX_LABEL_WORKERS = 10
 
 
 class CvpSession(requests.Session):
@@ -66,33 +93,182 @@ class CvpSession(requests.Session):
                     host=self.host_url)
 
 
-def get_inventory():
-    api = CvpSession()
-    res = api.get('/inventory/devices')
+# -----------------------------------------------------------------------------
+#                           CVP inventory
+# -----------------------------------------------------------------------------
+
+def get_json(api, url, **params):
+    # raises rather than exits, as it is called by the label threads.
+    res = api.get(url, params=params)
     if not res.ok:
-        sys.exit('FAIL: get inventory: ' + res.text)
+        raise RuntimeError('FAIL: get {url}: {text}'.format(url=url, text=res.text))
+    return res.json()
+
+
+def group_name(label_key):
+    """ Returns the Ansible group name of the CVP label, e.g. "pod_pod1" for "pod:pod1" """
+    return re.sub(r'\W', '_', label_key)
+
+
+def get_label_groups(api, label_types):
+    """
+    Returns the dict of Ansible group name to the list of hostnames, for each
+    CVP label of the `label_types`.  The label requests are run concurrently
+    in a thread pool, and the applied-device requests of all of the labels
+    are run concurrently once the labels are known.
+    """
+    pool = ThreadPool(MAX_LABEL_WORKERS)
+
+    try:
+        label_keys = [
+            record['key']
+            for body in pool.map(
+                lambda label_type: get_json(api, '/label/getLabels.do',
+                                            module='cvp', type=label_type),
+                label_types)
+            for record in body['labels']
+            if record['netElementCount']
+        ]
+
+        applied = pool.map(
+            lambda label_key: get_json(api, '/label/getAppliedDevices.do',
+                                       labelId=label_key, startIndex=0, endIndex=0),
+            label_keys)
+
+    finally:
+        pool.close()
+
+    return dict(
+        (group_name(label_key), [dev_rec['hostName'] for dev_rec in body['data']])
+        for label_key, body in zip(label_keys, applied)
+    )
+
+
+def write_inventory(ofile, devices, groups):
+    """
+    Write the Ansible inventory JSON of the CVP `devices` and the label
+    `groups` to `ofile`, one host or group at a time.
+    """
+    hostnames = [device['fqdn'] for device in devices]
+
+    ofile.write('{"_meta": {"hostvars": {')
+    for n_dev, device in enumerate(devices):
+        ofile.write('{sep}{host}: {hostvars}'.format(
+            sep=', ' if n_dev else '',
+            host=json.dumps(device['fqdn']),
+            hostvars=json.dumps(dict(ansible_host=device['ipAddress'],
+                                     ansible_network_os='eos'))))
+    ofile.write('}}')
+
+    # the groups hosts are limited to the inventory hosts.
+
+    known = set(hostnames)
+    for name in sorted(groups):
+        ofile.write(', {name}: {group}'.format(name=json.dumps(name), group=json.dumps(dict(
+            hosts=[hostname for hostname in groups[name] if hostname in known]))))
+
+    ofile.write(', "all": {all}}}\n'.format(all=json.dumps(dict(
+        children=['ungrouped'] + sorted(groups),
+        hosts=hostnames))))
+
+
+def build_inventory(ofile):
+    """ Fetch the inventory from CVP and write the Ansible inventory JSON to `ofile` """
+    api = CvpSession()
+    devices = get_json(api, '/inventory/devices')
+
+    label_types = list(filter(None, os.getenv('CVP_INVENTORY_GROUPBY', '').split(',')))
+    groups = get_label_groups(api, label_types) if label_types else dict()
+
+    write_inventory(ofile, devices, groups)
+
+
+# -----------------------------------------------------------------------------
+#                           Inventory cache
+# -----------------------------------------------------------------------------
+
+def cache_path():
+    """ Returns the cache file path, one for each CVP server, user, and label types """
+    key = json.dumps([os.getenv('CVP_SERVER'), os.getenv('CVP_USER'),
+                      os.getenv('CVP_INVENTORY_GROUPBY', '')])
+    cache_dir = os.path.expanduser(os.getenv('CVP_INVENTORY_CACHE_DIR', DEFAULT_CACHE_DIR))
+    return os.path.join(cache_dir, 'ansible-inventory-{digest}.json'.format(
+        digest=hashlib.sha1(key.encode()).hexdigest()[:16]))
+
+
+def is_fresh(path, ttl):
+    try:
+        return time.time() - os.stat(path).st_mtime < ttl
+    except OSError:
+        return False
+
+
+def refresh_cache(path, ttl, force=False):
+    """
+    Refresh the cache file if it is expired.  The refresh is done holding the
+    cache lock; a process that waited for the lock finds the cache refreshed
+    and does not fetch the inventory again.  The cache file is replaced
+    atomically, so it is read without the lock.
+    """
+    cache_dir = os.path.dirname(path)
+    try:
+        os.makedirs(cache_dir)
+    except OSError:
+        if not os.path.isdir(cache_dir):
+            raise
+
+    with open(path + '.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        try:
+            if not force and is_fresh(path, ttl):
+                return
+
+            fd, tmp_name = tempfile.mkstemp(dir=cache_dir, prefix='.ansible-inventory-')
+            try:
+                with os.fdopen(fd, 'w') as ofile:
+                    build_inventory(ofile)
+                os.rename(tmp_name, path)
+
+            except BaseException:
+                os.unlink(tmp_name)
+                raise
+
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ansible dynamic inventory from CVP')
+    parser.add_argument('--list', action='store_true', help='show the inventory')
+    parser.add_argument('--host', help='show the variables of the host')
+    parser.add_argument('--refresh', action='store_true', help='refresh the cached inventory')
+    args = parser.parse_args()
 
-    ans_inv = defaultdict(dict)
-    ans_hosts = ans_inv['_meta']['hostvars'] = defaultdict(dict)
-    all_hosts = ans_inv["all"] = {
-        "children": [
-            "ungrouped"
-        ],
-        'hosts': [],
-    }
+    ttl = int(os.getenv('CVP_INVENTORY_CACHE_TTL', DEFAULT_CACHE_TTL))
 
-    for device in res.json():
-        hostname = device['fqdn']
-        ipaddr = device['ipAddress']
-        ans_hosts[hostname] = dict(
-            ansible_host=ipaddr,
-            ansible_network_os='eos'
-        )
-        all_hosts['hosts'].append(hostname)
+    try:
+        if ttl:
+            path = cache_path()
+            if args.refresh or not is_fresh(path, ttl):
+                refresh_cache(path, ttl, force=args.refresh)
+            ifile = open(path)
 
-    return json.dumps(ans_inv)
+        else:
+            ifile = tempfile.TemporaryFile(mode='w+')
+            build_inventory(ifile)
+            ifile.seek(0)
 
+    except RuntimeError as exc:
+        sys.exit(exc.args[0])
 
-print(get_inventory())
+    with ifile:
+        if args.host:
+            hostvars = json.load(ifile)['_meta']['hostvars']
+            print(json.dumps(hostvars.get(args.host, {})))
+        else:
+            shutil.copyfileobj(ifile, sys.stdout)
 
 
+if __name__ == '__main__':
+    main()
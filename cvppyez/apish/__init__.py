@@ -1,2 +1,3 @@
 from cvppyez.apish.local import LocalApish
 from cvppyez.apish.remote import RemoteApish
+from cvppyez.apish.pool import RemoteApishPool
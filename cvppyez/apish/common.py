@@ -1,4 +1,5 @@
 from cvppyez.log import setup_log
+from cvppyez.tracing import span
 
 
 class APISH(object):
@@ -20,7 +21,31 @@ class APISH(object):
             for notif in each.get('Notifications'):
                 yield notif
 
+    @classmethod
+    def extract_updates(cls, apish_output, extract='value'):
+        """
+        Yields each of the notification update items as a (key, value) tuple
+        as the `apish_output` is consumed, without first building the complete
+        collection of items.
+
+        Parameters
+        ----------
+        apish_output : iterable - the decoded apish output lines
+        extract : str ['value', 'key'] - which part of the item is yielded
+        """
+        for notif in cls.extract_notifications(apish_output):
+            for item_id, item_data in notif.get('updates', {}).items():
+                yield item_id, item_data[extract]
+
     def execute(self, cmdopts):
+        return list(self.iter_execute(cmdopts))
+
+    def iter_execute(self, cmdopts):
+        """
+        Execute the apish command and yield each decoded JSON output line as
+        it is received.  Implementations must raise RuntimeError if the
+        command fails or times out, including after output has been yielded.
+        """
         raise NotImplementedError()
 
     @staticmethod
@@ -28,6 +53,18 @@ class APISH(object):
         raise NotImplementedError()
 
     def get(self, dataset_name, **cmdopts):
+        with span('apish', host=getattr(self, 'hostname', None), dataset=dataset_name,
+                  path=cmdopts.get('path')):
+            return self.execute(self._get_cmdopts(dataset_name, **cmdopts))
+
+    def iter_get(self, dataset_name, **cmdopts):
+        # the span is the time to consume the complete command output.
+
+        with span('apish', host=getattr(self, 'hostname', None), dataset=dataset_name,
+                  path=cmdopts.get('path')):
+            yield from self.iter_execute(self._get_cmdopts(dataset_name, **cmdopts))
+
+    def _get_cmdopts(self, dataset_name, **cmdopts):
         apish_cmdopts = ['get']
         cmdopts['dataset_name'] = dataset_name
 
@@ -39,20 +76,17 @@ class APISH(object):
         for key, value in cmdopts.items():
             apish_cmdopts.append(f'--{key.replace("_", "-")}={value}')
 
-        return self.execute(apish_cmdopts)
+        return apish_cmdopts
 
-    def get_devices(self):
-        lines = self.get(dataset_name='analytics', path=self.PATH['devices'])
-        devices = dict()
-
-        for notif in self.extract_notifications(lines):
-            for sn, sn_val in notif.get('updates', {}).items():
-                devices[sn] = sn_val['value']
+    def iter_devices(self):
+        lines = self.iter_get(dataset_name='analytics', path=self.PATH['devices'])
+        return self.extract_updates(lines)
 
-        return devices
+    def get_devices(self):
+        return dict(self.iter_devices())
 
     def get_events(self, **cmdopts):
-        lines = self.get(dataset_name='analytics', path=self.PATH['events'],
-                         **cmdopts)
+        lines = self.iter_get(dataset_name='analytics', path=self.PATH['events'],
+                              **cmdopts)
 
         return self.extract_notifications(lines)
@@ -1,6 +1,9 @@
+import os
+import signal
 import subprocess
+import threading
+import tempfile
 import json
-from io import BytesIO
 
 import jsonlines
 from cvppyez.apish.common import APISH
@@ -22,20 +25,55 @@ class LocalApish(APISH):
     def path_str(path):
         return json.dumps(path)
 
-    def execute(self, cmdopts):
+    def iter_execute(self, cmdopts):
         cmd = [APISH.BIN] + cmdopts
-        self.log.info("APISH CALL: %s" % ' '.join(cmd))
+        cmd_str = ' '.join(cmd)
+        self.log.info("APISH CALL: %s" % cmd_str)
 
-        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        try:
-            c_out, c_err = proc.communicate(timeout=self.opts_driver['timeout'])
+        # stderr is sent to a file rather than a pipe so that a chatty command
+        # cannot block on a full stderr pipe while stdout is being consumed.
 
-        except subprocess.TimeoutExpired:
-            proc.kill()
-            c_out, c_err = proc.communicate()
+        with tempfile.TemporaryFile() as c_err:
+            # the command is run in its own process group so that any child
+            # processes holding the stdout pipe open are killed as well.
 
-        if proc.returncode:
-            raise RuntimeError('FAIL: %s' % ' '.join(cmd), c_out, c_err)
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=c_err,
+                                    start_new_session=True)
+            timed_out = threading.Event()
 
-        return list(jsonlines.Reader(BytesIO(c_out)))
+            def kill():
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
 
+            def on_timeout():
+                timed_out.set()
+                kill()
+
+            timer = threading.Timer(self.opts_driver['timeout'], on_timeout)
+            timer.start()
+
+            try:
+                yield from jsonlines.Reader(proc.stdout)
+
+            except jsonlines.InvalidLineError as exc:
+                # a partial line is expected when the process is killed on
+                # timeout; this case is reported below.
+                if not timed_out.is_set():
+                    raise RuntimeError('FAIL: %s' % cmd_str, str(exc))
+
+            finally:
+                timer.cancel()
+                if proc.poll() is None:
+                    kill()
+
+                proc.wait()
+                proc.stdout.close()
+
+            if timed_out.is_set():
+                raise RuntimeError('TIMEOUT: %s' % cmd_str, self.opts_driver['timeout'])
+
+            if proc.returncode:
+                c_err.seek(0)
+                raise RuntimeError('FAIL: %s' % cmd_str, proc.returncode, c_err.read())
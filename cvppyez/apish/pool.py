@@ -0,0 +1,114 @@
+import asyncio
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from cvppyez.apish.remote import RemoteApish
+
+__all__ = ['RemoteApishPool']
+
+
+class RemoteApishPool(object):
+    """
+    This class is used to execute many apish "get" commands concurrently on a
+    remote CVP server.  Each command is executed on its own SSH channel, and
+    the channels are multiplexed over a small number of SSH transports
+    (connections).  Each transport reconnects automatically if it drops.
+
+    The OpenSSH server limits the number of sessions per connection
+    (MaxSessions, default 10) so `max_channels` should be kept below that
+    value; use `n_transports` to increase the total concurrency.
+
+    Parameters
+    ----------
+    hostname : str - the CVP server hostname
+    n_transports : int - the number of SSH connections
+    max_channels : int - the maximum concurrent channels per connection
+
+    Other Parameters
+    ----------------
+    Passed to each RemoteApish instance, for example `user` or `timeout`.
+
+    Examples
+    --------
+        with RemoteApishPool('cvp', n_transports=2) as pool:
+            futures = [pool.submit('analytics', path=path) for path in paths]
+    """
+    DEFAULT_MAX_CHANNELS = 8
+
+    def __init__(self, hostname, n_transports=1, max_channels=None, **apish_kwargs):
+        self.max_channels = max_channels or self.DEFAULT_MAX_CHANNELS
+        self.transports = [RemoteApish(hostname, **apish_kwargs)
+                           for _ in range(n_transports)]
+
+        self._next_transport = itertools.cycle(self.transports)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_channels * n_transports,
+            thread_name_prefix='apish'
+        )
+
+    def _get(self, dataset_name, cmdopts):
+        with self._lock:
+            apish = next(self._next_transport)
+
+        return apish.get(dataset_name, **cmdopts)
+
+    def submit(self, dataset_name, **cmdopts):
+        """
+        Submit an apish "get" command for execution.
+
+        Returns
+        -------
+        concurrent.futures.Future - the result is the list of apish output
+        lines, as returned by APISH.get().
+        """
+        return self._executor.submit(self._get, dataset_name, cmdopts)
+
+    def iter_completed(self, queries):
+        """
+        Execute each of the `queries` concurrently, and yield the results in
+        the order of completion.
+
+        Parameters
+        ----------
+        queries : iterable of tuple(dataset_name, dict of cmdopts)
+
+        Yields
+        ------
+        tuple - (query, apish output lines).  If the command failed, then the
+        RuntimeError exception is raised.
+        """
+        futures = {
+            self.submit(dataset_name, **cmdopts): (dataset_name, cmdopts)
+            for dataset_name, cmdopts in queries
+        }
+
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+    async def aget(self, dataset_name, **cmdopts):
+        """ The asyncio form of submit() """
+        return await asyncio.wrap_future(self.submit(dataset_name, **cmdopts))
+
+    async def aiter_completed(self, queries):
+        """ The asyncio form of iter_completed() """
+        queries = list(queries)
+
+        async def tagged(query):
+            dataset_name, cmdopts = query
+            return query, await self.aget(dataset_name, **cmdopts)
+
+        for next_done in asyncio.as_completed([tagged(query) for query in queries]):
+            yield await next_done
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for apish in self.transports:
+            apish.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,21 +1,20 @@
 import json
+import socket
+import threading
 from pathlib import Path
-from io import BytesIO
 
 import paramiko
 import jsonlines
 
 from cvppyez.apish.common import APISH
+from cvppyez.tracing import span
 
 
 class RemoteApish(APISH):
 
-    def __init__(self, hostname, port=22, user=None, password=None, ssh_config=None, log=None):
-        super(RemoteApish, self).__init__(log)
-        client = paramiko.SSHClient()
-        client.set_missing_host_key_policy(paramiko.AutoAddPolicy)
-        client.load_system_host_keys()
-
+    def __init__(self, hostname, port=22, user=None, password=None, ssh_config=None, log=None,
+                 timeout=None):
+        super(RemoteApish, self).__init__(log, opts_driver=dict(timeout=timeout))
         fp_ssh_config = None
 
         if not ssh_config:
@@ -42,27 +41,104 @@ class RemoteApish(APISH):
         if port:
             connect_args['port'] = port
 
+        self.hostname = hostname
+        self._connect_args = dict(username=user, **connect_args)
+        self._lock = threading.Lock()
+        self.client = None
+        self.connect()
+
+    def connect(self):
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy)
+        client.load_system_host_keys()
+
         try:
-            client.connect(hostname, username=user, **connect_args)
+            with span('apish.connect', host=self.hostname):
+                client.connect(self.hostname, **self._connect_args)
 
         except Exception as exc:
-            raise RuntimeError(f"Unable to connect to {hostname}: {str(exc)}")
+            raise RuntimeError(f"Unable to connect to {self.hostname}: {str(exc)}")
+
+        if self.client:
+            self.client.close()
 
         self.client = client
+        return self
+
+    def close(self):
+        if self.client:
+            self.client.close()
+
+    @property
+    def is_active(self):
+        transport = self.client.get_transport()
+        return bool(transport and transport.is_active())
+
+    def _exec_command(self, cmd_str):
+        """
+        Execute the command on a new channel of the SSH transport.  Many
+        commands can be executed concurrently from different threads, each on
+        its own channel.  If the transport has dropped, then a new connection
+        is made and the command is retried once.
+        """
+        with self._lock:
+            if not self.is_active:
+                self.log.warning(f"APISH reconnecting to {self.hostname}")
+                self.connect()
+
+            client = self.client
+
+        try:
+            return client.exec_command(cmd_str, timeout=self.opts_driver['timeout'])
+
+        except (paramiko.SSHException, EOFError, socket.error):
+
+            # if the transport is still active, then the failure was for this
+            # channel only, for example the server refused to open another
+            # session; do not disrupt the other channels.
+
+            with self._lock:
+                if self.client is client:
+                    if self.is_active:
+                        raise
+
+                    self.log.warning(f"APISH reconnecting to {self.hostname}")
+                    self.connect()
+
+                client = self.client
+
+        return client.exec_command(cmd_str, timeout=self.opts_driver['timeout'])
 
     @staticmethod
     def path_str(path):
         return f"'{json.dumps(path)}'"
 
-    def execute(self, command_options):
+    def iter_execute(self, command_options):
         cmd = [APISH.BIN] + command_options
         cmd_str = ' '.join(cmd)
         self.log.info(f"APISH CALL: {cmd_str}")
 
-        c_in, c_out, c_err = self.client.exec_command(cmd_str)
+        # the timeout applies to each read from the channel, so a command
+        # that stops producing output mid-stream is also detected.
+
+        try:
+            c_in, c_out, c_err = self._exec_command(cmd_str)
+
+        except (paramiko.SSHException, EOFError, socket.error) as exc:
+            raise RuntimeError(f'command failed: {str(exc)}', cmd_str)
+
+        channel = c_out.channel
+
+        try:
+            try:
+                yield from jsonlines.Reader(c_out)
+
+            except socket.timeout:
+                raise RuntimeError('command timeout', cmd_str, self.opts_driver['timeout'])
 
-        rc = c_out.channel.recv_exit_status()
-        if rc != 0:
-            raise RuntimeError(f'command rc={rc}', cmd_str, rc, c_err.read().decode())
+            rc = channel.recv_exit_status()
+            if rc != 0:
+                raise RuntimeError(f'command rc={rc}', cmd_str, rc, c_err.read().decode())
 
-        return list(jsonlines.Reader(BytesIO(c_out.read())))
+        finally:
+            channel.close()
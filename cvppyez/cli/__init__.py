@@ -0,0 +1 @@
+from cvppyez.cli.main import cli, main
@@ -0,0 +1,3 @@
+from cvppyez.cli.main import main
+
+main()
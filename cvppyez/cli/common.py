@@ -0,0 +1,384 @@
+"""
+The command parts shared by the cvp-pyez programs: the report banner, the
+click Command that sets up the logging, tracing, hostname matching and CVP
+inventory, and the shared command options.
+
+This module is imported to show the program help, so it only imports click,
+the standard library and the light cvppyez modules; the heavy packages
+(Nornir, NAPALM, aiohttp, tabulate) are imported by the functions that use
+them.
+"""
+
+import os
+import sys
+import logging
+from functools import reduce
+from datetime import datetime, timedelta, timezone
+
+import click
+
+from cvppyez.log import setup_log
+from cvppyez.matcher import make_matcher, parse_select, SelectTerm, SELECT_FIELDS
+from cvppyez.engines import ENGINES, default_engine
+from cvppyez.sinks import SINKS, open_sink
+
+__all__ = ['CLIContext', 'Command', 'opts_shared', 'opts_sink', 'print_banner', 'print_errors',
+           'print_list_devices', 'print_report', 'load_inventory', 'load_sink', 'LN_SEP']
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                               CONSTANTS
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+DEFAULT_LOGFILE = "/dev/null"
+DEFAULT_LOGLEVEL = 'warning'
+
+LN_SEP = "#" + "-" * 79
+TIME_FORMAT = "%Y-%m-%d (%a) %H:%M:%S"
+REQ_ENV_VARS = ('CVP_SERVER', 'CVP_USER', 'CVP_PASSWORD')
+
+# the report times are shown in EST, a fixed UTC-5 offset.
+
+EST = timezone(timedelta(hours=-5), 'EST')
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                              Command OUTPUTS
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+def print_banner(ctx):
+    """
+    Prints the report banner consisting of the program name, version, the CVP
+    login, the time, and the command parameters listed in the command
+    `banner_params`.
+
+    Parameters
+    ----------
+    ctx : click.Context
+    """
+    print("\n")
+    print(LN_SEP)
+    nowtime = datetime.now(EST).strftime(TIME_FORMAT)
+    print(f"# {ctx.obj.prog_name}, version {ctx.command.prog_version}")
+    print(f"# CVP: {ctx.obj.cvp_user}@{ctx.obj.cvp_server}")
+    print(f"# TIME: {nowtime}")
+
+    for param, title in ctx.command.banner_params.items():
+        print(f"# {title}: {ctx.params[param]}")
+
+    print(LN_SEP)
+
+
+def print_report(headers, tabular_data):
+    """ Prints the table of results followed by the report separator line """
+    from tabulate import tabulate
+
+    table = tabulate(headers=headers, tabular_data=tabular_data)
+    print(f"\n{table}\n\n{LN_SEP}\n")
+
+
+def load_sink(optargs):
+    """
+    Returns the result sink selected by the --sink and --output options; exits
+    if the sink cannot be opened.
+    """
+    try:
+        return open_sink(optargs['sink'], optargs['output'])
+
+    except RuntimeError as exc:
+        sys.exit(f"Unable to open the {optargs['sink']} result sink: {exc.args[0]}")
+
+    except OSError as exc:
+        sys.exit(f"Unable to open the {optargs['sink']} result sink: {str(exc)}")
+
+
+def print_errors(res):
+    """ Prints the table of the hosts that failed in the Nornir result `res` """
+    from tabulate import tabulate
+
+    print("Execution errors detected on hosts:")
+    failed = [[host, h_res.result] for host, h_res in res.items() if h_res.failed]
+    print(tabulate(
+        headers=['hostname', 'result'],
+        tabular_data=failed
+    ))
+
+
+def print_list_devices(nr):
+    for host in sorted(nr.inventory.hosts):
+        print(host)
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                              CVP INVENTORY
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+def load_inventory(ctx, select=None):
+    """
+    Gather the CVP inventory of the hosts selected by the `select` terms, by
+    default the --hostname and --select options, into the command context
+    `nr` and `n_devs` attributes; the program exits if the inventory cannot
+    be gathered or no hosts are selected.
+
+    Returns
+    -------
+    Nornir
+    """
+    from cvppyez.nornir import get_inventory
+
+    print("Gathering CVP inventory, please wait.")
+
+    try:
+        nr = get_inventory(select=ctx.obj.select if select is None else select,
+                           daemon=ctx.obj.engine == 'daemon')
+
+    except RuntimeError as exc:
+        sys.exit(str(exc))
+
+    n_devs = len(nr.inventory.hosts)
+    if not n_devs:
+        print("No devices match hostname filter")
+        sys.exit(1)
+
+    ctx.obj.nr = nr
+    ctx.obj.n_devs = n_devs
+    return nr
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                              CLICK Command
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+class CLIContext(object):
+    pass
+
+
+class Command(click.Command):
+    """
+    The click Command of the programs that use CVP as the inventory source.
+    Before running the command the Command checks the CVP environment
+    variables, sets up the logging, tracing, and hostname matching, and
+    unless `load_inventory` is False gathers the CVP inventory.
+    """
+    prog_version = None
+    load_inventory = True
+    banner_params = dict()
+
+    cli_help = ''
+
+    cvp_help = """
+    You must setup the following environment variables:
+
+        *  CVP_SERVER = hostname of your CVP server
+        *  CVP_USER = your login user name
+        *  CVP_PASSWORD = your login password
+
+    This program will use CVP to obtain the inventory, filter it based on your
+    options, and then scan the EOS devices over the eAPI directly.
+    """
+
+    pattern_help = \
+        """
+Patterns:
+    <glob-pattern>
+
+        Glob pattern matching is what is generally used with filepatterns in Unix
+        For example:
+
+            'foo*'          - All strings that start with 'foo'
+            'foo[12]*'      - All strings that start with foo1 or foo2
+
+        More online: https://en.wikipedia.org/wiki/Glob_(programming)
+
+    <regex-pattern>
+
+        Regular express matching.  If you're a network engineer, you're probably
+        familiar with regular expressiosn.   For example:
+
+            'sp.*'          - All strings that begin with 'sp'
+            '(sp|tr).*'     - All strings that begin with either 'sp' or 'tr'
+
+        More online: https://regex101.com/
+        """
+
+    def get_help(self, ctx):
+        """ customize the --help output """
+        return '\n'.join([
+            self.cli_help,
+            self.cvp_help,
+            super(Command, self).get_help(ctx),
+            self.pattern_help
+        ])
+
+    def invoke(self, ctx):
+
+        # ensure that all required Environment variables are setup before
+        # running the commands.
+
+        ctx.obj = CLIContext()
+
+        try:
+            all(os.environ[ev_name] for ev_name in REQ_ENV_VARS)
+
+        except KeyError as exc:
+            raise click.UsageError(
+                f'Missing Environment variable: {str(exc)}',
+                ctx=ctx
+            )
+
+        ctx.obj.prog_name = ctx.command_path
+        ctx.obj.cvp_server = os.environ['CVP_SERVER']
+        ctx.obj.cvp_user = os.environ['CVP_USER']
+
+        optargs = ctx.params
+
+        log = ctx.obj.log = setup_log(optargs['log'])
+        log_level = optargs['log_level']
+        log.setLevel(logging.getLevelName(log_level.upper()))
+
+        if optargs['trace'] or optargs['trace_prom']:
+            from cvppyez.tracing import enable_tracing, print_trace_report
+
+            tracer = enable_tracing()
+            ctx.call_on_close(lambda: print_trace_report(
+                tracer, json_file=optargs['trace'], prom_file=optargs['trace_prom']))
+
+        # if the User provided a hostname filter, then setup for that matching.
+        # the `select` terms, the hostname and the --select options, are used
+        # to select the hosts from the CVP inventory index, and the
+        # `match_hostname` function when matching hostnames otherwise.
+
+        ctx.obj.engine = optargs['engine']
+
+        use_regex = optargs['use_regex']
+        search_hostname = optargs['hostname']
+
+        try:
+            ctx.obj.select = [parse_select(spec, use_regex=use_regex)
+                              for spec in optargs['select']]
+
+            if not search_hostname:
+                ctx.obj.match_hostname = None
+            else:
+                ctx.obj.match_hostname = make_matcher(
+                    name='hostname', value=search_hostname, use_regex=use_regex)
+                ctx.obj.select.append(SelectTerm('name', [search_hostname], use_regex))
+
+        except ValueError as exc:
+            raise click.UsageError(str(exc), ctx=ctx)
+
+        if self.load_inventory:
+            print_banner(ctx)
+            load_inventory(ctx)
+
+        super(Command, self).invoke(ctx)
+
+
+# -----------------------------------------------------------------------------
+#                           Command options
+# -----------------------------------------------------------------------------
+
+opt_use_regex = click.option(
+    '-R', '--use-regex',
+    help='Use regular expression pattern matching',
+    is_flag=True
+)
+
+opt_hostname = click.option(
+    '--hostname', '-h',
+    help='Search devices matching host name; use -R to enable regex',
+    metavar="[<glob-pattern>|<regex-pattern>]",
+)
+
+opt_select = click.option(
+    '--select', '-s',
+    help=f'Select devices by field: {", ".join(SELECT_FIELDS)}; '
+         'comma separated glob patterns, or a regex with -R; repeat to combine',
+    metavar='<field>=<pattern>[,<pattern>]',
+    multiple=True
+)
+
+opt_engine = click.option(
+    '--engine',
+    help='Device task execution engine; default from $CVP_ENGINE',
+    type=click.Choice(ENGINES),
+    default=default_engine,
+    show_default=ENGINES[0]
+)
+
+opt_trace = click.option(
+    '--trace',
+    help='Record per-host, per-phase timings to this JSON report file',
+    type=click.Path(dir_okay=False)
+)
+
+opt_trace_prom = click.option(
+    '--trace-prom',
+    help='Record the timings to this Prometheus textfile',
+    type=click.Path(dir_okay=False)
+)
+
+opt_log = click.option(
+    '--log',
+    help='log to file',
+    default=DEFAULT_LOGFILE
+)
+
+opt_log_level = click.option(
+    '--log-level',
+    help='logging level',
+    type=click.Choice(['debug', 'info', 'warning', 'error', 'critical']),
+    default=DEFAULT_LOGLEVEL,
+    callback=lambda ctx, param, value: value.upper() if value is not None else None
+)
+
+
+def opts_shared(cmd_func):
+    """
+    Create a decorator that combines all of the common options (shared) across
+    multiple commands. The decorator approach is used by the click framework
+    to add options to a give command.  This this function effective "stacks"
+    a bunch of options as a single decorator.
+
+    Parameters
+    ----------
+    cmd_func : function to decorate
+
+    Returns
+    -------
+    function - cmd_func now stacked with the common options.
+    """
+    return reduce(
+        lambda _f, opt_func: opt_func(_f), [
+            opt_hostname, opt_select, opt_use_regex, opt_engine, opt_trace, opt_trace_prom,
+            opt_log, opt_log_level],
+        cmd_func)
+
+
+opt_sink = click.option(
+    '--sink',
+    help='Store the results as a JSON file per host, a JSON Lines file, or a Parquet file',
+    type=click.Choice(list(SINKS)),
+    default='files',
+    show_default=True
+)
+
+opt_output = click.option(
+    '--output', '-o',
+    help='Result directory of the JSON files, or the result file; '
+         'a ".gz" or ".zst" JSON Lines file is compressed',
+    type=click.Path()
+)
+
+
+def opts_sink(cmd_func):
+    """ Create a decorator that stacks the result sink options, as opts_shared() """
+    return reduce(lambda _f, opt_func: opt_func(_f), [opt_output, opt_sink], cmd_func)
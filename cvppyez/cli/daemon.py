@@ -0,0 +1,166 @@
+"""
+The cvp-pyez daemon program is used to run the cvp-pyez daemon, which keeps
+a logged-in CVP client, the device inventory, and the device eAPI
+connections resident.  The other cvp-pyez programs use the running daemon,
+rather than repeating that setup on each run, when run with "--engine
+daemon" or with the environment variable CVP_ENGINE=daemon.
+
+For more information about this program use the "--help" command option.
+"""
+
+import os
+import sys
+import asyncio
+import logging
+
+import click
+
+__all__ = ['cli']
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                               CONSTANTS
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+PROG_VERSION = '0.1.0'                      # bump on each release
+
+DEFAULT_LOGLEVEL = 'info'
+
+REQ_ENV_VARS = ('CVP_SERVER', 'CVP_USER', 'CVP_PASSWORD')
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                              CLICK Commands
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+# the cvppyez.daemon module imports the complete engine, so the option
+# defaults are taken from it only when a command is run.
+
+def daemon_default(name):
+    """ Returns the option default callable for the CvpDaemon attribute `name` """
+    def default():
+        from cvppyez.daemon import CvpDaemon
+        return getattr(CvpDaemon, name)
+
+    return default
+
+
+def default_socket_path():
+    from cvppyez.daemon import socket_path
+    return socket_path()
+
+
+opt_socket = click.option(
+    '--socket', 'path',
+    help='Daemon Unix socket path; default from $CVP_DAEMON_SOCKET',
+    default=default_socket_path,
+    show_default='~/.cache/cvp-pyez/daemon.sock'
+)
+
+
+def request(op, path, **args):
+    from cvppyez.daemon import DaemonError, daemon_request
+
+    try:
+        return daemon_request(op, path=path, **args)
+
+    except DaemonError as exc:
+        sys.exit(f"ERROR: {str(exc)}")
+
+
+@click.group()
+@click.version_option(PROG_VERSION)
+def cli():
+    """
+    Run the cvp-pyez daemon, or manage the running daemon.
+    """
+    pass
+
+
+@cli.command(name='start')
+@opt_socket
+@click.option(
+    '--inventory-ttl',
+    help='Seconds between the inventory device changes syncs from CVP',
+    type=click.IntRange(min=1),
+    default=daemon_default('DEFAULT_INVENTORY_TTL')
+)
+@click.option(
+    '--full-sync-ttl',
+    help='Seconds between the inventory rebuilds from CVP',
+    type=click.IntRange(min=1),
+    default=daemon_default('DEFAULT_FULL_SYNC_TTL')
+)
+@click.option(
+    '--max-inflight',
+    help='Maximum concurrent device eAPI requests',
+    type=click.IntRange(min=1)
+)
+@click.option(
+    '--log-level',
+    help='logging level',
+    type=click.Choice(['debug', 'info', 'warning', 'error', 'critical']),
+    default=DEFAULT_LOGLEVEL
+)
+def cli_start(path, inventory_ttl, full_sync_ttl, max_inflight, log_level):
+    """
+    Run the daemon in the foreground, until stopped.
+    """
+    missing = [ev_name for ev_name in REQ_ENV_VARS if not os.getenv(ev_name)]
+    if missing:
+        raise click.UsageError(f'Missing Environment variable: {", ".join(missing)}')
+
+    from cvppyez.daemon import CvpDaemon
+
+    logging.basicConfig(format='%(asctime)s %(levelname)s:%(message)s',
+                        level=logging.getLevelName(log_level.upper()))
+
+    groupby_tags = list(filter(None, os.getenv('CVP_INVENTORY_GROUPBY', '').split(',')))
+
+    daemon = CvpDaemon(path=path, inventory_ttl=inventory_ttl, full_sync_ttl=full_sync_ttl,
+                       groupby_tags=groupby_tags or None, max_inflight=max_inflight)
+
+    try:
+        asyncio.run(daemon.serve())
+
+    except RuntimeError as exc:
+        sys.exit(f"ERROR: {str(exc)}")
+
+
+@cli.command(name='status')
+@opt_socket
+def cli_status(path):
+    """
+    Show the running daemon status.
+    """
+    from tabulate import tabulate
+
+    status = request('status', path)
+    status['cvp'] = f"{status['cvp']['username']}@{status['cvp']['host']} " \
+                    f"(version {status['cvp']['version']})"
+    for key in ('uptime', 'inventory_age', 'full_sync_age'):
+        status[key] = f"{status[key]:.0f}s"
+
+    print(tabulate(tabular_data=status.items()))
+
+
+@cli.command(name='refresh')
+@opt_socket
+def cli_refresh(path):
+    """
+    Refresh the daemon inventory from CVP now.
+    """
+    print(f"Inventory refreshed: {request('refresh', path)['hosts']} hosts")
+
+
+@cli.command(name='stop')
+@opt_socket
+def cli_stop(path):
+    """
+    Stop the running daemon.
+    """
+    print(f"Stopped daemon pid {request('shutdown', path)['pid']}")
@@ -0,0 +1,469 @@
+"""
+The cvp-pyez find-host program is used to scan EOS devices using CVP as the
+inventory source looking for either MAC addresses found from "show mac
+address-table <macaddr>" or for an IP address found from "show ip arp
+<ipaddr>".
+
+For more information about this program use the "--help" command option.
+"""
+
+import click
+
+from cvppyez import validators
+from cvppyez.hostindex import HostIndex
+from cvppyez.cli.common import (
+    Command, opts_shared, print_banner, print_report, load_inventory, LN_SEP
+)
+
+__all__ = ['cli']
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                               CONSTANTS
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+PROG_VERSION = '0.8.0'                      # bump on each release
+
+DEFAULT_INDEX_FILE = 'cvp-hosts.db'
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                              Command OUTPUTS
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+def print_find_results(mac_res, ip_res=None):
+    if ip_res:
+        print_report(headers=['Hostname', 'IP addr', 'MAC addr', 'Interface'],
+                     tabular_data=[
+                         [item['hostname'], item['ipaddr'], item['macaddr'], item['interface']]
+                         for item in ip_res
+                     ])
+
+    if not mac_res:
+        print("No MAC address matches.")
+        return
+
+    print_report(headers=['Hostname', 'MAC addr', 'VLAN', 'Interface'],
+                 tabular_data=[
+                     [item['hostname'], item['macaddr'], item['vlan'], item['interface']]
+                     for item in mac_res
+                 ])
+
+
+def print_mac_results(mac_res):
+    print_report(headers=['Hostname', 'VLAN', 'Interface'],
+                 tabular_data=[
+                     [item['hostname'], item['vlan'], item['interface']]
+                     for item in mac_res
+                 ])
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                              CLICK Command
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+class FindHostCommand(Command):
+    prog_version = PROG_VERSION
+    load_inventory = False
+    cli_help = """
+    This program is used to find an end host either by MAC address or IP
+    address. The host is found searching across a collection of devices.
+    """
+
+
+class FindMacCommand(FindHostCommand):
+    banner_params = dict(macaddr='FIND MACADDR')
+
+
+class FindIpCommand(FindHostCommand):
+    banner_params = dict(ipaddr='FIND IP ADDR')
+
+
+opt_index_file = click.option(
+    '--index-file',
+    help='Find from the host index file rather than searching the devices',
+    type=click.Path(dir_okay=False, exists=True),
+)
+
+opt_all_ports = click.option(
+    '--all-ports', '-a',
+    is_flag=True,
+    help='Find MAC on any interface type'
+)
+
+opt_telemetry = click.option(
+    '--telemetry',
+    is_flag=True,
+    help='Find from the CVP telemetry first; search only the devices it does not cover'
+)
+
+
+@click.group()
+@click.version_option(PROG_VERSION)
+def cli():
+    """
+    Find an end-host by MAC address or IP address.
+    """
+    pass
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                          CLI FIND HOST BY MACADDR
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+
+@cli.command(name='mac', cls=FindMacCommand)
+@click.argument(
+    'macaddr',
+    metavar='[MAC address]'
+)
+@opts_shared
+@opt_all_ports
+@opt_index_file
+@opt_telemetry
+@click.pass_context
+def cli_find_host_mac(ctx, macaddr, **optargs):
+    """
+    Find MAC address on Eth ports; unless --all-ports.
+    """
+    v_macaddr = optargs['macaddr'] = validators.validate_macaddr(macaddr)
+    if not v_macaddr:
+        raise click.BadParameter(
+            f'macaddr "{macaddr}" is not a valid MAC address',
+            ctx=ctx
+        )
+
+    if optargs['index_file']:
+        from cvppyez.tasks.find_host import index_find_host_by_macaddr
+
+        print_banner(ctx)
+        res = index_find_host_by_macaddr(
+            index=HostIndex(optargs['index_file']), macaddrs=[v_macaddr],
+            all_ports=optargs['all_ports'], match_hostname=ctx.obj.match_hostname
+        )
+        print_find_results(res)
+        return
+
+    from alive_progress import alive_bar
+    from cvppyez.tasks.find_host import nr_find_host_by_macaddr
+
+    nr = load_inventory(ctx)
+    res = list()
+
+    if optargs['telemetry']:
+        from cvppyez.tasks.find_host import telemetry_find_host_by_macaddr
+
+        res, uncovered = telemetry_find_host_by_macaddr(
+            hosts=nr.inventory.hosts, macaddr=v_macaddr, all_ports=optargs['all_ports']
+        )
+        nr = cli_telemetry_uncovered(nr, uncovered)
+
+    n_devs = len(nr.inventory.hosts)
+
+    if n_devs:
+        proceed = click.prompt(f"Search {n_devs} devices for MAC address {macaddr}? [Y/n]")
+        if proceed != 'Y':
+            raise click.Abort()
+
+        with alive_bar(n_devs) as bar:
+            res.extend(nr_find_host_by_macaddr(
+                nr=nr, macaddr=v_macaddr, all_ports=optargs['all_ports'],
+                progress=bar, engine=ctx.obj.engine
+            ))
+
+    if not len(res):
+        print("No matches.")
+        return
+
+    print_banner(ctx)
+    print_mac_results(res)
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                          CLI FIND HOST BY IP ADDR
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+@cli.command(name='ip', cls=FindIpCommand)
+@click.argument(
+    'ipaddr',
+    metavar='[IP address]'
+)
+@opts_shared
+@opt_all_ports
+@opt_index_file
+@click.option(
+    '--pipeline/--no-pipeline',
+    default=True,
+    show_default=True,
+    help='Find the IP address and all found MAC addresses in a single sweep'
+)
+@opt_telemetry
+@click.pass_context
+def cli_find_host_ip(ctx, ipaddr, **optargs):
+    """
+    Find end-host by IP address.
+    """
+
+    v_ipaddr = optargs['ipaddr'] = validators.validate_ipaddr(ipaddr)
+
+    if not v_ipaddr:
+        raise click.BadParameter(
+            f'ipaddr "{ipaddr}" is not a valid IP address',
+            ctx=ctx
+        )
+
+    print_banner(ctx)
+
+    if optargs['index_file']:
+        cli_lookup_index(ctx, index_file=optargs['index_file'],
+                         ipaddrs=[v_ipaddr], all_ports=optargs['all_ports'])
+        return
+
+    from alive_progress import alive_bar
+    from cvppyez.tasks.find_host import (
+        nr_find_host_by_ipaddr, nr_find_host_by_ipaddr_pipelined, nr_find_host_by_macaddr,
+        telemetry_find_macaddrs
+    )
+
+    nr = load_inventory(ctx)
+    ip_res, mac_tables = list(), dict()
+
+    if optargs['telemetry']:
+        from cvppyez.tasks.find_host import telemetry_find_host_by_ipaddr
+
+        ip_res, mac_tables, uncovered = telemetry_find_host_by_ipaddr(
+            hosts=nr.inventory.hosts, ipaddr=v_ipaddr
+        )
+        nr = cli_telemetry_uncovered(nr, uncovered)
+
+    n_devs = len(nr.inventory.hosts)
+
+    if n_devs:
+        proceed = click.prompt(f"Search {n_devs} devices for IP address {ipaddr}? [Y/n]")
+        if proceed != 'Y':
+            raise click.Abort()
+
+    if optargs['pipeline']:
+        mac_res = list()
+
+        if n_devs:
+            with alive_bar(n_devs) as bar:
+                sweep_ip_res, mac_res = nr_find_host_by_ipaddr_pipelined(
+                    nr=nr, ipaddr=v_ipaddr, all_ports=optargs['all_ports'],
+                    progress=bar, engine=ctx.obj.engine,
+                    macaddrs=[item['macaddr'] for item in ip_res]
+                )
+            ip_res.extend(sweep_ip_res)
+
+        if not len(ip_res):
+            print("No matches.")
+            return
+
+        mac_res = telemetry_find_macaddrs(
+            mac_tables, macaddrs=[item['macaddr'] for item in ip_res],
+            all_ports=optargs['all_ports']
+        ) + mac_res
+
+        print_find_results(mac_res, ip_res=[
+            dict(item, ipaddr=v_ipaddr) for item in ip_res
+        ])
+        return
+
+    if n_devs:
+        with alive_bar(n_devs) as bar:
+            ip_res.extend(nr_find_host_by_ipaddr(
+                nr=nr, ipaddr=v_ipaddr, progress=bar, engine=ctx.obj.engine
+            ))
+
+    if not len(ip_res):
+        print("No matches.")
+        return
+
+    table_data = [
+        [item['hostname'], item['macaddr'], item['interface']]
+        for item in ip_res
+    ]
+
+    print_report(headers=['Hostname', 'MAC addr', 'Interface'], tabular_data=table_data)
+
+    # ----------------------------------------
+    # now run the search for the found macaddr
+    # ----------------------------------------
+
+    macaddr = table_data[0][1]
+    res = telemetry_find_macaddrs(mac_tables, macaddrs=[macaddr],
+                                  all_ports=optargs['all_ports'])
+
+    if n_devs:
+        proceed = click.prompt(f"Search {n_devs} devices for MAC address {macaddr}? [Y/n]")
+        if proceed != 'Y':
+            raise click.Abort()
+
+        with alive_bar(n_devs) as bar:
+            res.extend(nr_find_host_by_macaddr(
+                nr=nr, macaddr=macaddr, progress=bar,
+                all_ports=optargs['all_ports'], engine=ctx.obj.engine
+            ))
+
+    if not len(res):
+        print("No matches.")
+        return
+
+    print_mac_results(res)
+
+
+def cli_telemetry_uncovered(nr, uncovered):
+    """
+    Print the number of devices found from the CVP telemetry, and return the
+    Nornir instance of the `uncovered` devices to be searched.
+    """
+    from cvppyez.nornir import filter_hosts
+
+    n_found = len(nr.inventory.hosts) - len(uncovered)
+    print(f"Searched {n_found} devices from CVP telemetry, "
+          f"{len(uncovered)} devices are not covered.")
+
+    return filter_hosts(nr, uncovered)
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                          CLI HOST INDEX
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+@cli.command(name='index', cls=FindHostCommand)
+@opts_shared
+@click.option(
+    '--index-file',
+    help='Host index file',
+    type=click.Path(dir_okay=False),
+    default=DEFAULT_INDEX_FILE,
+    show_default=True
+)
+@click.option(
+    '--max-age',
+    help='Only refresh devices with a snapshot older than max-age seconds',
+    type=click.IntRange(min=0),
+    default=0
+)
+@click.pass_context
+def cli_build_index(ctx, **optargs):
+    """
+    Collect MAC and ARP tables into the host index file.
+    """
+    from alive_progress import alive_bar
+    from cvppyez.eapi import run_engine
+    from cvppyez.nornir import filter_hosts
+    from cvppyez.tasks.find_host import nr_task_collect_host_tables, aio_task_collect_host_tables
+
+    print_banner(ctx)
+    nr = load_inventory(ctx)
+
+    index = HostIndex(optargs['index_file'])
+
+    # remove the devices that are no longer in the CVP inventory; only when
+    # the complete inventory is being indexed.
+
+    if not ctx.obj.select:
+        index.remove_devices(index.hostnames() - set(nr.inventory.hosts))
+
+    stale_hosts = index.stale_hosts(nr.inventory.hosts, max_age=optargs['max_age'])
+    n_devs = len(stale_hosts)
+
+    if not n_devs:
+        print("Host index is up to date.")
+        return
+
+    proceed = click.prompt(f"Collect MAC and ARP tables from {n_devs} devices? [Y/n]")
+    if proceed != 'Y':
+        raise click.Abort()
+
+    nr = filter_hosts(nr, stale_hosts)
+
+    with alive_bar(n_devs) as bar:
+        res = run_engine(ctx.obj.engine, nr, nr_task_collect_host_tables,
+                         aio_task_collect_host_tables, index=index, progress=bar)
+
+    n_changed = sum(1 for h_res in res.values() if h_res.result)
+    print(f"\nRefreshed {n_devs} devices, {n_changed} changed.\n\n{LN_SEP}\n")
+
+
+@cli.command(name='lookup', cls=FindHostCommand)
+@click.argument(
+    'addresses',
+    metavar='[MAC or IP address ...]',
+    nargs=-1
+)
+@opts_shared
+@click.option(
+    '--from-file', '-f',
+    help='File of MAC or IP addresses, one per line',
+    type=click.File()
+)
+@opt_all_ports
+@click.option(
+    '--index-file',
+    help='Host index file',
+    type=click.Path(dir_okay=False, exists=True),
+    default=DEFAULT_INDEX_FILE,
+    show_default=True
+)
+@click.pass_context
+def cli_lookup(ctx, addresses, **optargs):
+    """
+    Find end-hosts by MAC or IP address from the host index.
+    """
+    addresses = list(addresses)
+    if optargs['from_file']:
+        addresses.extend(filter(None, map(str.strip, optargs['from_file'])))
+
+    macaddrs, ipaddrs = list(), list()
+
+    for addr in addresses:
+        if validators.validate_ipaddr(addr):
+            ipaddrs.append(addr)
+        elif validators.validate_macaddr(addr):
+            macaddrs.append(validators.validate_macaddr(addr))
+        else:
+            raise click.BadParameter(
+                f'"{addr}" is not a valid MAC or IP address',
+                ctx=ctx
+            )
+
+    print_banner(ctx)
+    cli_lookup_index(ctx, index_file=optargs['index_file'], macaddrs=macaddrs,
+                     ipaddrs=ipaddrs, all_ports=optargs['all_ports'])
+
+
+def cli_lookup_index(ctx, index_file, all_ports, macaddrs=None, ipaddrs=None):
+    """
+    Find the `macaddrs` and `ipaddrs` in the host index and print the
+    results.  The MAC addresses of found IP addresses are also found.
+    """
+    from cvppyez.tasks.find_host import index_find_host_by_ipaddr, index_find_host_by_macaddr
+
+    index = HostIndex(index_file)
+    macaddrs = set(macaddrs or [])
+
+    ip_res = None
+    if ipaddrs:
+        ip_res = index_find_host_by_ipaddr(index, ipaddrs, ctx.obj.match_hostname)
+        if not ip_res:
+            print("No IP address matches.")
+
+        macaddrs.update(item['macaddr'] for item in ip_res)
+
+    mac_res = index_find_host_by_macaddr(index, macaddrs, all_ports=all_ports,
+                                         match_hostname=ctx.obj.match_hostname)
+    print_find_results(mac_res, ip_res)
@@ -0,0 +1,349 @@
+"""
+The cvp-pyez get program is used to gather the logging content, the running
+configuration, or the show command outputs from EOS devices using CVP as the
+inventory source.  The collected information is stored to a hostname
+specific file.
+
+For more information about this program use the "--help" command option.
+"""
+
+import sys
+from contextlib import contextmanager
+
+import click
+
+from cvppyez.commands import CommandPlan, DEFAULT_BATCH_SIZE
+from cvppyez.cli.common import Command, opts_shared, opts_sink, print_errors, load_sink
+
+__all__ = ['cli']
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                               CONSTANTS
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+PROG_VERSION = '0.7.0'                      # bump on each release
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                              Command OUTPUTS
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+@contextmanager
+def open_store(path):
+    """ Context manager that yields the SnapshotStore at `path`, or None """
+    if not path:
+        yield None
+        return
+
+    from cvppyez.snapstore import SnapshotStore
+
+    with SnapshotStore(path) as store:
+        yield store
+
+
+def print_snapshot_changes(store, res):
+    """
+    Print the number of snapshots stored, and the hosts whose output changed
+    since their last snapshot.
+    """
+    changed = sorted(host for host, h_res in res.items() if not h_res.failed and h_res.result)
+    n_stored = sum(1 for h_res in res.values() if not h_res.failed and h_res.result is not None)
+
+    print(f"Stored {n_stored} snapshots in {store.path}, {len(changed)} changed.")
+    for host in changed:
+        print(f"  {host}")
+
+
+def print_command_errors(res):
+    """
+    Print the commands that failed on the hosts that otherwise completed; the
+    failed command outputs are saved as {'error': <message>}.
+    """
+    from tabulate import tabulate
+
+    cmd_errors = [
+        [host, name, error]
+        for host, h_res in res.items() if not h_res.failed
+        for name, error in (h_res.result or {}).items()
+    ]
+    if not cmd_errors:
+        return
+
+    n_hosts = len({host for host, *_ in cmd_errors})
+    print(f"Command errors detected: {len(cmd_errors)} commands on {n_hosts} hosts")
+    print(tabulate(
+        headers=['hostname', 'command', 'error'],
+        tabular_data=cmd_errors
+    ))
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                              CLICK Command
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+class GetLogsCommand(Command):
+    prog_version = PROG_VERSION
+    banner_params = dict(last='LOG TIME-FRAME')
+    cli_help = """
+    This program is used to collect the device logging data for a specified
+    period of time and save them to file, or to the --store snapshot store.
+    """
+
+
+class GetConfigsCommand(Command):
+    prog_version = PROG_VERSION
+    cli_help = """
+    This program is used to collect the device running configuration and
+    save them to file, or to the --store snapshot store.
+    """
+
+
+class GetShowCommand(Command):
+    prog_version = PROG_VERSION
+    cli_help = """
+    This program is used to collect the 'show' output from each of the devices
+    and store the results as JSON into ${hostanme}.json, or into a single JSON
+    Lines or Parquet file using --sink.
+    """
+
+
+@click.group()
+@click.version_option(PROG_VERSION)
+def cli():
+    """
+    Get logs, configs, or show command outputs from devices.
+    """
+    pass
+
+
+# -----------------------------------------------------------------------------
+#                              'Get Logs' Command
+# -----------------------------------------------------------------------------
+
+def opt_log_lasttimeframe_check(ctx, param, value):
+    """ EOS timeframe validator """
+    time_n, time_scope = value.split(' ')
+
+    try:
+        time_n = int(time_n)
+        if not 1 <= time_n <= 9999:
+            raise click.UsageError(
+                f'Invalid timeframe number {time_n}, must be 1-9999',
+                ctx=ctx
+            )
+
+    except ValueError:
+        raise click.UsageError(
+            f'Invalid timeframe: {value}, not a number',
+            ctx=ctx
+        )
+
+    scopes = ['days', 'hours', 'minutes', 'seconds']
+
+    if time_scope not in scopes:
+        raise click.UsageError(
+            f'Invalid timeframe scope: {time_scope}, must be one of {scopes}',
+            ctx=ctx
+        )
+
+    return value
+
+
+opt_store = click.option(
+    '--store',
+    type=click.Path(file_okay=False),
+    help='Snapshot store directory, in place of the hostname files'
+)
+
+
+opt_log_lasttimeframe = click.option(
+    '--last',
+    help='logging last timeframe, e.g. "1 days"',
+    callback=opt_log_lasttimeframe_check,
+    metavar='[EOS timeframe]',
+    default='1 days'
+)
+
+
+@cli.command(name='logs', cls=GetLogsCommand)
+@click.version_option(PROG_VERSION)
+@opts_shared
+@opt_log_lasttimeframe
+@opt_store
+@click.pass_context
+def cli_get_logs(ctx, **optargs):
+    """
+    Get system logs from the device and save to local file.
+    """
+    from alive_progress import alive_bar
+    from cvppyez.eapi import run_engine
+    from cvppyez.tasks.get import nr_task_get_logs, aio_task_get_logs
+
+    n_devs = ctx.obj.n_devs
+    nr = ctx.obj.nr
+
+    proceed = click.prompt(f"Collect logs from {n_devs} devices? [Y/n]")
+    if proceed != 'Y':
+        raise click.Abort()
+
+    # use a fancy progress bar to show progress. if you need to debug the task
+    # using pdb/breakpoints, do not use this progress bar as it adds background
+    # threading and prevents debuggin of tasks.
+
+    with open_store(optargs['store']) as store, alive_bar(n_devs) as bar:
+        res = run_engine(ctx.obj.engine, nr, nr_task_get_logs, aio_task_get_logs,
+                         timeframe=optargs['last'], progress=bar, store=store)
+
+    if res.failed:
+        print_errors(res)
+
+    if store:
+        print_snapshot_changes(store, res)
+
+
+# -----------------------------------------------------------------------------
+#                         Get Configs CLI Command
+# -----------------------------------------------------------------------------
+
+@cli.command(name='configs', cls=GetConfigsCommand)
+@click.version_option(PROG_VERSION)
+@opts_shared
+@opt_store
+@click.pass_context
+def cli_get_running(ctx, **optargs):
+    """
+    Get running configuration from the device and save to local file.
+    """
+    from alive_progress import alive_bar
+    from cvppyez.eapi import run_engine
+    from cvppyez.tasks.get import nr_task_get_running_config, aio_task_get_running_config
+
+    n_devs = ctx.obj.n_devs
+    nr = ctx.obj.nr
+
+    proceed = click.prompt(f"Collect from {n_devs} devices? [Y/n]")
+    if proceed != 'Y':
+        raise click.Abort()
+
+    # use a fancy progress bar to show progress. if you need to debug the task
+    # using pdb/breakpoints, do not use this progress bar as it adds background
+    # threading and prevents debuggin of tasks.
+
+    with open_store(optargs['store']) as store, alive_bar(n_devs) as bar:
+        res = run_engine(ctx.obj.engine, nr, nr_task_get_running_config,
+                         aio_task_get_running_config, progress=bar, store=store)
+
+    if res.failed:
+        print_errors(res)
+
+    if store:
+        print_snapshot_changes(store, res)
+
+
+# -----------------------------------------------------------------------------
+#                         Get Show CLI Command
+# -----------------------------------------------------------------------------
+
+@cli.command(name='run', cls=GetShowCommand)
+@click.version_option(PROG_VERSION)
+@opts_shared
+@click.option(
+    '--commands', type=click.File(),
+    required=True,
+    help='YAML file containing show commands'
+)
+@click.option(
+    '--batch-size',
+    type=click.IntRange(min=1),
+    default=DEFAULT_BATCH_SIZE,
+    show_default=True,
+    help='Maximum number of commands per eAPI call'
+)
+@click.option(
+    '--show-plan',
+    is_flag=True,
+    help='Show the command execution plan before running'
+)
+@click.option(
+    '--telemetry',
+    is_flag=True,
+    help='Answer the MAC, ARP and interface status commands from the CVP telemetry'
+)
+@opts_sink
+@click.pass_context
+def cli_get_run_commands(ctx, commands, **optargs):
+    """
+    Run a set of operational commands and store the outputs to $hostname JSON file.
+    """
+    import yaml
+    from tabulate import tabulate
+    from alive_progress import alive_bar
+    from cvppyez.eapi import run_engine
+    from cvppyez.tasks.get import nr_task_get_show_commands, aio_task_get_show_commands
+
+    n_devs = ctx.obj.n_devs
+    nr = ctx.obj.nr
+
+    try:
+        plan = CommandPlan(yaml.safe_load(commands), batch_size=optargs['batch_size'])
+
+    except Exception as exc:
+        sys.exit(f"Unable to load YAML command file: {str(exc)}")
+
+    if optargs['show_plan']:
+        print(tabulate(headers=['Request', 'Encoding', 'Command', 'Names'],
+                       tabular_data=plan.table()))
+        print(f"\n{plan.n_commands} commands, {plan.n_unique} unique, "
+              f"{plan.n_requests} eAPI requests per device, "
+              f"{plan.n_requests * n_devs} eAPI requests total.\n")
+
+    proceed = click.prompt(f"Collect show command outputs from {n_devs} devices? [Y/n]")
+    if proceed != 'Y':
+        raise click.Abort()
+
+    telemetry = cli_query_telemetry(plan, nr) if optargs['telemetry'] else None
+
+    # use a fancy progress bar to show progress. if you need to debug the task
+    # using pdb/breakpoints, do not use this progress bar as it adds background
+    # threading and prevents debuggin of tasks.
+
+    with load_sink(optargs) as sink, alive_bar(n_devs) as bar:
+        res = run_engine(ctx.obj.engine, nr, nr_task_get_show_commands,
+                         aio_task_get_show_commands,
+                         plan=plan,
+                         sink=sink,
+                         telemetry=telemetry,
+                         progress=bar)
+
+    if res.failed:
+        print_errors(res)
+
+    print_command_errors(res)
+
+
+def cli_query_telemetry(plan, nr):
+    """
+    Answer the plan commands covered by the CVP telemetry, on the devices
+    streaming telemetry; returns the TelemetryResult outputs, or None if no
+    command is covered.  The other commands and devices are run over eAPI.
+    """
+    from cvppyez.planner import TelemetryPlanner, query_telemetry
+
+    commands = plan.by_encoding.get('json', [])
+    covered = [command for command in commands if TelemetryPlanner.covers(command)]
+    if not covered:
+        print("No commands are covered by telemetry.")
+        return None
+
+    found = query_telemetry(nr.inventory.hosts, covered)
+    print(f"Answered {len(covered)} of {plan.n_unique} commands from CVP telemetry "
+          f"on {len(found.outputs)} of {len(nr.inventory.hosts)} devices.")
+
+    return found.outputs
@@ -0,0 +1,221 @@
+"""
+The cvp-pyez get-interfaces program is used to execute a list of operational
+commands for a given set of host interfaces, and store the results into JSON
+files, one per host.
+
+For more information about this program use the "--help" command option.
+"""
+
+import sys
+import csv
+from collections import defaultdict
+from string import Template
+
+import click
+
+from cvppyez.commands import DEFAULT_BATCH_SIZE
+from cvppyez.cli.common import (
+    Command, opts_shared, opts_sink, print_banner, print_errors, print_list_devices,
+    load_inventory, load_sink
+)
+
+__all__ = ['cli']
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                               CONSTANTS
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+PROG_VERSION = '0.3.0'                      # bump on each release
+
+
+def nr_get_inventory(ctx, hostnames):
+    """
+    Gather the CVP inventory of the `hostnames`, a set, that also match the
+    --hostname and --select options.
+    """
+    from cvppyez.matcher import SelectTerm
+
+    print_banner(ctx)
+    load_inventory(ctx, select=ctx.obj.select + [SelectTerm('name', sorted(hostnames), False)])
+
+
+def print_command_errors(res):
+    """
+    Print the interface commands that failed on the hosts that otherwise
+    completed; the failed command outputs are saved as {'error': <message>}.
+    """
+    from tabulate import tabulate
+
+    cmd_errors = [
+        [host, if_name, name, error]
+        for host, h_res in res.items() if not h_res.failed
+        for if_name, if_errors in (h_res.result or {}).items()
+        for name, error in if_errors.items()
+    ]
+    if not cmd_errors:
+        return
+
+    n_hosts = len({host for host, *_ in cmd_errors})
+    print(f"Command errors detected: {len(cmd_errors)} commands on {n_hosts} hosts")
+    print(tabulate(
+        headers=['hostname', 'interface', 'command', 'error'],
+        tabular_data=cmd_errors
+    ))
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                              CLICK Command
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+class GetInterfacesCommand(Command):
+    prog_version = PROG_VERSION
+    load_inventory = False
+    cli_help = """
+This command is used to execute a list of operational commands for a give set
+of host,interfaces, and store the results into JSON files, one per host, or
+into a single JSON Lines or Parquet file using --sink.
+
+You must provide two input files:
+
+--inventory <file> is a CSV file that must contain at least two columns,
+"host" and "interface".  The first line in the file must contain the column headers.
+
+--commands <file> is a YAML file that contains a list of the commands to execute.  The structure
+of this file is a list, that looks like this:
+
+# BEGIN EXAMPLE YAML FILE
+
+---
+- name: stats
+  command: show interfaces $interface
+
+- name: vlans
+  command: show interfaces $interface vlans
+  encoding: text
+
+- name: macaddrs
+  command: show mac address-table interface $interface
+
+# END EXAMPLE YAML FILE
+
+The 'name' field must be unique and designates the purpose of the command.  This value is also
+used when storing the results of the command into the $host JSON output file.
+
+The 'command' is the EOS command to execute with the $interface keyword used to designated
+where the actual interface name is to be placed.
+
+The 'encoding' option is used to designate if the command should return JSON data or TEXT output.
+The default is JSON.
+    """
+
+
+@click.command(cls=GetInterfacesCommand)
+@click.version_option(PROG_VERSION)
+@opts_shared
+@click.option(
+    'inventory',
+    '--inventory', '-i',
+    type=click.File(),
+    required=True,
+    help='CSV file of host,interface'
+)
+@click.option(
+    'commands',
+    '--commands', '-c',
+    type=click.File(),
+    required=True,
+    help='YAML file of commands to execute'
+)
+@click.option(
+    '--batch-size',
+    type=click.IntRange(min=1),
+    default=DEFAULT_BATCH_SIZE,
+    show_default=True,
+    help='Maximum number of commands per eAPI call'
+)
+@opts_sink
+@click.pass_context
+def cli(ctx, inventory, commands, **optargs):
+    """
+    Run interface commands from CSV and YAML files.
+    """
+    import yaml
+
+    try:
+        commands_data = yaml.safe_load(commands)
+
+    except Exception as exc:
+        sys.exit(f"Unable to load YAML command file: {str(exc)}")
+
+    # -------------------------------------------------------------------------
+    # next, ensure that each of the commands has a $interface designation,
+    # convert the command into a Template instance, and ensure there is a
+    # command encoding (defaults to json).
+    # -------------------------------------------------------------------------
+
+    for cmd_item in commands_data:
+        cmd = cmd_item['command']
+        if '$interface' not in cmd:
+            print(f"ERROR: command missing $interface: '{cmd}'")
+            sys.exit(2)
+
+        cmd_item['command'] = Template(cmd)
+        if 'encoding' not in cmd_item:
+            cmd_item['encoding'] = 'json'
+
+    # -------------------------------------------------------------------------
+    # now read the inventory CSV file and create a hash of device hostnames
+    # that provide a list of interfaces.  Using that hostname list, as well as
+    # the --hostname option obtain the CVP inventory of hosts into a Nornir
+    # inventory instance.
+    # -------------------------------------------------------------------------
+
+    csv_rd = csv.reader(inventory)
+    csv_ds = defaultdict(set)
+
+    _ = next(csv_rd)     # read header line and discard
+    for rec in csv_rd:
+        csv_ds[rec[0]].add(rec[1])
+
+    nr_get_inventory(ctx, hostnames=set(csv_ds))
+
+    from alive_progress import alive_bar
+    from cvppyez.eapi import run_engine
+    from cvppyez.tasks.get_interfaces import (
+        nr_task_run_interface_commands, aio_task_run_interface_commands
+    )
+
+    n_devs = ctx.obj.n_devs
+    nr = ctx.obj.nr
+
+    proceed = None
+    while proceed not in ['Y', 'n']:
+        proceed = click.prompt(f"Run commands on {n_devs} devices? [Y/n/l]")
+        if proceed == 'l':
+            print_list_devices(nr)
+
+    if proceed != 'Y':
+        raise click.Abort()
+
+    # use a fancy progress bar to show progress. if you need to debug the task
+    # using pdb/breakpoints, do not use this progress bar as it adds background
+    # threading and prevents debuggin of tasks.
+
+    with load_sink(optargs) as sink, alive_bar(n_devs) as bar:
+        res = run_engine(ctx.obj.engine, nr, nr_task_run_interface_commands,
+                         aio_task_run_interface_commands,
+                         commands=commands_data,
+                         dev_ifs=csv_ds,
+                         batch_size=optargs['batch_size'],
+                         sink=sink,
+                         progress=bar)
+
+    if res.failed:
+        print_errors(res)
+
+    print_command_errors(res)
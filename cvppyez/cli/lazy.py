@@ -0,0 +1,45 @@
+from importlib import import_module
+
+import click
+
+__all__ = ['LazyGroup']
+
+
+class LazyGroup(click.Group):
+    """
+    The click Group whose subcommands are imported only when they are run, or
+    their help is shown.  The group help lists the subcommands using the
+    registered short help, so showing it does not import any subcommand.
+
+    Parameters
+    ----------
+    lazy_commands : dict - subcommand name to tuple(import name, short help);
+                           the import name is "module:attribute"
+    """
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super(LazyGroup, self).__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
+
+    def list_commands(self, ctx):
+        return sorted(set(super(LazyGroup, self).list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.commands or cmd_name not in self.lazy_commands:
+            return super(LazyGroup, self).get_command(ctx, cmd_name)
+
+        module_name, _, attr = self.lazy_commands[cmd_name][0].partition(':')
+        command = getattr(import_module(module_name), attr)
+        self.add_command(command, name=cmd_name)
+        return command
+
+    def format_commands(self, ctx, formatter):
+        rows = [
+            (cmd_name, self.lazy_commands[cmd_name][1]) if cmd_name not in self.commands
+            else (cmd_name, self.commands[cmd_name].get_short_help_str())
+            for cmd_name in self.list_commands(ctx)
+        ]
+
+        if rows:
+            with formatter.section('Commands'):
+                formatter.write_dl(rows)
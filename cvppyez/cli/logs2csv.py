@@ -0,0 +1,106 @@
+"""
+The cvp-pyez logs2csv program is used to parse a syslog file, as collected
+by the get logs program, into a CSV file of the log messages, and report the
+count of each syslog event.
+"""
+
+import os
+import csv
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import click
+
+from cvppyez.syslog import LogMessage, iter_chunks, parse_chunk, Throughput
+
+__all__ = ['cli', 'iter_parsed_chunks']
+
+
+now = datetime.now()
+this_year = now.year
+
+LN_SEP = "#" + "-" * 79
+
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def iter_parsed_chunks(pool, filename, chunks, max_pending):
+    """
+    Submit the chunks to the process pool and yield the parsed chunk results
+    in file order.  At most `max_pending` chunks are in progress at any time
+    so that the memory used is bounded regardless of the log file size.
+    """
+    pending = deque()
+    chunks = iter(chunks)
+
+    for offset, length in chunks:
+        pending.append(pool.submit(parse_chunk, filename, offset, length, this_year))
+        if len(pending) >= max_pending:
+            break
+
+    while pending:
+        yield pending.popleft().result()
+        for offset, length in chunks:
+            pending.append(pool.submit(parse_chunk, filename, offset, length, this_year))
+            break
+
+
+@click.command()
+@click.argument(
+    'logfile',
+    type=click.Path(exists=True, dir_okay=False),
+    required=True
+)
+@click.option(
+    '--output', '-o',
+    help='CSV output filename',
+    default='logs.csv', show_default=True
+)
+@click.option(
+    '--workers',
+    help='number of parser processes',
+    type=click.IntRange(min=1),
+    default=os.cpu_count(), show_default=True
+)
+@click.option(
+    '--chunk-size',
+    help='approximate chunk size, in bytes, parsed by each worker',
+    type=click.IntRange(min=1024),
+    default=DEFAULT_CHUNK_SIZE, show_default=True
+)
+def cli(logfile, output, workers, chunk_size):
+    """
+    Parse a syslog file into a CSV file.
+    """
+    from tabulate import tabulate
+    from alive_progress import alive_bar
+
+    rate = Throughput()
+    count_by_type = Counter()
+    file_size = os.path.getsize(logfile)
+    chunks = list(iter_chunks(logfile, chunk_size))
+
+    with open(output, 'w', newline='') as ofile, \
+            ProcessPoolExecutor(max_workers=workers) as pool, \
+            alive_bar(manual=True) as bar:
+
+        print(f"{LN_SEP}\nCREATING: {ofile.name}")
+        csv_wr = csv.writer(ofile)
+        csv_wr.writerow(LogMessage._fields)
+
+        done = 0
+        for (_, length), (logs, counts, n_lines) in zip(
+                chunks, iter_parsed_chunks(pool, logfile, chunks, max_pending=workers * 2)):
+            csv_wr.writerows(logs)
+            count_by_type.update(counts)
+            rate.n_lines += n_lines
+            done += length
+            bar(done / max(file_size, 1))
+
+    print(tabulate(
+        headers=['SYSLOG Event', 'Count'],
+        tabular_data=count_by_type.most_common()
+    ))
+
+    print(f"{LN_SEP}\nPARSED: {rate}")
@@ -0,0 +1,48 @@
+"""
+The `cvp` program, the single entry point to the cvp-pyez programs:
+
+    cvp find-host mac 00:1c:73:00:00:01
+    cvp get run --commands show.yaml
+    cvp daemon start
+
+Each program is a subcommand that is imported only when it is run, and each
+program imports its heavy packages (Nornir, NAPALM, aiohttp) only when it
+runs a command; so the help and the usage errors are shown at once.
+"""
+
+import click
+
+from cvppyez.cli.lazy import LazyGroup
+
+__all__ = ['cli', 'main', 'COMMANDS']
+
+
+PROG_VERSION = '0.1.0'                      # bump on each release
+
+COMMANDS = {
+    'find-host': ('cvppyez.cli.find_host:cli',
+                  'Find an end-host by MAC address or IP address.'),
+    'get': ('cvppyez.cli.get:cli',
+            'Get logs, configs, or show command outputs from devices.'),
+    'get-interfaces': ('cvppyez.cli.get_interfaces:cli',
+                       'Run interface commands from CSV and YAML files.'),
+    'push-config': ('cvppyez.cli.push_config:cli',
+                    'Push configuration from file to devices.'),
+    'logs2csv': ('cvppyez.cli.logs2csv:cli',
+                 'Parse a syslog file into a CSV file.'),
+    'daemon': ('cvppyez.cli.daemon:cli',
+               'Run the cvp-pyez daemon, or manage the running daemon.')
+}
+
+
+@click.group(cls=LazyGroup, lazy_commands=COMMANDS)
+@click.version_option(PROG_VERSION)
+def cli():
+    """
+    Working with Arista CloudVision Portal.
+    """
+    pass
+
+
+def main():
+    cli()
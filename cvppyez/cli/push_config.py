@@ -0,0 +1,196 @@
+"""
+The cvp-pyez push-config program is used to push configuration from a file
+to a collection of devices; the inventory is taken from CVP and Nornir is
+used to execute the change.  A dry-run option is supported as well.
+
+For more information about this program use the "--help" command option.
+"""
+
+import click
+
+from cvppyez.cli.common import (
+    Command, opts_shared, print_banner, print_errors, print_list_devices, print_report
+)
+
+__all__ = ['cli']
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                               CONSTANTS
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+PROG_VERSION = '0.4.0'                      # bump on each release
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                              CLICK Command
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+class PushConfigCommand(Command):
+    prog_version = PROG_VERSION
+    cli_help = """
+    This command is used to push configs from a local file to devices.
+
+    The devices can be pushed in waves, using either --waves or
+    --wave-groups, and the rollout is halted when the percentage of failed
+    devices in a wave is over --max-failures.  The devices that were last
+    pushed the same configuration are skipped, unless --force is used."""
+
+
+opt_config_file = click.option(
+    '--configfile', required=True,
+    type=click.File(),
+    help='File containing configuraiton to push to devices'
+)
+
+opt_dry_run = click.option(
+    '--dry-run', is_flag=True,
+    help='Use dry-run mode for checking (no config commit)'
+)
+
+
+def opt_waves_check(ctx, param, value):
+    """ rollout waves validator """
+    if value is None:
+        return value
+
+    from cvppyez.rollout import parse_waves
+
+    try:
+        return parse_waves(value)
+
+    except RuntimeError as exc:
+        raise click.BadParameter(exc.args[0], ctx=ctx, param=param)
+
+
+opt_waves = click.option(
+    '--waves',
+    callback=opt_waves_check,
+    metavar='[SIZES]',
+    help='Cumulative device count or percentage of each wave, e.g. "1,10%,100%"'
+)
+
+opt_wave_groups = click.option(
+    '--wave-groups',
+    metavar='[GROUPS]',
+    help='Inventory groups pushed one wave each, e.g. "lab,site-a,*"'
+)
+
+opt_max_failures = click.option(
+    '--max-failures',
+    type=click.FloatRange(min=0, max=100),
+    default=0,
+    show_default=True,
+    help='Percentage of failed devices in a wave that halts the rollout'
+)
+
+opt_force = click.option(
+    '--force', is_flag=True,
+    help='Push to the devices that were last pushed the same config'
+)
+
+opt_hash_file = click.option(
+    '--hash-file',
+    type=click.Path(dir_okay=False),
+    help='File of the last pushed config hashes [default: in cache directory]'
+)
+
+
+@click.command(cls=PushConfigCommand)
+@click.version_option(PROG_VERSION)
+@opt_config_file
+@opt_dry_run
+@opt_waves
+@opt_wave_groups
+@opt_max_failures
+@opt_force
+@opt_hash_file
+@opts_shared
+@click.pass_context
+def cli(ctx, configfile, **optargs):
+    """
+    Push configuration from file to devices.
+    """
+    from alive_progress import alive_bar
+    from cvppyez.eapi import run_engine
+    from cvppyez.rollout import ConfigHashes, plan_waves, plan_group_waves, run_waves
+    from cvppyez.tasks.push_config import nr_task_push_config, aio_task_push_config
+
+    if optargs['waves'] and optargs['wave_groups']:
+        raise click.UsageError('Use only one of --waves and --wave-groups', ctx=ctx)
+
+    configuration = configfile.read()
+    dry_run = optargs['dry_run']
+    nr = ctx.obj.nr
+
+    # skip the devices that were last pushed the same configuration.
+
+    hashes = ConfigHashes(optargs['hash_file'])
+    digest = hashes.digest(configuration)
+
+    if not optargs['force']:
+        n_skipped = sum(hashes.unchanged(hostname, digest) for hostname in nr.inventory.hosts)
+        if n_skipped:
+            print(f"Skipping {n_skipped} devices last pushed the same config, "
+                  f"use --force to push.")
+            nr = nr.filter(filter_func=lambda h: not hashes.unchanged(h.name, digest))
+
+    n_devs = len(nr.inventory.hosts)
+    if not n_devs:
+        print("No devices to configure.")
+        return
+
+    if optargs['wave_groups']:
+        group_names = [name.strip() for name in optargs['wave_groups'].split(',')]
+        waves = plan_group_waves(nr.inventory.hosts, group_names)
+    else:
+        waves = plan_waves(nr.inventory.hosts, optargs['waves'] or [])
+
+    proceed = None
+    while proceed not in ['Y', 'n']:
+        proceed = click.prompt(f"Configure {n_devs} devices in {len(waves)} waves? [Y/n/l]")
+        if proceed == 'l':
+            print_list_devices(nr)
+
+    if proceed != 'Y':
+        raise click.Abort()
+
+    # use a fancy progress bar to show progress. if you need to debug the task
+    # using pdb/breakpoints, do not use this progress bar as it adds background
+    # threading and prevents debuggin of tasks.
+
+    def run_wave(nr_wave):
+        wave_res = run_engine(ctx.obj.engine, nr_wave, nr_task_push_config,
+                              aio_task_push_config,
+                              dry_run=dry_run,
+                              configuration=configuration,
+                              progress=bar)
+
+        if not dry_run:
+            hashes.record([host for host, h_res in wave_res.items() if not h_res.failed],
+                          digest)
+            hashes.save()
+
+        return wave_res
+
+    with alive_bar(n_devs) as bar:
+        res, halted = run_waves(nr, waves, run_wave, max_failures=optargs['max_failures'],
+                                warn=print if len(waves) > 1 else lambda msg: None)
+
+    if res.failed:
+        print()
+        print_errors(res)
+
+    print_banner(ctx)
+    print_report(headers=['Hostname', 'Diff'], tabular_data=[
+        [host, bool(h_res[-1].diff)]
+        for host, h_res in res.items()
+        if not h_res.failed
+    ])
+
+    if halted:
+        print(f"Rollout halted, devices not configured: {' '.join(halted)}")
@@ -0,0 +1,238 @@
+from collections import defaultdict
+
+from pyeapi.eapilib import CommandError
+
+__all__ = ['run_commands_batched', 'arun_commands_batched', 'CommandPlan', 'DEFAULT_BATCH_SIZE']
+
+
+DEFAULT_BATCH_SIZE = 50
+
+
+def run_commands_batched(eos_dev, commands, encoding='json', batch_size=None):
+    """
+    This function executes the list of `commands` on the device using as few
+    eAPI calls as possible, each call containing up to `batch_size` commands.
+
+    The eAPI stops executing a request at the first failed command, and the
+    error carries the outputs of the commands that ran before it.  Those
+    outputs are kept, the failed command is reported as an error, and the
+    next call resumes at the command after it; so each failed command costs
+    one extra eAPI call.
+
+    Parameters
+    ----------
+    eos_dev : pyeapi device - as provided by the NAPALM driver
+    commands : list[str] - the commands to execute
+    encoding : str ['json', 'text'] - the command output encoding
+    batch_size : int - the maximum number of commands per eAPI call
+
+    Returns
+    -------
+    list[tuple] - for each command, in the same order, (True, command output)
+    or (False, error message).
+
+    Raises
+    ------
+    Any exception other than a command error, for example a connection error.
+    """
+    batches = _Batches(commands, batch_size)
+
+    for batch in batches:
+        try:
+            batches.done(eos_dev.run_commands(commands=batch, encoding=encoding))
+
+        except CommandError as exc:
+            batches.failed(batch, exc)
+
+    return batches.results
+
+
+async def arun_commands_batched(eapi, commands, encoding='json', batch_size=None):
+    """
+    The asyncio form of run_commands_batched(), using the AsyncEapiClient
+    `eapi` in place of the pyeapi device.
+    """
+    batches = _Batches(commands, batch_size)
+
+    for batch in batches:
+        try:
+            batches.done(await eapi.run_commands(commands=batch, encoding=encoding))
+
+        except CommandError as exc:
+            batches.failed(batch, exc)
+
+    return batches.results
+
+
+class _Batches(object):
+    """
+    The batching shared by run_commands_batched() and its asyncio form.
+    Iterating yields the next batch of commands to execute; the caller
+    records each batch outcome with done() or failed() before the next batch
+    is yielded.
+    """
+
+    def __init__(self, commands, batch_size=None):
+        self.commands = commands
+        self.batch_size = batch_size or DEFAULT_BATCH_SIZE
+        self.results = list()
+        self._single_until = 0
+
+    def __iter__(self):
+        while len(self.results) < len(self.commands):
+            offset = len(self.results)
+            size = 1 if offset < self._single_until else self.batch_size
+            yield self.commands[offset:offset + size]
+
+    def done(self, outputs):
+        self.results.extend((True, output) for output in outputs)
+
+    def failed(self, batch, exc):
+        # the error output has the 'enable' output, then the output of each
+        # command that ran, and last the error of the failed command.
+
+        if not exc.output:
+            # the failed command is not known, so the batch is run again one
+            # command at a time.
+            if len(batch) > 1:
+                self._single_until = len(self.results) + len(batch)
+                return
+            outputs = []
+        else:
+            outputs = exc.output[1:-1]
+
+        self.done(outputs)
+        self.results.append((False, str(exc)))
+
+
+class CommandPlan(object):
+    """
+    This class is used to compile a list of command items, as loaded from a
+    YAML command file, into an execution plan.  Identical commands (same
+    command and encoding) are executed only once, even if listed under
+    different names, and the unique commands are grouped by encoding into
+    batched eAPI calls.  The command outputs are then fanned back out to each
+    of the command names.
+
+    Parameters
+    ----------
+    commands : list[dict]
+        Each item has the keys 'name', 'command' and optionally 'encoding'
+        (default 'json').
+
+    batch_size : int
+        The maximum number of commands per eAPI call.
+    """
+
+    def __init__(self, commands, batch_size=None):
+        self.batch_size = batch_size or DEFAULT_BATCH_SIZE
+        self.items = list()
+        self.by_encoding = defaultdict(list)
+
+        seen = set()
+
+        for cmd_item in commands:
+            key = (cmd_item['command'], cmd_item.get('encoding') or 'json')
+            self.items.append((cmd_item['name'], key))
+            if key not in seen:
+                seen.add(key)
+                self.by_encoding[key[1]].append(key[0])
+
+    @property
+    def batches(self):
+        """ list of tuple(encoding, list of commands), one per eAPI call """
+        return [
+            (encoding, commands[offset:offset + self.batch_size])
+            for encoding, commands in self.by_encoding.items()
+            for offset in range(0, len(commands), self.batch_size)
+        ]
+
+    @property
+    def n_commands(self):
+        return len(self.items)
+
+    @property
+    def n_unique(self):
+        return sum(map(len, self.by_encoding.values()))
+
+    @property
+    def n_requests(self):
+        return len(self.batches)
+
+    def remaining(self, known=None):
+        """
+        Returns the dict of encoding to the list of unique commands to
+        execute, less the commands in `known`; see execute().
+        """
+        known = known or {}
+        remaining = {
+            encoding: [command for command in commands if (command, encoding) not in known]
+            for encoding, commands in self.by_encoding.items()
+        }
+        return {encoding: commands for encoding, commands in remaining.items() if commands}
+
+    def execute(self, eos_dev, known=None):
+        """
+        Execute the plan on the device.
+
+        Parameters
+        ----------
+        eos_dev : pyeapi device - as provided by the NAPALM driver
+        known : dict - (command, encoding) to the command output already
+                       known, for example from telemetry; these commands are
+                       not executed.
+
+        Returns
+        -------
+        dict - command name to command output, in the order of the command
+        items.  If a command failed then the output is {'error': <message>}.
+        """
+        remaining = self.remaining(known)
+        return self._fan_out(remaining, {
+            encoding: run_commands_batched(eos_dev, commands, encoding=encoding,
+                                           batch_size=self.batch_size)
+            for encoding, commands in remaining.items()
+        }, known)
+
+    async def aexecute(self, eapi, known=None):
+        """ The asyncio form of execute(), using the AsyncEapiClient `eapi` """
+        remaining = self.remaining(known)
+        return self._fan_out(remaining, {
+            encoding: await arun_commands_batched(eapi, commands, encoding=encoding,
+                                                  batch_size=self.batch_size)
+            for encoding, commands in remaining.items()
+        }, known)
+
+    @staticmethod
+    def errors(outputs):
+        """
+        Returns the dict of command name to error message for each of the
+        failed commands in the `outputs`, as returned by execute().
+        """
+        return {
+            name: output['error'] for name, output in outputs.items()
+            if isinstance(output, dict) and list(output) == ['error']
+        }
+
+    def _fan_out(self, remaining, enc_results, known=None):
+        outputs = dict(known or {})
+
+        for encoding, cmd_results in enc_results.items():
+            for command, (ok, output) in zip(remaining[encoding], cmd_results):
+                outputs[(command, encoding)] = output if ok else dict(error=output)
+
+        return {name: outputs[key] for name, key in self.items}
+
+    def table(self):
+        """
+        Returns the plan as table rows: [request, encoding, command, names]
+        """
+        names = defaultdict(list)
+        for name, key in self.items:
+            names[key].append(name)
+
+        return [
+            [req_n, encoding, command, ', '.join(names[(command, encoding)])]
+            for req_n, (encoding, commands) in enumerate(self.batches, start=1)
+            for command in commands
+        ]
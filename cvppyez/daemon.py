@@ -0,0 +1,524 @@
+"""
+The cvp-pyez daemon keeps the expensive program setup resident: a logged-in
+CVP client, an up-to-date device inventory, and a pool of device eAPI
+connections.  The programs connect to the daemon over a local Unix socket
+rather than repeating that setup for each run.
+
+The protocol is JSON lines; each request is {"id": n, "op": str, "args": {}}
+and each reply is {"id": n, "result": ...} or {"id": n, "error": {...}}.
+The requests on one connection are handled concurrently, and the replies are
+matched to the requests by id.
+"""
+
+import os
+import json
+import time
+import socket
+import signal
+import asyncio
+import logging
+import itertools
+from pathlib import Path
+
+from first import first
+from pyeapi.eapilib import CommandError, ConnectionError
+from nornir.core.deserializer.inventory import Inventory
+
+from cvppyez.rest import AsyncCVPRestClient
+from cvppyez.rest.client import CvpSession
+from cvppyez.eapi.client import AsyncEapiClient
+from cvppyez.eapi.fleet import EapiFleet
+from cvppyez.nornir.inventory_cache import InventoryCache
+from cvppyez.nornir.inventory_sync import InventorySync
+
+__all__ = ['CvpDaemon', 'DaemonClient', 'DaemonError', 'DaemonInventory',
+           'daemon_available', 'daemon_request', 'run_daemon_task', 'socket_path']
+
+
+# the replies include complete command outputs, for example the running
+# configuration, so a line can be large.
+
+MAX_LINE = 256 * 1024 * 1024
+
+log = logging.getLogger(__name__)
+
+
+class DaemonError(RuntimeError):
+    pass
+
+
+def socket_path(path=None):
+    """
+    Returns the daemon socket path; the given `path`, else $CVP_DAEMON_SOCKET,
+    else "daemon.sock" in the cvp-pyez cache directory.
+    """
+    return str(Path(
+        path or os.getenv('CVP_DAEMON_SOCKET') or Path(InventoryCache.DEFAULT_DIR) / 'daemon.sock'
+    ).expanduser())
+
+
+def daemon_available(path=None):
+    """ Returns True if a daemon is accepting connections on the socket """
+    path = socket_path(path)
+    if not os.path.exists(path):
+        return False
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+            return True
+        except OSError:
+            return False
+
+
+def _error_reply(exc):
+    """ Returns the reply error dict for the exception `exc` """
+    if isinstance(exc, CommandError):
+        return dict(type='CommandError', code=exc.error_code, message=exc.error_text,
+                    command_error=exc.command_error, commands=exc.commands,
+                    output=exc.output)
+
+    if isinstance(exc, ConnectionError):
+        return dict(type='ConnectionError', message=exc.message)
+
+    return dict(type=type(exc).__name__, message=str(exc) or type(exc).__name__)
+
+
+def _error_exception(error):
+    """ Returns the exception for the reply `error`; the inverse of _error_reply """
+    if error['type'] == 'CommandError':
+        return CommandError(error['code'], error['message'],
+                            command_error=error['command_error'],
+                            commands=error['commands'], output=error['output'])
+
+    if error['type'] == 'ConnectionError':
+        return ConnectionError('daemon', error['message'])
+
+    return DaemonError(f"{error['type']}: {error['message']}")
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                                 SERVER
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+class CvpDaemon(object):
+    """
+    The daemon server.  The CVP and device credentials are taken from the
+    same environment variables as the programs.
+
+    Parameters
+    ----------
+    path : str - the Unix socket path, see socket_path()
+    inventory_ttl : int - the inventory device changes are synced from CVP at
+                          this interval, in seconds
+    full_sync_ttl : int - the inventory is rebuilt from CVP at this interval,
+                          in seconds, so that the groups are current
+    groupby_tags : list[str] - tag types used to create the inventory groups
+    max_inflight : int - the maximum concurrent device eAPI requests
+    timeout : int - the default device eAPI request timeout in seconds
+    """
+    DEFAULT_INVENTORY_TTL = 30
+    DEFAULT_FULL_SYNC_TTL = 12 * InventoryCache.DEFAULT_TTL
+
+    def __init__(self, path=None, inventory_ttl=None, groupby_tags=None, max_inflight=None,
+                 timeout=None, full_sync_ttl=None):
+        self.path = socket_path(path)
+        self.inventory_ttl = inventory_ttl or self.DEFAULT_INVENTORY_TTL
+        self.full_sync_ttl = full_sync_ttl or self.DEFAULT_FULL_SYNC_TTL
+        self.groupby_tags = groupby_tags
+        self.username = first(map(os.getenv, CvpSession.ENV['username']))
+        self.password = first(map(os.getenv, CvpSession.ENV['password']))
+        self.eapi_port = int(os.environ['CVP_EAPI_PORT']) if os.getenv('CVP_EAPI_PORT') else None
+
+        self.fleet = EapiFleet(max_inflight=max_inflight, timeout=timeout)
+        self.cvp = None
+        self.inventory = None
+        self.inventory_time = None
+        self.full_sync_time = None
+        self.inventory_sync = InventorySync(groupby_tags=groupby_tags, warn=log.warning)
+        self.start_time = None
+        self.n_requests = 0
+
+        self._devices = dict()
+        self._inflight = None
+        self._server = None
+        self._stopped = None
+
+        self.ops = {
+            'ping': self.op_ping,
+            'status': self.op_status,
+            'inventory': self.op_inventory,
+            'refresh': self.op_refresh,
+            'run_commands': self.op_run_commands,
+            'cvp': self.op_cvp,
+            'shutdown': self.op_shutdown
+        }
+
+    # -------------------------------------------------------------------------
+    # warm state
+    # -------------------------------------------------------------------------
+
+    async def refresh_inventory(self, full=True):
+        """
+        Sync the inventory from CVP, either rebuilt when `full`, or only the
+        device changes since the last sync; see InventorySync.
+        """
+        changed = await self.inventory_sync.sync(self.cvp, full=full)
+        self.inventory = self.inventory_sync.inventory
+        self.inventory_time = time.time()
+
+        if full:
+            # a device may have a new management address.
+            self.full_sync_time = self.inventory_time
+            self._devices.clear()
+        else:
+            for name in changed:
+                self._devices.pop(name, None)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.inventory_ttl)
+            try:
+                await self.refresh_inventory(
+                    full=time.time() - self.full_sync_time >= self.full_sync_ttl)
+
+            except Exception as exc:
+                # the previous inventory continues to be used.
+                log.error(f'inventory refresh failed: {str(exc)}')
+
+    def device(self, name):
+        """ Returns the AsyncEapiClient for the inventory host `name` """
+        eapi = self._devices.get(name)
+        if eapi:
+            return eapi
+
+        host = self.inventory['hosts'].get(name)
+        if host is None:
+            raise DaemonError(f'{name}: not in the inventory')
+
+        eapi = self._devices[name] = AsyncEapiClient(
+            self.fleet.session, host['hostname'],
+            username=self.username,
+            password=self.password,
+            transport=self.fleet.transport,
+            port=self.eapi_port,
+            name=name
+        )
+        return eapi
+
+    # -------------------------------------------------------------------------
+    # request ops
+    # -------------------------------------------------------------------------
+
+    async def op_ping(self):
+        return dict(pid=os.getpid())
+
+    async def op_status(self):
+        return dict(
+            pid=os.getpid(),
+            socket=self.path,
+            uptime=time.time() - self.start_time,
+            cvp=self.cvp.api.about,
+            hosts=len(self.inventory['hosts']),
+            inventory_age=time.time() - self.inventory_time,
+            inventory_ttl=self.inventory_ttl,
+            full_sync_age=time.time() - self.full_sync_time,
+            connections=len(self._devices),
+            requests=self.n_requests
+        )
+
+    async def op_inventory(self):
+        return self.inventory
+
+    async def op_refresh(self):
+        await self.refresh_inventory()
+        return dict(hosts=len(self.inventory['hosts']))
+
+    async def op_run_commands(self, host, commands, encoding='json', timeout=None):
+        eapi = self.device(host)
+        async with self._inflight:
+            return await eapi.run_commands(commands, encoding=encoding, timeout=timeout)
+
+    async def op_cvp(self, url, method='GET', params=None, json=None):
+        # an expired CVP session is logged in again by the CVP client.
+        return await self.cvp.api.request(method, url, params=params, json=json)
+
+    async def op_shutdown(self):
+        self._stopped.set()
+        return dict(pid=os.getpid())
+
+    # -------------------------------------------------------------------------
+    # server
+    # -------------------------------------------------------------------------
+
+    async def handle_request(self, line, writer, write_lock):
+        req_id = None
+        try:
+            request = json.loads(line)
+            req_id = request.get('id')
+            op = self.ops.get(request.get('op'))
+            if not op:
+                raise DaemonError(f"unknown op: {request.get('op')}")
+
+            reply = dict(id=req_id, result=await op(**request.get('args', {})))
+
+        except Exception as exc:
+            reply = dict(id=req_id, error=_error_reply(exc))
+
+        async with write_lock:
+            writer.write(json.dumps(reply).encode() + b'\n')
+            await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        write_lock = asyncio.Lock()
+        pending = set()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                self.n_requests += 1
+                task = asyncio.create_task(self.handle_request(line, writer, write_lock))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+
+            if pending:
+                await asyncio.wait(pending)
+
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+
+        except asyncio.CancelledError:
+            # the connections still open at shutdown are cancelled; the
+            # asyncio stream callback logs a cancelled handler as an error.
+            pass
+
+        finally:
+            writer.close()
+
+    def _check_socket(self):
+        if daemon_available(self.path):
+            raise DaemonError(f'daemon already running on {self.path}')
+
+        # a socket file left behind by a daemon that did not exit cleanly.
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+
+    async def serve(self):
+        """
+        Login to CVP, build the inventory, and serve requests until a shutdown
+        request or a SIGTERM/SIGINT.
+        """
+        self._check_socket()
+
+        self.start_time = time.time()
+        self._stopped = asyncio.Event()
+        self._inflight = asyncio.Semaphore(self.fleet.max_inflight)
+
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self._stopped.set)
+
+        async with AsyncCVPRestClient() as self.cvp, self.fleet:
+            await self.refresh_inventory()
+            refresh_task = asyncio.create_task(self._refresh_loop())
+
+            # the socket is only accessible to the user, the daemon requests
+            # are made with the user's device credentials.
+
+            old_umask = os.umask(0o177)
+            try:
+                self._server = await asyncio.start_unix_server(
+                    self.handle_connection, path=self.path, limit=MAX_LINE)
+            finally:
+                os.umask(old_umask)
+
+            log.info(f'serving on {self.path}')
+
+            try:
+                await self._stopped.wait()
+
+            finally:
+                refresh_task.cancel()
+                self._server.close()
+                await self._server.wait_closed()
+                if os.path.exists(self.path):
+                    os.unlink(self.path)
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                                 CLIENT
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+class DaemonClient(object):
+    """
+    The asyncio daemon client.  Many requests can be in-flight at the same
+    time over the one socket connection.
+
+    Parameters
+    ----------
+    path : str - the Unix socket path, see socket_path()
+
+    Examples
+    --------
+        async with DaemonClient() as daemon:
+            outputs = await daemon.request('run_commands', host='sw1',
+                                           commands=['show version'])
+    """
+
+    def __init__(self, path=None):
+        self.path = socket_path(path)
+        self._ids = itertools.count(1)
+        self._pending = dict()
+        self._reader = None
+        self._writer = None
+        self._read_task = None
+
+    async def open(self):
+        try:
+            self._reader, self._writer = await asyncio.open_unix_connection(
+                self.path, limit=MAX_LINE)
+
+        except OSError as exc:
+            raise DaemonError(f'unable to connect to the daemon at {self.path}: {str(exc)}')
+
+        self._read_task = asyncio.create_task(self._read_replies())
+        return self
+
+    async def close(self):
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+        if self._read_task:
+            await self._read_task
+            self._read_task = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _read_replies(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+
+                reply = json.loads(line)
+                future = self._pending.pop(reply['id'], None)
+                if not future or future.done():
+                    continue
+
+                if 'error' in reply:
+                    future.set_exception(_error_exception(reply['error']))
+                else:
+                    future.set_result(reply['result'])
+
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(DaemonError('daemon connection closed'))
+        self._pending.clear()
+
+    async def request(self, op, **args):
+        """ Send the `op` request, and return the reply result """
+        req_id = next(self._ids)
+        future = self._pending[req_id] = asyncio.get_running_loop().create_future()
+
+        self._writer.write(json.dumps(dict(id=req_id, op=op, args=args)).encode() + b'\n')
+        await self._writer.drain()
+        return await future
+
+
+def daemon_request(op, path=None, **args):
+    """ Send the one `op` request to the daemon, and return the reply result """
+    async def request():
+        async with DaemonClient(path) as daemon:
+            return await daemon.request(op, **args)
+
+    return asyncio.run(request())
+
+
+class DaemonEapi(object):
+    """
+    The device eAPI client given to the EapiFleet task functions, see
+    AsyncEapiClient, where the eAPI requests are made by the daemon.
+    """
+
+    def __init__(self, daemon, name):
+        self.daemon = daemon
+        self.name = name
+
+    async def run_commands(self, commands, encoding='json', timeout=None):
+        if isinstance(commands, str):
+            commands = [commands]
+
+        return await self.daemon.request('run_commands', host=self.name, commands=list(commands),
+                                         encoding=encoding, timeout=timeout)
+
+
+class DaemonFleet(EapiFleet):
+    """
+    The EapiFleet that runs the asyncio task functions in this process, and
+    the device eAPI requests in the daemon, using the daemon connections.
+    """
+
+    def __init__(self, path=None, max_inflight=None, timeout=None):
+        super(DaemonFleet, self).__init__(max_inflight=max_inflight, timeout=timeout)
+        self.daemon = DaemonClient(path)
+
+    async def open(self):
+        self._inflight = asyncio.Semaphore(self.max_inflight)
+        await self.daemon.open()
+        return self
+
+    async def close(self):
+        await self.daemon.close()
+
+    def device(self, host):
+        return DaemonEapi(self.daemon, host.name)
+
+
+def run_daemon_task(nr, task, path=None, max_inflight=None, timeout=None, **kwargs):
+    """
+    Run the asyncio `task` function using a DaemonFleet; see EapiFleet.run().
+    """
+    async def run_fleet():
+        async with DaemonFleet(path=path, max_inflight=max_inflight, timeout=timeout) as fleet:
+            return await fleet.run(nr, task, **kwargs)
+
+    return asyncio.run(run_fleet())
+
+
+class DaemonInventory(Inventory):
+    """
+    Nornir inventory plugin sourced from the daemon inventory.
+
+    Other Parameters
+    ----------------
+    path : str
+        The daemon Unix socket path, see socket_path().
+    """
+
+    def __init__(self, config, **kwargs):
+        inv_data = daemon_request('inventory', path=kwargs.pop('path', None))
+
+        defaults = {
+            'platform': 'eos'
+        }
+
+        super().__init__(hosts=inv_data['hosts'], groups=inv_data['groups'],
+                         defaults=defaults, **kwargs)
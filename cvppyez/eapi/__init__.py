@@ -0,0 +1,2 @@
+from cvppyez.eapi.client import AsyncEapiClient
+from cvppyez.eapi.fleet import EapiFleet, run_eapi_task, run_engine, default_engine, ENGINES
@@ -0,0 +1,102 @@
+import asyncio
+import itertools
+
+import aiohttp
+from pyeapi.eapilib import CommandError, ConnectionError
+
+__all__ = ['AsyncEapiClient']
+
+
+class AsyncEapiClient(object):
+    """
+    This class is the asyncio JSON-RPC client to the EOS eAPI of one device.
+    The client does not own a connection; the HTTP requests are made using
+    the aiohttp `session` that is shared by all of the device clients, so
+    that the connections are pooled across the fleet.
+
+    The run_commands() method has the same behavior as the pyeapi Node
+    run_commands(), as used through the NAPALM driver, so the command outputs
+    are processed by the same code for either execution engine.  In
+    particular a failed command raises the pyeapi CommandError, and a
+    transport failure raises the pyeapi ConnectionError.
+
+    Parameters
+    ----------
+    session : aiohttp.ClientSession - the shared HTTP session
+    hostname : str - the device hostname or IP address
+    username : str - the device login user name
+    password : str - the device login password
+    transport : str ['https', 'http']
+    port : int - when not the transport default port
+    name : str - the inventory host name, when not the `hostname`
+    """
+    COMMAND_API = '/command-api'
+
+    def __init__(self, session, hostname, username, password, transport='https', port=None,
+                 name=None):
+        self.session = session
+        self.hostname = hostname
+        self.name = name or hostname
+        self.url = f"{transport}://{hostname}{f':{port}' if port else ''}{self.COMMAND_API}"
+        self.auth = aiohttp.BasicAuth(username, password or '')
+        self._request_id = itertools.count(1)
+
+    async def execute(self, commands, encoding='json', timeout=None):
+        """
+        Execute the eAPI runCmds request.
+
+        Parameters
+        ----------
+        commands : list - the EOS commands, str or dict(cmd, input)
+        encoding : str ['json', 'text']
+        timeout : int - the request timeout in seconds, overrides the
+                        session default timeout
+
+        Returns
+        -------
+        list - the command results, one per command.
+        """
+        request = dict(jsonrpc='2.0', method='runCmds', id=next(self._request_id), params=dict(
+            version=1, cmds=commands, format=encoding
+        ))
+
+        kwargs = dict(timeout=aiohttp.ClientTimeout(total=timeout)) if timeout else dict()
+        kwargs['trace_request_ctx'] = dict(host=self.name)
+
+        try:
+            async with self.session.post(self.url, json=request, auth=self.auth, **kwargs) as res:
+                res.raise_for_status()
+                body = await res.json(content_type=None)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            raise ConnectionError(
+                'https', f'{self.hostname}: {str(exc) or type(exc).__name__}',
+                commands=commands
+            ) from exc
+
+        if 'error' in body:
+            error = body['error']
+            output = error.get('data') or []
+            raise CommandError(
+                error['code'], error['message'],
+                command_error=output[-1].get('errors', [None])[-1] if output else None,
+                commands=commands,
+                output=output
+            )
+
+        return body['result']
+
+    async def run_commands(self, commands, encoding='json', timeout=None):
+        """
+        Execute the commands in enable mode; as pyeapi Node.run_commands().
+
+        Returns
+        -------
+        list - the command results, one per command.
+        """
+        if isinstance(commands, str):
+            commands = [commands]
+
+        result = await self.execute(['enable'] + list(commands), encoding=encoding,
+                                    timeout=timeout)
+        return result[1:]
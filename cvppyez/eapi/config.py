@@ -0,0 +1,179 @@
+from datetime import datetime
+
+__all__ = ['config_lines', 'ConfigSession', 'push_config', 'apush_config']
+
+
+def config_lines(configuration):
+    """
+    Returns the list of configuration commands from the `configuration` text,
+    skipping blank lines and comments; as the NAPALM EOS driver.
+    """
+    return [
+        line for line in map(str.strip, configuration.splitlines())
+        if line and (not line.startswith('!') or line.startswith('!!'))
+    ]
+
+
+def push_config(eos_dev, configuration, dry_run):
+    """
+    Merge the `configuration` into the device running configuration using a
+    configuration session, see ConfigSession.
+
+    Parameters
+    ----------
+    eos_dev : pyeapi Node
+    configuration : str - the configuration to merge
+    dry_run : bool
+
+    Returns
+    -------
+    ConfigSession - with the session `diff` and the `aborted` pending sessions.
+    """
+    session = ConfigSession(configuration, dry_run=dry_run)
+
+    for commands, encoding in session:
+        try:
+            session.done(eos_dev.run_commands(commands, encoding=encoding))
+
+        except Exception as exc:
+            session.failed(exc)
+
+    return session
+
+
+async def apush_config(eapi, configuration, dry_run):
+    """
+    The asyncio form of push_config(), using the AsyncEapiClient `eapi` in
+    place of the pyeapi device.
+    """
+    session = ConfigSession(configuration, dry_run=dry_run)
+
+    for commands, encoding in session:
+        try:
+            session.done(await eapi.run_commands(commands, encoding=encoding))
+
+        except Exception as exc:
+            session.failed(exc)
+
+    return session
+
+
+class ConfigSession(object):
+    """
+    The configuration session shared by push_config() and its asyncio form.
+    The session is run in two eAPI requests when there are no changes, and
+    in three when there are, rather than the five or more of the NAPALM EOS
+    driver:
+
+        (1) read the configuration sessions, open the session and load the
+            configuration lines.
+
+        (2) read the session diff and abort the session.
+
+        (3) only if the diff is not empty, and not `dry_run`: save the
+            rollback checkpoint, open the session again, load the lines,
+            commit and save the running configuration.
+
+    A device without changes is not sent the checkpoint, commit or write
+    requests.  If (1) fails then the pending sessions of the device are
+    aborted, as the device may be at its limit of pending sessions, and (1)
+    is run again; the pending sessions are otherwise left alone.
+
+    Iterating yields the next (commands, encoding) request to execute; the
+    caller records each request outcome with done() or failed() before the
+    next request is yielded.  Iterating raises the error of a failed session,
+    once the session is aborted.
+
+    Attributes
+    ----------
+    name : str - the session name
+    diff : str - the session configuration diff, empty-string if no changes.
+    aborted : list[str] - the names of the pending sessions aborted
+    """
+
+    def __init__(self, configuration, dry_run, name=None):
+        self.name = name or f'cvppyez_{datetime.now().microsecond}'
+        self.lines = config_lines(configuration)
+        self.dry_run = dry_run
+        self.diff = None
+        self.aborted = list()
+        self._outputs = None
+        self._exc = None
+
+    def __iter__(self):
+        for retry in (False, True):
+            yield self._request([
+                'show configuration sessions',
+                f'configure session {self.name}',
+                *self.lines,
+                'end'
+            ])
+
+            if not self._exc:
+                break
+
+            exc = self._exc
+            self.aborted = self._pending(self._sessions(getattr(exc, 'output', None)))
+            yield self._request(self._abort_commands(self.aborted) + [
+                f'configure session {self.name} abort'
+            ])
+
+            if retry or self._exc or not self.aborted:
+                raise exc
+
+        # the text encoding, as the session diff is a text-only command.
+
+        yield self._request([
+            f'show session-config named {self.name} diffs',
+            f'configure session {self.name} abort'
+        ], encoding='text')
+
+        if self._exc:
+            exc = self._exc
+            yield self._request([f'configure session {self.name} abort'])
+            raise exc
+
+        diff = self._outputs[0]['output']
+        self.diff = '\n'.join(diff.splitlines()[2:]).strip()
+
+        if self.dry_run or not self.diff:
+            return
+
+        yield self._request([
+            'copy startup-config flash:rollback-0',
+            f'configure session {self.name}',
+            *self.lines,
+            'commit',
+            'write memory'
+        ], encoding='text')
+
+        if self._exc:
+            exc = self._exc
+            yield self._request([f'configure session {self.name} abort'])
+            raise exc
+
+    def done(self, outputs):
+        self._outputs = outputs
+
+    def failed(self, exc):
+        self._exc = exc
+
+    def _request(self, commands, encoding='json'):
+        self._outputs, self._exc = None, None
+        return commands, encoding
+
+    @staticmethod
+    def _sessions(output):
+        # the error output has the 'enable' output, then the output of each
+        # command that ran, and last the error of the failed command.
+        if not isinstance(output, list) or len(output) < 3:
+            return {}
+        return output[1].get('sessions') or {}
+
+    @staticmethod
+    def _pending(sessions):
+        return [name for name, sess in sessions.items() if sess['state'] == 'pending']
+
+    @staticmethod
+    def _abort_commands(names):
+        return [f'configure session {name} abort' for name in names]
@@ -0,0 +1,215 @@
+import os
+import time
+import asyncio
+import traceback
+
+import aiohttp
+from nornir.core.task import AggregatedResult, MultiResult, Result, Task
+
+from cvppyez.engines import ENGINES, default_engine
+from cvppyez.eapi.client import AsyncEapiClient
+from cvppyez.nornir.scheduler import run_task
+from cvppyez.tracing import get_tracer, record, aiohttp_trace_config
+
+__all__ = ['EapiFleet', 'EapiTask', 'run_eapi_task', 'run_engine', 'default_engine', 'ENGINES']
+
+
+class EapiTask(object):
+    """
+    The asyncio counterpart to the Nornir Task given to each of the task
+    functions run by the EapiFleet.
+
+    Attributes
+    ----------
+    host : nornir Host - the inventory host
+    eapi : AsyncEapiClient - the device eAPI client
+    """
+    __slots__ = ('host', 'eapi', 'name')
+
+    def __init__(self, name, host, eapi):
+        self.name = name
+        self.host = host
+        self.eapi = eapi
+
+
+class EapiFleet(object):
+    """
+    This class is used to run asyncio task functions across the Nornir
+    inventory hosts from a single thread.  All of the device eAPI clients
+    share one aiohttp session, and therefore one pool of HTTP connections.
+    The number of device tasks in-flight at any one time is capped by
+    `max_inflight`.
+
+    Parameters
+    ----------
+    max_inflight : int - the maximum concurrent device tasks
+    timeout : int - the default eAPI request timeout in seconds
+    transport : str ['https', 'http']
+
+    Examples
+    --------
+        async def aio_task_version(task):
+            return (await task.eapi.run_commands(['show version']))[0]
+
+        async with EapiFleet() as fleet:
+            res = await fleet.run(nr, aio_task_version)
+    """
+    DEFAULT_MAX_INFLIGHT = 1000
+    DEFAULT_TIMEOUT = 60
+
+    def __init__(self, max_inflight=None, timeout=None, transport='https'):
+        self.max_inflight = max_inflight or int(
+            os.getenv('CVP_EAPI_MAX_INFLIGHT', self.DEFAULT_MAX_INFLIGHT))
+        self.timeout = timeout or self.DEFAULT_TIMEOUT
+        self.transport = transport
+        self.session = None
+        self._inflight = None
+
+    async def open(self):
+        self._inflight = asyncio.Semaphore(self.max_inflight)
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                ssl=False,
+                limit=self.max_inflight,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True
+            ),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            trace_configs=[aiohttp_trace_config('eapi')] if get_tracer().enabled else None
+        )
+        return self
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def device(self, host):
+        """ Returns the AsyncEapiClient for the Nornir inventory `host` """
+        return AsyncEapiClient(
+            self.session, host.hostname,
+            username=host.username,
+            password=host.password,
+            transport=self.transport,
+            port=host.port,
+            name=host.name
+        )
+
+    async def _run_host(self, nr, nr_task, task, host, kwargs):
+        name = nr_task.name
+        eapi_task = EapiTask(name, host, self.device(host))
+
+        async with self._inflight:
+            nr.processors.task_instance_started(nr_task, host)
+            t0 = time.perf_counter()
+            try:
+                r = await task(eapi_task, **kwargs)
+                if not isinstance(r, Result):
+                    r = Result(host=host, result=r)
+
+            except Exception as exc:
+                r = Result(host, exception=exc, result=traceback.format_exc(), failed=True)
+
+            record('task', time.perf_counter() - t0, host=host.name, ok=not r.failed, task=name)
+
+        r.name = name
+        multi_result = MultiResult(name)
+        multi_result.append(r)
+        nr.processors.task_instance_completed(nr_task, host, multi_result)
+        return multi_result
+
+    async def run(self, nr, task, raise_on_error=None, on_good=True, on_failed=False, name=None,
+                  **kwargs):
+        """
+        Run the asyncio `task` function for each of the hosts in the Nornir
+        inventory, as Nornir.run(): the hosts are selected by `on_good` and
+        `on_failed`, the Nornir processors are called for the task and for
+        each host, and the failed hosts are either added to the Nornir failed
+        hosts or raised, per `raise_on_error`.
+
+        Parameters
+        ----------
+        nr : Nornir
+        task : async callable(EapiTask, **kwargs)
+        raise_on_error : bool - default from the Nornir configuration
+        on_good : bool - run on the hosts that have not failed a prior task
+        on_failed : bool - run on the hosts that have failed a prior task
+        name : str - the task name, default the `task` function name
+
+        Other Parameters
+        ----------------
+        Passed to the `task` function.
+
+        Returns
+        -------
+        AggregatedResult
+        """
+        nr_task = Task(task, name=name or task.__name__, **kwargs)
+        nr.processors.task_started(nr_task)
+
+        run_on = [
+            host for host_name, host in nr.inventory.hosts.items()
+            if (on_good and host_name not in nr.data.failed_hosts)
+            or (on_failed and host_name in nr.data.failed_hosts)
+        ]
+
+        agg_result = AggregatedResult(nr_task.name)
+        results = await asyncio.gather(*(
+            self._run_host(nr, nr_task, task, host, kwargs) for host in run_on
+        ))
+
+        for host, multi_result in zip(run_on, results):
+            agg_result[host.name] = multi_result
+
+        if raise_on_error if raise_on_error is not None else nr.config.core.raise_on_error:
+            agg_result.raise_on_error()
+        else:
+            nr.data.failed_hosts.update(agg_result.failed_hosts.keys())
+
+        nr.processors.task_completed(nr_task, agg_result)
+        return agg_result
+
+
+def run_eapi_task(nr, task, max_inflight=None, timeout=None, **kwargs):
+    """
+    Run the asyncio `task` function using an EapiFleet; see EapiFleet.run().
+    """
+    async def run_fleet():
+        async with EapiFleet(max_inflight=max_inflight, timeout=timeout) as fleet:
+            return await fleet.run(nr, task, **kwargs)
+
+    return asyncio.run(run_fleet())
+
+
+def run_engine(engine, nr, task, aio_task, **kwargs):
+    """
+    Run either the Nornir `task` function or the asyncio `aio_task` function,
+    as selected by `engine`; the two functions take the same parameters and
+    return the same results.  The "daemon" engine runs the `aio_task`
+    function with the device eAPI requests made by the cvp-pyez daemon.
+
+    Parameters
+    ----------
+    engine : str - one of ENGINES
+    nr : Nornir
+    task : callable - the Nornir task function
+    aio_task : async callable - the EapiFleet task function
+
+    Returns
+    -------
+    AggregatedResult
+    """
+    if engine == 'asyncio':
+        return run_eapi_task(nr, aio_task, **kwargs)
+
+    if engine == 'daemon':
+        from cvppyez.daemon import run_daemon_task
+        return run_daemon_task(nr, aio_task, **kwargs)
+
+    return run_task(nr, task=task, **kwargs)
@@ -0,0 +1,177 @@
+"""
+A stub EOS eAPI server, used to exercise the asyncio eAPI engine without
+devices.  Every request is answered by the same stub regardless of the
+device hostname, after an optional simulated latency.
+
+    python -m cvppyez.eapi.stub --port 8080 --latency 0.05
+"""
+
+import json
+import random
+import asyncio
+import argparse
+
+from aiohttp import web
+
+from cvppyez.rest.stub import ssl_context
+
+__all__ = ['EapiStub', 'DEFAULT_HANDLERS']
+
+
+def _mac_table(command):
+    return dict(unicastTable=dict(tableEntries=[]), multicastTable=dict(tableEntries=[]))
+
+
+def _arp_table(command):
+    return dict(ipV4Neighbors=[], dynamicEntries=0, staticEntries=0)
+
+
+# the command handlers are found by the longest command prefix match.  A
+# handler returns a dict for a command that supports JSON output, or a str
+# for a text-only command.
+
+DEFAULT_HANDLERS = {
+    'enable': lambda command: {},
+    'show version': lambda command: dict(modelName='vEOS', version='4.22.0F',
+                                         serialNumber='STUB', hostname='stub'),
+    'show ip arp': _arp_table,
+    'show mac address-table': _mac_table,
+    'show logging': lambda command: '',
+    'show running-config': lambda command: '! stub running-config\nend\n',
+    'show configuration sessions': lambda command: dict(sessions={}),
+    'show session-config': lambda command: '--- system:/running-config\n+++ session:/stub\n',
+    'show interfaces': lambda command: dict(interfaces={}),
+    'configure session': lambda command: {},
+    'copy': lambda command: {},
+    'write memory': lambda command: {}
+}
+
+
+class EapiStub(object):
+    """
+    The stub eAPI server.
+
+    Parameters
+    ----------
+    handlers : dict - command prefix to handler; merged with DEFAULT_HANDLERS
+    latency : float - the simulated response latency, in seconds
+    jitter : float - a random latency added to each response, in seconds
+
+    Attributes
+    ----------
+    n_requests : int - the number of requests served
+    max_inflight : int - the highest number of concurrent requests
+    """
+
+    def __init__(self, handlers=None, latency=0.0, jitter=0.0):
+        self.handlers = dict(DEFAULT_HANDLERS, **(handlers or {}))
+        self._prefixes = sorted(self.handlers, key=len, reverse=True)
+        self.latency = latency
+        self.jitter = jitter
+        self.n_requests = 0
+        self.max_inflight = 0
+        self._inflight = 0
+        self._runner = None
+
+    def _handler(self, command):
+        for prefix in self._prefixes:
+            if command.startswith(prefix):
+                return self.handlers[prefix]
+        return None
+
+    def run_commands(self, commands, encoding):
+        """
+        Returns the runCmds JSON-RPC result, or the JSON-RPC error for the
+        first command that fails.
+        """
+        outputs = list()
+        in_session = False
+
+        for cmd_n, command in enumerate(commands, start=1):
+            if isinstance(command, dict):
+                command = command['cmd']
+
+            handler = self._handler(command)
+            in_session = in_session or command.startswith('configure session')
+
+            if handler:
+                output = handler(command)
+            elif in_session and not command.startswith('show'):
+                output = {}
+            else:
+                return None, dict(code=1002, message=(
+                    f"CLI command {cmd_n} of {len(commands)} '{command}' failed: invalid command"
+                ), data=outputs + [dict(errors=[f"Invalid input (at token 0: '{command}')"])])
+
+            if isinstance(output, str):
+                if encoding == 'json':
+                    return None, dict(code=1003, message=(
+                        f"CLI command {cmd_n} of {len(commands)} '{command}' failed: "
+                        "could not convert to JSON"
+                    ), data=outputs + [dict(errors=['This is an unconverted command'])])
+                output = dict(output=output)
+
+            elif encoding == 'text':
+                output = dict(output=json.dumps(output, indent=3))
+
+            outputs.append(output)
+
+        return outputs, None
+
+    async def handle_request(self, request):
+        self._inflight += 1
+        self.max_inflight = max(self.max_inflight, self._inflight)
+        self.n_requests += 1
+
+        try:
+            body = await request.json()
+            delay = self.latency + random.uniform(0, self.jitter)
+            if delay:
+                await asyncio.sleep(delay)
+
+            params = body['params']
+            result, error = self.run_commands(params['cmds'], params.get('format', 'json'))
+
+        finally:
+            self._inflight -= 1
+
+        reply = dict(jsonrpc='2.0', id=body.get('id'))
+        reply.update(dict(error=error) if error else dict(result=result))
+        return web.json_response(reply)
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post('/command-api', self.handle_request)
+        return app
+
+    async def start(self, host='127.0.0.1', port=8080, ssl_context=None):
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port, ssl_context=ssl_context,
+                          backlog=4096).start()
+        return self
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub EOS eAPI server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--certfile', help='serve HTTPS using this certificate')
+    parser.add_argument('--keyfile')
+    args = parser.parse_args()
+
+    stub = EapiStub(latency=args.latency, jitter=args.jitter)
+    web.run_app(stub.app(), host=args.host, port=args.port, access_log=None,
+                ssl_context=ssl_context(args.certfile, args.keyfile), backlog=4096,
+                print=None)
+
+
+if __name__ == '__main__':
+    main()
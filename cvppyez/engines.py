@@ -0,0 +1,15 @@
+import os
+
+__all__ = ['ENGINES', 'default_engine']
+
+
+ENGINES = ('nornir', 'asyncio', 'daemon')
+
+
+def default_engine():
+    """
+    Returns the engine named by $CVP_ENGINE, else "nornir".  The "daemon"
+    engine is only used when selected, a running daemon does not change the
+    engine of the programs.
+    """
+    return os.getenv('CVP_ENGINE') or ENGINES[0]
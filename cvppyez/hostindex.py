@@ -0,0 +1,162 @@
+import time
+import sqlite3
+import hashlib
+import threading
+
+from cvppyez.validators import validate_macaddr
+
+__all__ = ['HostIndex']
+
+
+class HostIndex(object):
+    """
+    This class is used to store a snapshot of the device MAC address tables
+    and ARP tables into a local SQLite database, indexed by MAC address and by
+    IP address.  Once collected, end-host lookups are answered from the
+    snapshot rather than by querying every device.
+
+    Each device snapshot records the time it was collected and a digest of its
+    table entries, so that a refresh can be limited to the devices whose
+    snapshot is older than a given age, and the rows are only re-written for
+    devices whose tables have changed.
+
+    Parameters
+    ----------
+    filename : str - the SQLite database file
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS devices (
+        hostname TEXT PRIMARY KEY,
+        collected REAL NOT NULL,
+        digest TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS mac_entries (
+        macaddr TEXT NOT NULL,
+        hostname TEXT NOT NULL,
+        vlan INTEGER,
+        interface TEXT,
+        entry_type TEXT
+    );
+    CREATE INDEX IF NOT EXISTS mac_entries_macaddr ON mac_entries (macaddr);
+    CREATE INDEX IF NOT EXISTS mac_entries_hostname ON mac_entries (hostname);
+    CREATE TABLE IF NOT EXISTS arp_entries (
+        ipaddr TEXT NOT NULL,
+        hostname TEXT NOT NULL,
+        macaddr TEXT,
+        interface TEXT
+    );
+    CREATE INDEX IF NOT EXISTS arp_entries_ipaddr ON arp_entries (ipaddr);
+    CREATE INDEX IF NOT EXISTS arp_entries_hostname ON arp_entries (hostname);
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(filename, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(self.SCHEMA)
+
+    @staticmethod
+    def norm_macaddr(macaddr):
+        return (validate_macaddr(macaddr) or macaddr).lower()
+
+    def update_device(self, hostname, mac_table, arp_table):
+        """
+        Store the device snapshot of the "show mac address-table" and the
+        "show ip arp" command outputs (JSON).
+
+        Returns
+        -------
+        bool - True if the device table entries changed since the prior
+        snapshot, False otherwise.
+        """
+        mac_rows = sorted(
+            (self.norm_macaddr(entry['macAddress']), hostname, entry['vlanId'],
+             entry['interface'], entry.get('entryType'))
+            for entry in mac_table['unicastTable']['tableEntries']
+        )
+
+        arp_rows = sorted(
+            (entry['address'], hostname, self.norm_macaddr(entry['hwAddress']),
+             entry['interface'])
+            for entry in arp_table['ipV4Neighbors']
+        )
+
+        digest = hashlib.sha1(repr((mac_rows, arp_rows)).encode()).hexdigest()
+        now = time.time()
+
+        with self._lock, self.db:
+            found = self.db.execute('SELECT digest FROM devices WHERE hostname = ?',
+                                    (hostname,)).fetchone()
+
+            self.db.execute('INSERT OR REPLACE INTO devices VALUES (?, ?, ?)',
+                            (hostname, now, digest))
+
+            if found and found['digest'] == digest:
+                return False
+
+            self.db.execute('DELETE FROM mac_entries WHERE hostname = ?', (hostname,))
+            self.db.execute('DELETE FROM arp_entries WHERE hostname = ?', (hostname,))
+            self.db.executemany('INSERT INTO mac_entries VALUES (?, ?, ?, ?, ?)', mac_rows)
+            self.db.executemany('INSERT INTO arp_entries VALUES (?, ?, ?, ?)', arp_rows)
+
+        return True
+
+    def remove_devices(self, hostnames):
+        with self._lock, self.db:
+            for table in ('devices', 'mac_entries', 'arp_entries'):
+                self.db.executemany(f'DELETE FROM {table} WHERE hostname = ?',
+                                    ((hostname,) for hostname in hostnames))
+
+    def hostnames(self):
+        return {row[0] for row in self.db.execute('SELECT hostname FROM devices')}
+
+    def stale_hosts(self, hostnames, max_age):
+        """
+        Returns the set of `hostnames` that do not have a snapshot collected
+        within the last `max_age` seconds.
+        """
+        fresh_after = time.time() - max_age
+        fresh = {
+            row[0] for row in
+            self.db.execute('SELECT hostname FROM devices WHERE collected >= ?',
+                            (fresh_after,))
+        }
+        return set(hostnames) - fresh
+
+    def _lookup(self, table, column, values):
+        # the lookup values are loaded into a temporary table so that any
+        # number of values is answered with a single indexed join.  The
+        # transaction is committed so that the connection does not hold a
+        # read transaction open, which would block the WAL checkpoints.
+
+        with self._lock, self.db:
+            self.db.execute('CREATE TEMP TABLE IF NOT EXISTS lookup (value TEXT PRIMARY KEY)')
+            self.db.execute('DELETE FROM lookup')
+            self.db.executemany('INSERT OR IGNORE INTO lookup VALUES (?)',
+                                ((value,) for value in values))
+            rows = self.db.execute(
+                f'SELECT {table}.* FROM lookup JOIN {table} ON {table}.{column} = lookup.value '
+                f'ORDER BY {table}.{column}, {table}.hostname'
+            ).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def find_macaddrs(self, macaddrs):
+        """
+        Returns a list of dict(macaddr, hostname, vlan, interface, entry_type)
+        for each of the `macaddrs` found.
+        """
+        return self._lookup('mac_entries', 'macaddr', map(self.norm_macaddr, macaddrs))
+
+    def find_ipaddrs(self, ipaddrs):
+        """
+        Returns a list of dict(ipaddr, hostname, macaddr, interface) for each
+        of the `ipaddrs` found.
+        """
+        return self._lookup('arp_entries', 'ipaddr', ipaddrs)
+
+    def close(self):
+        self.db.close()
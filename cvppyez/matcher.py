@@ -1,8 +1,19 @@
 import re
-from fnmatch import fnmatch
+from fnmatch import fnmatch, translate
+from collections import namedtuple
 
 
-__all__ = ['make_matcher']
+__all__ = ['make_matcher', 'compile_patterns', 'parse_select', 'SelectTerm', 'SELECT_FIELDS']
+
+
+# the inventory host fields that can be selected, see InventoryIndex.
+
+SELECT_FIELDS = ('name', 'serial', 'model', 'version', 'status', 'group')
+
+# an inventory selection term: the hosts whose `field` value matches any of
+# the `patterns`, glob or regex patterns per `use_regex`.
+
+SelectTerm = namedtuple('SelectTerm', ['field', 'patterns', 'use_regex'])
 
 
 def make_matcher(name, value, use_regex):
@@ -43,3 +54,49 @@ def make_matcher(name, value, use_regex):
         return fnmatch(_in_val, value)
 
     return fnmatch_matcher
+
+
+def compile_patterns(patterns, use_regex):
+    """
+    Compile the list of glob, or regex, `patterns` into one regular
+    expression that matches a value matching any of the patterns; the regex
+    patterns are matched at the start of the value ignoring case, as
+    make_matcher().
+
+    Returns
+    -------
+    re.Pattern - use the match() method.
+    """
+    if not use_regex:
+        return re.compile('|'.join(map(translate, patterns)))
+
+    try:
+        return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns), re.IGNORECASE)
+
+    except re.error:
+        raise ValueError(f'Bad regular expression: {" ".join(patterns)}')
+
+
+def parse_select(spec, use_regex=False):
+    """
+    Parse the inventory selection term from the string form "field=patterns",
+    for example "model=DCS-7050*,DCS-7280*"; the glob patterns are separated
+    by commas, a regex pattern is used as given.
+
+    Returns
+    -------
+    SelectTerm
+    """
+    field, _, value = spec.partition('=')
+    field = field.strip()
+
+    if field not in SELECT_FIELDS or not value:
+        raise ValueError(f'Invalid select: "{spec}", use <field>=<pattern> with field one of '
+                         f'{", ".join(SELECT_FIELDS)}')
+
+    patterns = [value] if use_regex else [
+        pattern.strip() for pattern in value.split(',') if pattern.strip()
+    ]
+
+    compile_patterns(patterns, use_regex)
+    return SelectTerm(field, patterns, use_regex)
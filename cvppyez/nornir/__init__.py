@@ -1,2 +1,5 @@
 from cvppyez.nornir.plugin_inventory import CVPInventory
 from cvppyez.nornir.get_inventory import get_inventory
+from cvppyez.nornir.inventory_index import InventoryIndex, filter_hosts
+from cvppyez.nornir.scheduler import AdaptiveScheduler, run_task
+from cvppyez.nornir.inventory_sync import InventorySync
@@ -2,10 +2,16 @@ import os
 
 from nornir import InitNornir
 
+from cvppyez.nornir.inventory_cache import InventoryCache
+from cvppyez.nornir.inventory_index import InventoryIndex, filter_hosts
+from cvppyez.nornir.scheduler import AdaptiveScheduler
+from cvppyez.tracing import span
+
 __all__ = ['get_inventory']
 
 
-def get_inventory(filter_func=None):
+def get_inventory(filter_func=None, select=None, cache_ttl=None, cache_serve_stale=None,
+                  daemon=False):
     """
     This function will use the Nornir to gather the device inventory from CVP.
     The User can provide a hostname based filter to apply to the complete
@@ -13,18 +19,65 @@ def get_inventory(filter_func=None):
     processing the `ctx.obj.nr` will be set to the filtered list of devices to
     scan.  The `ctx.obj.nr_all` is the complete CVP inventory.
 
+    The built inventory is cached on local disk so that repeated program runs
+    do not re-fetch the inventory from CVP.  The cache behavior can be set
+    using the environment variables CVP_INVENTORY_CACHE_TTL (seconds, 0 to
+    disable) and CVP_INVENTORY_CACHE_STALE (1 to use an expired cache while
+    it is refreshed in the background).
+
+    The devices are grouped by the CVP tag types listed in the environment
+    variable CVP_INVENTORY_GROUPBY (comma separated), and the maximum number
+    of concurrent device tasks is set by CVP_MAX_WORKERS.  The device tasks
+    are run by the AdaptiveScheduler, which sets the concurrency up to that
+    maximum, and caps the concurrency of the groups listed in CVP_GROUP_CAPS;
+    CVP_SCHEDULER=fixed runs them with the fixed maximum instead.  See
+    run_task().
+
+    The devices eAPI port is set by CVP_EAPI_PORT when the devices do not use
+    the transport default port.
+
+    The hosts are selected by the `select` terms using the InventoryIndex,
+    and then by the `filter_func`.
+
     Parameters
     ----------
     filter_func : callable
         If provided, the inventory items will be filtered
+
+    select : list[SelectTerm]
+        If provided, the hosts matching all of the terms are selected.
+
+    cache_ttl : int
+        The inventory cache time-to-live in seconds, 0 disables the cache.
+
+    cache_serve_stale : bool
+        Use an expired inventory cache while it is refreshed in the background.
+
+    daemon : bool
+        Use the inventory of the cvp-pyez daemon rather than CVP.
     """
 
+    if cache_ttl is None:
+        cache_ttl = int(os.getenv('CVP_INVENTORY_CACHE_TTL', InventoryCache.DEFAULT_TTL))
+
+    if cache_serve_stale is None:
+        cache_serve_stale = os.getenv('CVP_INVENTORY_CACHE_STALE') == '1'
+
+    groupby_tags = list(filter(None, os.getenv('CVP_INVENTORY_GROUPBY', '').split(',')))
+
     nr = InitNornir(
         core={
-            'num_workers': 100
+            'num_workers': int(os.getenv('CVP_MAX_WORKERS', AdaptiveScheduler.DEFAULT_MAX_WORKERS))
         },
         inventory={
-            'plugin': 'cvppyez.nornir.CVPInventory'
+            'plugin': 'cvppyez.daemon.DaemonInventory'
+        } if daemon else {
+            'plugin': 'cvppyez.nornir.CVPInventory',
+            'options': {
+                'groupby_tags': groupby_tags or None,
+                'cache_ttl': cache_ttl,
+                'cache_serve_stale': cache_serve_stale
+            }
         },
         logging={
             'enabled': False
@@ -34,4 +87,11 @@ def get_inventory(filter_func=None):
     nr.inventory.defaults.username = os.environ['CVP_USER']
     nr.inventory.defaults.password = os.environ['CVP_PASSWORD']
 
+    if os.getenv('CVP_EAPI_PORT'):
+        nr.inventory.defaults.port = int(os.environ['CVP_EAPI_PORT'])
+
+    if select:
+        with span('inventory.select'):
+            nr = filter_hosts(nr, InventoryIndex(nr.inventory.hosts).select(select))
+
     return nr if not filter_func else nr.filter(filter_func=filter_func)
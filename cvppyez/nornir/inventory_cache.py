@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import fcntl
+import logging
+import hashlib
+import tempfile
+from pathlib import Path
+from contextlib import contextmanager
+
+__all__ = ['InventoryCache']
+
+log = logging.getLogger(__name__)
+
+
+class InventoryCache(object):
+    """
+    This class is used to store the built inventory data (hosts, groups) in a
+    local file so that repeated program runs do not need to re-fetch the
+    complete inventory from CVP.  The cache file is replaced atomically so that
+    concurrent readers never see a partially written file.
+
+    Parameters
+    ----------
+    key : dict
+        The values that identify the cached inventory, for example the CVP
+        server and groupby tags.  Different key values use different files.
+
+    ttl : int
+        The number of seconds the cached data is considered fresh.
+
+    cache_dir : str
+        The directory to store the cache files.
+    """
+    DEFAULT_TTL = 300
+    DEFAULT_DIR = '~/.cache/cvp-pyez'
+
+    def __init__(self, key, ttl=None, cache_dir=None):
+        self.ttl = self.DEFAULT_TTL if ttl is None else ttl
+        self.cache_dir = Path(cache_dir or self.DEFAULT_DIR).expanduser()
+        digest = hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()
+        self.path = self.cache_dir / f'inventory-{digest[:16]}.json'
+
+    def load(self):
+        """
+        Returns
+        -------
+        tuple - the cached data and its age in seconds, or (None, None) if
+        there is no usable cached data.
+        """
+        try:
+            age = time.time() - self.path.stat().st_mtime
+            with self.path.open() as ifile:
+                return json.load(ifile), age
+
+        except (OSError, ValueError):
+            return None, None
+
+    def save(self, data):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, prefix='.inventory-')
+
+        try:
+            with os.fdopen(fd, 'w') as ofile:
+                json.dump(data, ofile)
+                ofile.flush()
+                os.fsync(ofile.fileno())
+
+            os.replace(tmp_name, self.path)
+
+        except Exception:
+            os.unlink(tmp_name)
+            raise
+
+    @contextmanager
+    def refresh_lock(self):
+        """
+        Context manager that yields True if this process obtained the refresh
+        lock, or False if another process is already refreshing the cache.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with self.path.with_suffix('.lock').open('w') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+            except BlockingIOError:
+                yield False
+                return
+
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def refresh(self, build_func):
+        """
+        Build and store the inventory data, unless another process is already
+        refreshing the cache.  A failed refresh is logged, and the existing
+        cached data is kept.
+
+        Returns
+        -------
+        dict - the inventory data, or None if not refreshed.
+        """
+        with self.refresh_lock() as locked:
+            if not locked:
+                return None
+
+            try:
+                data = build_func()
+                self.save(data)
+                return data
+
+            except Exception as exc:
+                log.warning(f'inventory cache refresh failed: {str(exc)}')
+                return None
+
+    def refresh_background(self, build_func):
+        """
+        Refresh the cache in a detached process, so that the program does not
+        wait for the refresh, neither now nor when exiting.  The refresh
+        process output is discarded so that it cannot interleave with the
+        output of the program.
+        """
+        pid = os.fork()
+        if pid:
+            # the intermediate process exits at once, so the refresh process
+            # is not left as a zombie of the program.
+            os.waitpid(pid, 0)
+            return
+
+        try:
+            if os.fork():
+                os._exit(0)
+
+            os.setsid()
+            devnull = os.open(os.devnull, os.O_RDWR)
+            for fd in (0, 1, 2):
+                os.dup2(devnull, fd)
+
+            self.refresh(build_func)
+
+        finally:
+            os._exit(0)
+
+    def get(self, build_func, serve_stale=False, refresh_func=None):
+        """
+        Return the cached inventory data if it is fresh.  Otherwise the data is
+        built by calling `build_func` and then stored.
+
+        Parameters
+        ----------
+        build_func : callable() -> dict
+            Used to build the inventory data from CVP.
+
+        serve_stale : bool
+            When True, and expired data exists in the cache, then the expired
+            data is returned immediately and the cache is refreshed in a
+            detached background process, see refresh_background().
+
+        refresh_func : callable() -> dict
+            Used in place of `build_func` for the background refresh.
+
+        Returns
+        -------
+        dict - the inventory data
+        """
+        data, age = self.load()
+
+        if data is not None:
+            if age < self.ttl:
+                return data
+
+            if serve_stale:
+                self.refresh_background(refresh_func or build_func)
+                return data
+
+        data = build_func()
+        self.save(data)
+        return data
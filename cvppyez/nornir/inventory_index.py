@@ -0,0 +1,166 @@
+"""
+The inventory index used to select hosts by name, serial number, model, EOS
+version, status and group without testing a matcher against every host.  The
+index is built from the loaded Nornir inventory, using the host data set by
+the inventory plugin, see host_data(), and the host groups.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+
+from nornir.core import Nornir
+from nornir.core.inventory import Inventory
+
+from cvppyez.matcher import compile_patterns, SELECT_FIELDS
+
+__all__ = ['InventoryIndex', 'filter_hosts']
+
+
+class InventoryIndex(object):
+    """
+    This class is used to select the inventory hosts matching a list of
+    SelectTerm, see parse_select().  For each field the index keeps the hosts
+    of each distinct value, and the sorted values:
+
+        * a pattern without wildcards is a dict lookup
+        * a "prefix*" glob pattern is a range of the sorted values
+        * the other patterns of a term are combined into one regular
+          expression, matched once against each distinct value.
+
+    The patterns of a term are ORed, and the terms are ANDed: the hosts of
+    the term with the fewest hosts are checked against the field values of
+    the other terms, so that the cost is that of the smallest term.
+
+    Parameters
+    ----------
+    hosts : dict - hostname to nornir Host, the Nornir inventory hosts.
+    """
+
+    def __init__(self, hosts):
+        self.names = frozenset(hosts)
+        self.postings = {field: defaultdict(set) for field in SELECT_FIELDS if field != 'name'}
+
+        # the field values of each host: a value, or the set of groups.
+
+        self.host_values = {field: dict() for field in self.postings}
+
+        for name, host in hosts.items():
+            for field, value in host.data.items():
+                if value and field in self.postings:
+                    self.postings[field][value].add(name)
+                    self.host_values[field][name] = value
+
+            groups = frozenset(host.groups)
+            for group in groups:
+                self.postings['group'][group].add(name)
+
+            self.host_values['group'][name] = groups
+
+        # the host names are their own postings, so are not stored.
+
+        self.keys = {field: sorted(values) for field, values in self.postings.items()}
+        self.keys['name'] = sorted(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def select(self, terms):
+        """
+        Returns the set of hostnames matching all of the `terms`, all of the
+        hosts if no terms.
+        """
+        if not terms:
+            return set(self.names)
+
+        matched = sorted(
+            ((term.field, set(self.match_values(term))) for term in terms),
+            key=lambda item: self._count(*item)
+        )
+
+        (field, values), others = matched[0], matched[1:]
+        selected = self._hosts(field, values)
+
+        for field, values in others:
+            if field == 'name':
+                selected = selected & values
+            elif field == 'group':
+                groups = self.host_values[field]
+                selected = {name for name in selected if not groups[name].isdisjoint(values)}
+            else:
+                host_values = self.host_values[field]
+                selected = {name for name in selected if host_values.get(name) in values}
+
+        return selected
+
+    def lookup(self, term):
+        """ Returns the set of hostnames matching the SelectTerm `term` """
+        return self._hosts(term.field, self.match_values(term))
+
+    def match_values(self, term):
+        """ Returns the list of the distinct field values matching the `term` """
+        keys = self.keys[term.field]
+
+        if term.use_regex:
+            regex = compile_patterns(term.patterns, use_regex=True)
+            return [key for key in keys if regex.match(key)]
+
+        exists = self.names if term.field == 'name' else self.postings[term.field]
+        values, globs = list(), list()
+
+        for pattern in term.patterns:
+            if not _has_wildcards(pattern):
+                if pattern in exists:
+                    values.append(pattern)
+
+            elif pattern.endswith('*') and not _has_wildcards(pattern[:-1]):
+                values.extend(_prefix_range(keys, pattern[:-1]))
+
+            else:
+                globs.append(pattern)
+
+        if globs:
+            regex = compile_patterns(globs, use_regex=False)
+            values.extend(key for key in keys if regex.match(key))
+
+        return values
+
+    def _count(self, field, values):
+        if field == 'name':
+            return len(values)
+
+        postings = self.postings[field]
+        return sum(len(postings[value]) for value in values)
+
+    def _hosts(self, field, values):
+        if field == 'name':
+            return set(values)
+
+        postings = self.postings[field]
+        return set().union(*(postings[value] for value in values))
+
+
+def filter_hosts(nr, hostnames):
+    """
+    Returns the Nornir instance with the inventory of the `hostnames`, as
+    nr.filter() but without calling a filter function for every host.
+    """
+    hosts = nr.inventory.hosts
+    filtered = Nornir(**nr.__dict__)
+    filtered.inventory = Inventory(
+        hosts={name: hosts[name] for name in sorted(hostnames) if name in hosts},
+        groups=nr.inventory.groups,
+        defaults=nr.inventory.defaults
+    )
+    return filtered
+
+
+def _has_wildcards(pattern):
+    return any(char in pattern for char in '*?[')
+
+
+def _prefix_range(keys, prefix):
+    start = bisect_left(keys, prefix)
+    end = start
+    while end < len(keys) and keys[end].startswith(prefix):
+        end += 1
+    return keys[start:end]
@@ -0,0 +1,210 @@
+import asyncio
+
+from cvppyez.nornir.plugin_inventory import _get_tags, host_data
+from cvppyez.tracing import span
+
+__all__ = ['InventorySync']
+
+
+class InventorySync(object):
+    """
+    This class is used to keep an in-memory inventory current with CVP at a
+    cost proportional to the number of device changes, rather than the size
+    of the fleet.
+
+    The first sync builds the inventory from the CVP device inventory and the
+    device status dataset, as build_inventory(), and keeps the timestamp of
+    the latest dataset notification.  Each later sync requests only the
+    dataset notifications since that timestamp and applies them: an inactive
+    device is removed from the inventory, an active device is added, and a
+    deleted device is forgotten.  A device that is not yet known is looked up
+    by its serial number.
+
+    The inventory groups are built by the full sync only; a device added by
+    an incremental sync has no groups until the next full sync.
+
+    Parameters
+    ----------
+    groupby_tags : list[str] - tag types used to create groups
+    warn : callable(str) - used to report hosts removed from the inventory
+
+    Attributes
+    ----------
+    hosts : dict - the inventory hosts, as build_inventory()
+    groups : dict - the inventory groups, as build_inventory()
+    last_ts : int - the timestamp of the latest notification applied, in
+                    nanoseconds; None before the first sync
+    """
+    DEVICES_DATASET = '$a/DatasetInfo/Devices'
+    NET_ELEMENT = '$c/provisioning/getNetElementById.do'
+
+    def __init__(self, groupby_tags=None, warn=print):
+        self.groupby_tags = groupby_tags
+        self.warn = warn
+        self.hosts = dict()
+        self.groups = dict()
+        self.last_ts = None
+
+        # serial number to dict(fqdn, ipAddress, status, data), for every device
+        # known to CVP whether or not it is active.
+
+        self._devices = dict()
+        self._dev_groups = dict()
+
+    @property
+    def inventory(self):
+        """ dict - with keys 'hosts' and 'groups', as build_inventory() """
+        return dict(hosts=self.hosts, groups=self.groups)
+
+    async def sync(self, cvp, full=False):
+        """
+        Sync the inventory from CVP; a full sync when `full` or before the
+        first sync, otherwise an incremental sync.
+
+        Parameters
+        ----------
+        cvp : AsyncCVPRestClient
+
+        Returns
+        -------
+        set - the names of the hosts that were added or removed.
+        """
+        if full or self.last_ts is None:
+            return await self.full_sync(cvp)
+
+        return await self.delta_sync(cvp)
+
+    async def full_sync(self, cvp):
+        """ Rebuild the inventory from CVP, see sync() """
+        with span('inventory.fetch'):
+            body, notifications, tags = await asyncio.gather(
+                cvp.api.get('/inventory/devices'),
+                self._get_notifications(cvp),
+                _get_tags(cvp, tag_list=self.groupby_tags) if self.groupby_tags
+                else asyncio.sleep(0)
+            )
+
+        old_names = set(self.hosts)
+
+        self.hosts = dict()
+        self.groups = dict()
+        self._dev_groups = dict()
+        self._devices = {
+            dev['serialNumber']: dict(fqdn=dev['fqdn'], ipAddress=dev['ipAddress'], status=None,
+                                      data=host_data(dev))
+            for dev in body
+        }
+
+        if tags:
+            tags, dev_tags = tags
+            self._dev_groups = dict(dev_tags)
+            self.groups = {tag_name: dict() for tag_name in tags}
+
+        self.last_ts = None
+        self._apply(notifications)
+
+        # a device that has no status in the dataset is a "zombie"; it is
+        # never added to the inventory.
+
+        for dev in self._devices.values():
+            if dev['status'] is None:
+                self.warn(f"WARNING: removing 'zombie' host: {dev['fqdn']}")
+            elif dev['status'] != 'active':
+                self.warn(f"WARNING: removing inactive host: {dev['fqdn']}")
+
+        return old_names ^ set(self.hosts)
+
+    async def delta_sync(self, cvp):
+        """ Apply the device changes since the last sync, see sync() """
+        with span('inventory.delta'):
+            notifications = await self._get_notifications(cvp, start=self.last_ts + 1)
+
+            new_serials = {
+                serial
+                for notification in notifications
+                for serial in notification.get('updates', {})
+                if serial not in self._devices
+            }
+
+            if new_serials:
+                await self._get_net_elements(cvp, new_serials)
+
+        return self._apply(notifications)
+
+    # -------------------------------------------------------------------------
+    # CVP requests
+    # -------------------------------------------------------------------------
+
+    async def _get_notifications(self, cvp, start=None):
+        params = dict(start=start) if start else dict()
+        notifications = [
+            notification async for notification in
+            cvp.iter_notification_records(self.DEVICES_DATASET, params=params)
+        ]
+        return sorted(notifications, key=lambda notification: notification['timestamp'])
+
+    async def _get_net_elements(self, cvp, serials):
+        async def get_net_element(serial):
+            body = await cvp.api.get(self.NET_ELEMENT, params=dict(netElementId=serial))
+            if 'errorCode' in body or not body.get('ipAddress'):
+                self.warn(f"WARNING: unknown device serial-number: {serial}")
+                return
+
+            self._devices[serial] = dict(fqdn=body['fqdn'], ipAddress=body['ipAddress'],
+                                         status=None, data=host_data(body))
+
+        await asyncio.gather(*map(get_net_element, serials))
+
+    # -------------------------------------------------------------------------
+    # apply changes
+    # -------------------------------------------------------------------------
+
+    def _apply(self, notifications):
+        changed = set()
+
+        for notification in notifications:
+            if notification.get('delete_all'):
+                changed.update(self.hosts)
+                self.hosts.clear()
+                for dev in self._devices.values():
+                    dev['status'] = None
+
+            # the deletes are either a list of keys, or a dict keyed by them.
+            for serial in notification.get('deletes') or ():
+                dev = self._devices.pop(serial, None)
+                if dev and self.hosts.pop(dev['fqdn'], None) is not None:
+                    changed.add(dev['fqdn'])
+
+            for serial, item in notification.get('updates', {}).items():
+                name = self._update(serial, item['value'])
+                if name:
+                    changed.add(name)
+
+            self.last_ts = max(self.last_ts or 0, notification['timestamp'])
+
+        return changed
+
+    def _update(self, serial, status):
+        """ Apply the status of one device, returns the host name if changed """
+        dev = self._devices.get(serial)
+        if dev is None:
+            return None
+
+        dev['status'] = status.get('status')
+        name = dev['fqdn']
+
+        if dev['status'] != 'active':
+            if self.hosts.pop(name, None) is None:
+                return None
+
+            self.warn(f"WARNING: removing inactive host: {name}")
+            return name
+
+        if name in self.hosts:
+            return None
+
+        self.hosts[name] = dict(hostname=dev['ipAddress'], data=dev['data'])
+        if name in self._dev_groups:
+            self.hosts[name]['groups'] = self._dev_groups[name]
+
+        return name
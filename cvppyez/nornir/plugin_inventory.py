@@ -1,95 +1,229 @@
+import os
+import asyncio
+from functools import partial
 from collections import defaultdict
 
-from cvppyez.rest import CVPRestClient
+from first import first
+
+from cvppyez.rest import AsyncCVPRestClient
+from cvppyez.rest.client import CvpSession
+from cvppyez.nornir.inventory_cache import InventoryCache
+from cvppyez.tracing import span
 
 from nornir.core.deserializer.inventory import Inventory
 
-__all__ = ['CVPInventory']
+__all__ = ['CVPInventory', 'build_inventory', 'async_build_inventory', 'host_data']
 
 
-def _get_tags(cvp, tag_list):
-    r_dev_tags = defaultdict(list)
-    r_tags = list()
+def host_data(dev):
+    """
+    Returns the inventory host data, the fields used by the InventoryIndex,
+    from the CVP inventory device record `dev`.
+    """
+    return dict(serial=dev.get('serialNumber'), model=dev.get('modelName'),
+                version=dev.get('version'), status=dev.get('status'))
+
+
+async def _get_tags(cvp, tag_list):
+    """
+    Obtain the CVP labels for each of the tag types in `tag_list`, and the
+    devices each label is applied to.  The label requests for each tag type
+    are run concurrently, and the applied-device requests for each label are
+    started as soon as the labels for that tag type are known.  The number of
+    requests in-flight is capped by the `cvp` client.
+
+    Parameters
+    ----------
+    cvp : AsyncCVPRestClient
+    tag_list : list[str] - tag types, e.g. ["pod", "rack"]
+
+    Returns
+    -------
+    tuple - list of tag keys, dict of hostname to list of tag keys
+    """
+
+    async def get_applied_devices(tag_key):
+        body = await cvp.api.get('/label/getAppliedDevices.do', params=dict(
+            labelId=tag_key, startIndex=0, endIndex=0
+        ))
+        return tag_key, [dev_rec['hostName'] for dev_rec in body['data']]
 
-    for tag_name in tag_list:
-        res = cvp.api.get('/label/getLabels.do', params=dict(
+    async def get_tag_type(tag_name):
+        body = await cvp.api.get('/label/getLabels.do', params=dict(
             module='cvp',
             type=tag_name
         ))
-        res.raise_for_status()
 
-        for record in res.json()['labels']:
-            tag_count = record['netElementCount']
-            if not tag_count:
-                continue
+        return await asyncio.gather(*(
+            get_applied_devices(record['key'])
+            for record in body['labels']
+            if record['netElementCount']
+        ))
 
-            tag_key = record['key']
-            r_tags.append(tag_key)
+    r_dev_tags = defaultdict(list)
+    r_tags = list()
 
-            res = cvp.api.get('/label/getAppliedDevices.do', params=dict(
-                labelId=tag_key, startIndex=0, endIndex=0
-            ))
-            res.raise_for_status()
-            for dev_rec in res.json()['data']:
-                hostname = dev_rec['hostName']
+    for applied in await asyncio.gather(*map(get_tag_type, tag_list)):
+        for tag_key, hostnames in applied:
+            r_tags.append(tag_key)
+            for hostname in hostnames:
                 r_dev_tags[hostname].append(tag_key)
 
     return r_tags, r_dev_tags
 
 
-class CVPInventory(Inventory):
+async def _get_inventory(cvp, groupby_tags=None):
+    """
+    Obtain the CVP device inventory, the device status dataset, and the
+    optional device tags concurrently.
+
+    Returns
+    -------
+    tuple - inventory body, device status dataset, (tags, dev_tags) or None
+    """
+    return await asyncio.gather(
+        cvp.api.get('/inventory/devices'),
+        cvp.get_notifications('$a/DatasetInfo/Devices'),
+        _get_tags(cvp, tag_list=groupby_tags) if groupby_tags else asyncio.sleep(0)
+    )
+
+
+async def async_build_inventory(cvp, groupby_tags=None, warn=print):
+    """
+    The asyncio counterpart to build_inventory, using the logged-in `cvp`
+    client.
+
+    Parameters
+    ----------
+    cvp : AsyncCVPRestClient
+    groupby_tags : list[str] - tag types used to create groups
+    warn : callable(str) - used to report hosts removed from the inventory
+
+    Returns
+    -------
+    dict - with keys 'hosts' and 'groups'
+    """
+    with span('inventory.fetch'):
+        body, host_status, tags = await _get_inventory(cvp, groupby_tags=groupby_tags)
+
+    hosts = {
+        dev['fqdn']: dict(hostname=dev['ipAddress'], data=host_data(dev))
+        for dev in body
+    }
+
+    sn_to_hn = {dev['serialNumber']: dev['fqdn'] for dev in body}
+    host_sn_keys = set(sn_to_hn)
+
+    # now use the device status information for two reason:
+    # (1) remove any hosts that are not active
+    # (2) remove any hosts that are not _present_ in the status area
+
+    # TODO: should probably log these inactive hosts somewhere.
+
+    host_status_sn_keys = set(host_status)
+
+    # (1) - remove any hosts that are not active
+    for host_ds in host_status.values():
+        hostname = host_ds['hostname']
+        if host_ds['status'] != 'active':
+            warn(f"WARNING: removing inactive host: {hostname}")
+            del hosts[hostname]
 
-    def __init__(self, config, **kwargs):
+    # (2) remove any hosts that are not _present_ in the status area
+    for nonexist_sn in host_sn_keys - host_status_sn_keys:
+        hostname = sn_to_hn[nonexist_sn]
+        warn(f"WARNING: removing 'zombie' host: {hostname}")
+        del hosts[hostname]
 
-        cvp = CVPRestClient()
-        res = cvp.api.get('/inventory/devices')
-        res.raise_for_status()
-        body = res.json()
+    groups = {}
+    if tags:
+        tags, dev_tags = tags
+        for dev_name, tag_list in dev_tags.items():
+            hosts[dev_name]['groups'] = tag_list
 
-        hosts = {
-            dev['fqdn']: dict(hostname=dev['ipAddress'])
-            for dev in body
-        }
+        for tag_name in tags:
+            groups[tag_name] = dict()
 
-        sn_to_hn = {dev['serialNumber']: dev['fqdn'] for dev in body}
-        host_sn_keys = set(sn_to_hn)
+    return dict(hosts=hosts, groups=groups)
 
-        # now obtain the device status information for two reason:
-        # (1) remove any hosts that are not active
-        # (2) remove any hosts that are not _present_ in the status area
 
-        # TODO: should probably log these inactive hosts somewhere.
+def build_inventory(groupby_tags=None, max_inflight=None, warn=print):
+    """
+    Build the inventory hosts and groups data from CVP.
 
-        res = cvp.api.get('$a/DatasetInfo/Devices')
-        res.raise_for_status()
-        host_status = cvp.extracto_notifications(res.json())
-        host_status_sn_keys = set(host_status)
+    Parameters
+    ----------
+    groupby_tags : list[str] - tag types used to create groups
+    max_inflight : int - the maximum number of concurrent CVP requests
+    warn : callable(str) - used to report hosts removed from the inventory
 
-        # (1) - remove any hosts that are not active
-        for host_ds in host_status.values():
-            hostname = host_ds['hostname']
-            if host_ds['status'] != 'active':
-                print(f"WARNING: removing inactive host: {hostname}")
-                del hosts[hostname]
+    Returns
+    -------
+    dict - with keys 'hosts' and 'groups'
+    """
+    async def build():
+        async with AsyncCVPRestClient(max_inflight=max_inflight) as cvp:
+            return await async_build_inventory(cvp, groupby_tags=groupby_tags, warn=warn)
 
-        # (2) remove any hosts that are not _present_ in the status area
-        for nonexist_sn in host_sn_keys - host_status_sn_keys:
-            hostname = sn_to_hn[nonexist_sn]
-            print(f"WARNING: removing 'zombie' host: {hostname}")
-            del hosts[hostname]
+    return asyncio.run(build())
+
+
+class CVPInventory(Inventory):
+    """
+    Nornir inventory plugin sourced from CVP.
+
+    Other Parameters
+    ----------------
+    groupby_tags : list[str]
+        Tag types used to create the inventory groups.
+
+    max_inflight : int
+        The maximum number of concurrent CVP requests.
+
+    cache_ttl : int
+        When provided, the built inventory is cached on local disk for this
+        number of seconds; 0 disables the cache.
 
-        groups = {}
+    cache_dir : str
+        The directory to store the cache files.
+
+    cache_serve_stale : bool
+        When True an expired cache is used while it is refreshed in the
+        background.
+    """
+
+    def __init__(self, config, **kwargs):
         groupby_tags = kwargs.get('groupby_tags')
-        if groupby_tags:
-            tags, dev_tags = _get_tags(cvp, tag_list=groupby_tags)
-            for dev_name, tag_list in dev_tags.items():
-                hosts[dev_name]['groups'] = tag_list
 
-            for tag_name in tags:
-                groups[tag_name] = dict()
+        build_func = partial(build_inventory,
+                             groupby_tags=groupby_tags,
+                             max_inflight=kwargs.get('max_inflight'))
+
+        with span('inventory'):
+            inv_data = self._get_inventory(build_func, groupby_tags, kwargs)
 
         defaults = {
             'platform': 'eos'
         }
 
-        super().__init__(hosts=hosts, groups=groups, defaults=defaults, **kwargs)
+        super().__init__(hosts=inv_data['hosts'], groups=inv_data['groups'],
+                         defaults=defaults, **kwargs)
+
+    @staticmethod
+    def _get_inventory(build_func, groupby_tags, kwargs):
+        if kwargs.get('cache_ttl'):
+            cache = InventoryCache(
+                key=dict(server=first(map(os.getenv, CvpSession.ENV['server'])),
+                         username=first(map(os.getenv, CvpSession.ENV['username'])),
+                         groupby_tags=groupby_tags),
+                ttl=kwargs['cache_ttl'],
+                cache_dir=kwargs.get('cache_dir'))
+
+            # the background refresh must not interleave warnings with the
+            # output of the running program.
+
+            return cache.get(build_func,
+                             serve_stale=kwargs.get('cache_serve_stale'),
+                             refresh_func=partial(build_func, warn=lambda msg: None))
+
+        return build_func()
@@ -0,0 +1,291 @@
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from pyeapi.eapilib import ConnectionError as EapiConnectionError
+from napalm.base.exceptions import ConnectionException
+from paramiko.ssh_exception import SSHException
+from nornir.core.task import Task, AggregatedResult
+from nornir.core.exceptions import NornirSubTaskError
+
+from cvppyez.tracing import get_tracer, TracingProcessor
+
+__all__ = ['AdaptiveScheduler', 'run_task', 'parse_group_caps']
+
+
+# the task failures that indicate the devices, or the network to them, are
+# overloaded; other failures, for example a failed command, are not a reason
+# to reduce the concurrency.
+
+CONGESTION_ERRORS = (
+    TimeoutError,
+    ConnectionError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    EapiConnectionError,
+    ConnectionException,
+    SSHException
+)
+
+
+def parse_group_caps(spec):
+    """
+    Parse the group concurrency caps from the string form, for example
+    "site-a=10,site-b=5,*=20", where "*" is the cap applied to every other
+    group.
+
+    Returns
+    -------
+    dict - group name to cap
+    """
+    caps = dict()
+    for item in filter(None, map(str.strip, (spec or '').split(','))):
+        name, _, cap = item.partition('=')
+        if not cap.isdigit() or not int(cap):
+            raise RuntimeError(f'Invalid group cap: "{item}"', spec)
+        caps[name.strip()] = int(cap)
+
+    return caps
+
+
+def is_congestion_failure(multi_result):
+    """ True if any of the task results failed with a congestion error """
+
+    def congested(exc):
+        while exc is not None:
+            if isinstance(exc, CONGESTION_ERRORS):
+                return True
+            if isinstance(exc, NornirSubTaskError):
+                return is_congestion_failure(exc.result)
+            exc = exc.__cause__ or exc.__context__
+        return False
+
+    return any(congested(result.exception) for result in multi_result if result.failed)
+
+
+class AdaptiveScheduler(object):
+    """
+    This class is used to run a Nornir task over the inventory hosts, in the
+    place of Nornir.run(), with a concurrency limit that adapts to the health
+    of the task executions rather than a fixed number of workers.
+
+    The limit is managed using additive-increase, multiplicative-decrease
+    (AIMD): starting from `min_workers`, the limit doubles each round of
+    successful tasks until the first sign of congestion, and thereafter grows
+    by one per round.  The limit is halved when a task fails with a timeout or
+    connection error.  Only one decrease is made for the tasks launched under
+    the same limit.
+
+    The task latency is not used as a congestion signal: the devices of a
+    fleet can have very different latencies, for example across sites, and a
+    fleet-wide baseline would throttle the fleet to the latency of the
+    nearest devices.
+
+    In addition each inventory group can be capped to a maximum number of
+    concurrent tasks, for example to limit the load on the WAN link to a site.
+    The groups are those created by the CVPInventory `groupby_tags` option.
+
+    Parameters
+    ----------
+    max_workers : int - the upper bound of the concurrency limit
+    min_workers : int - the lower bound, and starting value, of the limit
+    group_caps : dict - group name to cap; the "*" key applies to every group
+    """
+    DEFAULT_MAX_WORKERS = 100
+    DEFAULT_MIN_WORKERS = 4
+
+    BACKOFF_ERROR = 0.5
+
+    def __init__(self, max_workers=None, min_workers=None, group_caps=None):
+        self.max_workers = max_workers or self.DEFAULT_MAX_WORKERS
+        self.min_workers = min(min_workers or self.DEFAULT_MIN_WORKERS, self.max_workers)
+        self.group_caps = dict(group_caps or {})
+
+        self._cond = threading.Condition()
+        self._reset()
+
+    @classmethod
+    def from_env(cls, max_workers=None):
+        """
+        Create the scheduler using the environment variables CVP_MIN_WORKERS
+        and CVP_GROUP_CAPS (see parse_group_caps).
+        """
+        return cls(max_workers=max_workers,
+                   min_workers=int(os.getenv('CVP_MIN_WORKERS', 0)) or None,
+                   group_caps=parse_group_caps(os.getenv('CVP_GROUP_CAPS')))
+
+    def _reset(self):
+        self.limit = float(self.min_workers)
+        self.ssthresh = float(self.max_workers)
+        self.epoch = 0
+        self.in_flight = 0
+        self.group_in_flight = dict()
+
+        # statistics reported after the run
+        self.peak = 0
+        self.n_backoffs = 0
+
+    # -------------------------------------------------------------------------
+    # concurrency limit
+    # -------------------------------------------------------------------------
+
+    def _group_cap(self, group_name):
+        return self.group_caps.get(group_name, self.group_caps.get('*'))
+
+    def _capped_groups(self, host):
+        return tuple(sorted(
+            group_name for group_name in host.groups
+            if self._group_cap(group_name)
+        ))
+
+    def _has_capacity(self, groups):
+        return all(self.group_in_flight.get(name, 0) < self._group_cap(name)
+                   for name in groups)
+
+    def _backoff(self, epoch, factor):
+        # only the first of the tasks launched under the same limit reduces
+        # the limit, so a burst of failures results in one decrease.
+
+        if epoch != self.epoch:
+            return
+
+        self.epoch += 1
+        self.n_backoffs += 1
+        self.limit = max(self.min_workers, self.limit * factor)
+        self.ssthresh = self.limit
+
+    def _increase(self):
+        if self.limit < self.ssthresh:
+            self.limit += 1
+        else:
+            self.limit += 1 / self.limit
+
+        self.limit = min(self.limit, self.max_workers)
+
+    def _task_done(self, groups, epoch, multi_result):
+        with self._cond:
+            self.in_flight -= 1
+            for name in groups:
+                self.group_in_flight[name] -= 1
+
+            if multi_result is None or is_congestion_failure(multi_result):
+                self._backoff(epoch, self.BACKOFF_ERROR)
+
+            elif not multi_result.failed:
+                self._increase()
+
+            self._cond.notify_all()
+
+    # -------------------------------------------------------------------------
+    # task execution
+    # -------------------------------------------------------------------------
+
+    def _next_host(self, queues):
+        if self.in_flight >= int(self.limit):
+            return None
+
+        for groups, queue in queues.items():
+            if self._has_capacity(groups):
+                host = queue.popleft()
+                if not queue:
+                    del queues[groups]
+                return groups, host
+
+        return None
+
+    def _start(self, task, host, nr, groups, epoch):
+        multi_result = None
+        try:
+            multi_result = task.copy().start(host, nr)
+        finally:
+            self._task_done(groups, epoch, multi_result)
+
+        return multi_result
+
+    def _run_hosts(self, task, hosts, nr, name):
+        # the hosts are queued by the capped groups they belong to so that the
+        # next host that can be started is found without scanning all hosts.
+
+        queues = OrderedDict()
+        for host in hosts:
+            queues.setdefault(self._capped_groups(host), deque()).append(host)
+
+        agg_result = AggregatedResult(name)
+        futures = list()
+
+        with ThreadPoolExecutor(self.max_workers) as pool:
+            while queues:
+                with self._cond:
+                    groups, host = self._cond.wait_for(lambda: self._next_host(queues))
+                    self.in_flight += 1
+                    self.peak = max(self.peak, self.in_flight)
+                    for group_name in groups:
+                        self.group_in_flight[group_name] = self.group_in_flight.get(group_name, 0) + 1
+
+                    futures.append(pool.submit(self._start, task, host, nr, groups, self.epoch))
+
+        for future in futures:
+            worker_result = future.result()
+            agg_result[worker_result.host.name] = worker_result
+
+        return agg_result
+
+    def run(self, nr, task, raise_on_error=None, on_good=True, on_failed=False, **kwargs):
+        """
+        Run the task over all the hosts in the Nornir inventory; the
+        parameters and the return value are the same as Nornir.run().
+        """
+        task = Task(task, **kwargs)
+        nr.processors.task_started(task)
+
+        run_on = [
+            host for name, host in nr.inventory.hosts.items()
+            if (on_good and name not in nr.data.failed_hosts)
+            or (on_failed and name in nr.data.failed_hosts)
+        ]
+
+        self._reset()
+        result = self._run_hosts(task, run_on, nr, name=kwargs.get('name') or task.name)
+
+        if raise_on_error if raise_on_error is not None else nr.config.core.raise_on_error:
+            result.raise_on_error()
+        else:
+            nr.data.failed_hosts.update(result.failed_hosts.keys())
+
+        nr.processors.task_completed(task, result)
+        return result
+
+
+def run_task(nr, task, **kwargs):
+    """
+    Run the Nornir task using the AdaptiveScheduler, with the Nornir
+    `num_workers` as the maximum concurrency and the CVP_GROUP_CAPS group
+    caps.  Set the environment variable CVP_SCHEDULER=fixed to use
+    Nornir.run() with the fixed `num_workers` instead; the group caps are
+    then not applied, and a warning is given if they are set.
+
+    Parameters
+    ----------
+    nr : Nornir
+    task : callable - the Nornir task function
+
+    Other Parameters
+    ----------------
+    As for Nornir.run()
+
+    Returns
+    -------
+    AggregatedResult
+    """
+    if get_tracer().enabled:
+        nr = nr.with_processors(list(nr.processors) + [TracingProcessor()])
+
+    if os.getenv('CVP_SCHEDULER', 'adaptive') == 'fixed':
+        if os.getenv('CVP_GROUP_CAPS'):
+            print('WARNING: CVP_GROUP_CAPS is not used by CVP_SCHEDULER=fixed')
+        return nr.run(task=task, **kwargs)
+
+    scheduler = AdaptiveScheduler.from_env(max_workers=nr.config.core.num_workers)
+    return scheduler.run(nr, task, **kwargs)
@@ -0,0 +1,258 @@
+"""
+The telemetry query planner.  The CVP analytics store has the device state
+streamed by each device, for example the MAC and ARP tables, so a show
+command can be answered by CVP rather than by the device.  The planner finds
+the commands that have a telemetry source and the devices that stream
+telemetry, and answers those from CVP; the other commands and devices are
+left to the eAPI device sweep.
+"""
+
+import re
+import asyncio
+from collections import namedtuple
+
+from aiohttp import ClientResponseError
+
+from cvppyez import validators
+from cvppyez.rest import AsyncCVPRestClient
+from cvppyez.tracing import span
+
+__all__ = ['TelemetryPlanner', 'TelemetryQuery', 'TelemetryResult', 'query_telemetry']
+
+
+DEVICES_DATASET = '$a/DatasetInfo/Devices'
+DEVICE_DATASET = '$a/Devices/{serial}/versioned-data/{path}'
+
+
+TelemetrySource = namedtuple('TelemetrySource', ['path', 'convert'])
+
+# the telemetry source of a command, and the MAC or IP address the command
+# output is limited to, or None.
+
+TelemetryQuery = namedtuple('TelemetryQuery', ['source', 'address'])
+
+# outputs: dict of hostname to dict of command to output, for the devices
+# answered from telemetry; uncovered: set of the other hostnames.
+
+TelemetryResult = namedtuple('TelemetryResult', ['outputs', 'uncovered'])
+
+
+# -----------------------------------------------------------------------------
+#                           telemetry to eAPI output
+# -----------------------------------------------------------------------------
+
+# The telemetry entries are converted into the eAPI JSON output of the
+# command, with the fields that the telemetry source carries.
+
+def _value(field):
+    # the telemetry numeric keys are wrapped, e.g. {"value": 10}
+    return field['value'] if isinstance(field, dict) else field
+
+
+def _macaddr(macaddr):
+    return (validators.validate_macaddr(macaddr) or macaddr).lower()
+
+
+def mac_table_output(entries, macaddr=None):
+    """ Returns the "show mac address-table" output of the FDB `entries` """
+    return dict(unicastTable=dict(tableEntries=[
+        dict(vlanId=_value(entry['key']['fid']),
+             macAddress=_macaddr(entry['key']['addr']),
+             interface=entry['intf'],
+             entryType='dynamic' if 'Dynamic' in entry.get('entryType', '') else 'static')
+        for entry in entries
+        if not macaddr or _macaddr(entry['key']['addr']) == macaddr
+    ]), multicastTable=dict(tableEntries=[]))
+
+
+def arp_table_output(entries, ipaddr=None):
+    """ Returns the "show ip arp" output of the ARP `entries` """
+    neighbors = [
+        dict(address=entry['key']['addr'],
+             hwAddress=_macaddr(entry['ethAddr']),
+             interface=entry['key']['intfId'])
+        for entry in entries
+        if not ipaddr or entry['key']['addr'] == ipaddr
+    ]
+    return dict(ipV4Neighbors=neighbors, totalEntries=len(neighbors))
+
+
+LINK_STATUS = dict(intfOperUp='connected', intfOperDown='notconnect',
+                   intfOperNotPresent='notpresent')
+
+
+def interfaces_status_output(entries, address=None):
+    """ Returns the "show interfaces status" output of the interface status `entries` """
+    return dict(interfaceStatuses={
+        entry['intfId']: dict(linkStatus=LINK_STATUS.get(entry['operStatus'], 'unknown'))
+        for entry in entries
+    })
+
+
+# -----------------------------------------------------------------------------
+#                           telemetry planner
+# -----------------------------------------------------------------------------
+
+class TelemetryPlanner(object):
+    """
+    This class is used to answer the show commands from the CVP telemetry.
+    A command is covered when it matches one of the COMMANDS, with the JSON
+    encoding.  A device is covered when it is streaming telemetry, as found
+    from the CVP devices dataset, and each of the command sources is
+    available for the device; a device without one of the sources, for
+    example because of the EOS version, is not covered.
+
+    The devices dataset is fetched once for all of the devices, and then each
+    source is fetched once for each device, concurrently, however many of the
+    commands use the source.  The number of requests in-flight is capped by
+    the `cvp` client; the devices are not sent any request.
+
+    Parameters
+    ----------
+    cvp : AsyncCVPRestClient - the logged-in CVP client
+    """
+
+    SOURCES = dict(
+        mac=TelemetrySource('Smash/bridging/status/smashFdbStatus', mac_table_output),
+        arp=TelemetrySource('Smash/arp/status/arpEntry', arp_table_output),
+        interfaces=TelemetrySource('Sysdb/interface/status/eth/phy/slice/1/intfStatus',
+                                   interfaces_status_output)
+    )
+
+    # the command pattern, the source, and the address validator.
+
+    COMMANDS = [
+        (re.compile(r'show mac address-table(?: address (?P<address>\S+))?$', re.I), 'mac',
+         lambda address: validators.validate_macaddr(address) and _macaddr(address)),
+        (re.compile(r'show ip arp(?: (?P<address>\S+))?$', re.I), 'arp',
+         validators.validate_ipaddr),
+        (re.compile(r'show interfaces status$', re.I), 'interfaces', None)
+    ]
+
+    def __init__(self, cvp):
+        self.cvp = cvp
+
+    @classmethod
+    def query(cls, command, encoding='json'):
+        """ Returns the TelemetryQuery that answers the `command`, or None """
+        if encoding != 'json':
+            return None
+
+        command = ' '.join(command.split())
+
+        for pattern, source, validate in cls.COMMANDS:
+            match = pattern.match(command)
+            if not match:
+                continue
+
+            address = match.groupdict().get('address')
+            if address:
+                address = validate(address)
+                if not address:
+                    return None
+
+            return TelemetryQuery(source, address)
+
+        return None
+
+    @classmethod
+    def covers(cls, command, encoding='json'):
+        """ Returns True if the `command` can be answered from telemetry """
+        return cls.query(command, encoding) is not None
+
+    async def astreaming(self):
+        """ Returns the set of serial numbers of the devices streaming telemetry """
+        devices = await self.cvp.get_notifications(DEVICES_DATASET)
+        return {serial for serial, dev in devices.items() if dev.get('status') == 'active'}
+
+    async def aget_source(self, serial, source):
+        """ Returns the list of the current telemetry entries of the device source """
+        url = DEVICE_DATASET.format(serial=serial, path=self.SOURCES[source].path)
+        return list((await self.cvp.get_notifications(url)).values())
+
+    async def aquery_device(self, serial, queries):
+        """
+        Returns the dict of command to output for the device `serial`, for
+        each of the command `queries`; or None if one of the sources is not
+        available for the device.
+        """
+        sources = list({query.source for query in queries.values()})
+
+        with span('telemetry', serial=serial):
+            results = await asyncio.gather(*(
+                self.aget_source(serial, source) for source in sources
+            ), return_exceptions=True)
+
+        for result in results:
+            if isinstance(result, ClientResponseError):
+                return None
+            if isinstance(result, BaseException):
+                raise result
+
+        entries = dict(zip(sources, results))
+
+        return {
+            command: self.SOURCES[query.source].convert(entries[query.source], query.address)
+            for command, query in queries.items()
+        }
+
+    async def aexecute(self, hosts, commands):
+        """
+        Answer the `commands` on the `hosts` from telemetry.
+
+        Parameters
+        ----------
+        hosts : dict - hostname to nornir Host, with the 'serial' data
+        commands : list[str] - the commands, each covered by telemetry
+
+        Returns
+        -------
+        TelemetryResult
+        """
+        queries = {command: self.query(command) for command in commands}
+        uncovered = [command for command, query in queries.items() if not query]
+        if uncovered:
+            raise ValueError(f"Commands not covered by telemetry: {', '.join(uncovered)}")
+
+        streaming = await self.astreaming()
+        serials = {
+            hostname: host.data.get('serial')
+            for hostname, host in hosts.items()
+            if host.data.get('serial') in streaming
+        }
+
+        results = await asyncio.gather(*(
+            self.aquery_device(serial, queries) for serial in serials.values()
+        ))
+
+        outputs = {
+            hostname: h_outputs
+            for hostname, h_outputs in zip(serials, results)
+            if h_outputs is not None
+        }
+
+        return TelemetryResult(outputs=outputs, uncovered=set(hosts) - set(outputs))
+
+
+def query_telemetry(hosts, commands, max_inflight=None):
+    """
+    Answer the `commands` on the `hosts` from the CVP telemetry, see
+    TelemetryPlanner.  The uncovered hosts are to be searched by the device
+    sweep.
+
+    Parameters
+    ----------
+    hosts : dict - hostname to nornir Host, with the 'serial' data
+    commands : list[str] - the commands, each covered by telemetry
+    max_inflight : int - the maximum number of concurrent CVP requests
+
+    Returns
+    -------
+    TelemetryResult
+    """
+    async def run():
+        async with AsyncCVPRestClient(max_inflight=max_inflight) as cvp:
+            return await TelemetryPlanner(cvp).aexecute(hosts, commands)
+
+    with span('telemetry.query'):
+        return asyncio.run(run())
@@ -1,3 +1,3 @@
 
 from cvppyez.rest.client import CVPRestClient
-
+from cvppyez.rest.aioclient import AsyncCVPRestClient
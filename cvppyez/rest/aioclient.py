@@ -0,0 +1,285 @@
+import json
+import asyncio
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from cvppyez.rest.client import CvpClientURLs, CvpSession, CVPRestClient, in_login
+from cvppyez.rest.retry import RetryPolicy, breaker_for
+from cvppyez.rest.notifications import aiter_notifications, aiter_notification_records
+from cvppyez.tracing import get_tracer, span, aiohttp_trace_config
+
+__all__ = ['AsyncCVPRestClient']
+
+
+class AsyncCvpSession(object):
+    """
+    The asyncio counterpart to the CvpSession.  The same URL shortcuts, for
+    example "$a", are supported.  The number of requests in-flight at any one
+    time is capped by `max_inflight` so that a large number of concurrent
+    callers does not overwhelm the CVP server.  The failed requests are
+    retried, and the session logs in again when the CVP session has expired,
+    as the CvpSession; the sessions to the same server share the server
+    CircuitBreaker.
+    """
+    ENV = CvpSession.ENV
+    DEFAULT_MAX_INFLIGHT = 20
+
+    URLs = CvpClientURLs
+
+    UNAUTHORIZED_ERROR = CvpSession.UNAUTHORIZED_ERROR
+
+    _required_var = CvpSession._required_var
+
+    def __init__(self, server=None, username=None, password=None, max_inflight=None,
+                 retry=None, breaker=None):
+        self.host_url = "https://%s" % (self._required_var('server', server))
+        self._auth = dict(userId=self._required_var('username', username),
+                          password=self._required_var('password', password))
+        self.version = None
+        self.max_inflight = max_inflight or self.DEFAULT_MAX_INFLIGHT
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or breaker_for(self.host_url)
+        self.n_logins = 0
+        self._session = None
+        self._inflight = None
+        self._login_lock = None
+
+    async def open(self):
+        self._inflight = asyncio.Semaphore(self.max_inflight)
+        self._login_lock = asyncio.Lock()
+        self._session = aiohttp.ClientSession(
+            headers={'Content-Type': 'application/json'},
+            connector=aiohttp.TCPConnector(ssl=False, limit=self.max_inflight),
+
+            # the CVP server is commonly accessed by IP address, and the
+            # default cookie-jar will not store cookies for IP address hosts.
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+            trace_configs=[aiohttp_trace_config('cvp')] if get_tracer().enabled else None
+        )
+        return self
+
+    async def close(self):
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    async def login(self):
+        token = in_login.set(True)
+
+        try:
+            with span('cvp.login', host=urlsplit(self.host_url).hostname):
+                body = await self.post(self.URLs.LOGIN, json=self._auth, raise_for_status=False)
+                if 'errorCode' in body:
+                    raise RuntimeError(
+                        f'Unable to login to {self.host_url}: {body["errorMessage"]}. '
+                        'Check credentials or remote-access reachability.'
+                    )
+
+                body = await self.get(self.URLs.VERSION)
+                self.version = body['version']
+
+        finally:
+            in_login.reset(token)
+
+        self.n_logins += 1
+        return self
+
+    async def relogin(self, n_logins):
+        """ The asyncio form of CvpSession.relogin() """
+        async with self._login_lock:
+            if self.n_logins == n_logins:
+                await self.login()
+
+    async def request(self, method, url, raise_for_status=True, **kwargs):
+        """
+        Execute the API request and return the decoded JSON body.
+
+        Parameters
+        ----------
+        method : str - the HTTP method, e.g. "GET"
+        url : str - the API URL, optionally beginning with a shortcut key
+        raise_for_status : bool - when True raise on HTTP error status
+
+        Other Parameters
+        ----------------
+        Passed to the aiohttp request, for example `params` or `json`.
+
+        Returns
+        -------
+        The decoded JSON body.
+        """
+        relogin = url != self.URLs.LOGIN and not in_login.get()
+
+        while True:
+            n_logins = self.n_logins
+
+            async with self._request(method, url, relogin=relogin, **kwargs) as res:
+                if raise_for_status:
+                    res.raise_for_status()
+
+                body = await res.json(content_type=None)
+
+            # the /web APIs return the expired session error in the body.
+
+            if not (relogin and isinstance(body, dict)
+                    and body.get('errorCode') == self.UNAUTHORIZED_ERROR):
+                return body
+
+            relogin = False
+            await self.relogin(n_logins)
+
+    @asynccontextmanager
+    async def stream(self, method, url, **kwargs):
+        """
+        Async context manager that yields the API response so that the body
+        can be read incrementally from the response content.  The response is
+        counted as in-flight until the context exits.
+        """
+        async with self._request(method, url, **kwargs) as res:
+            res.raise_for_status()
+            yield res
+
+    @asynccontextmanager
+    async def _request(self, method, url, relogin=None, **kwargs):
+        """
+        Async context manager that yields the API response, once the failed
+        requests are retried and the expired session is logged in again; as
+        CvpSession.request().  The in-flight slot is not held during the
+        retry delays or the login.
+        """
+        if relogin is None:
+            relogin = url != self.URLs.LOGIN and not in_login.get()
+
+        attempt = 0
+
+        while True:
+            n_logins, expired = self.n_logins, False
+
+            async with self._inflight:
+                # allowed once the request is sent, so that a request
+                # cancelled while it waits for the slot is not the trial.
+
+                self.breaker.allow()
+
+                try:
+                    res = await self._session.request(
+                        method, self.URLs.expand(self.host_url, url), **kwargs
+                    )
+
+                except aiohttp.ClientSSLError:
+                    # a certificate error is not transient.
+                    self.breaker.failure()
+                    raise
+
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as exc:
+                    self.breaker.failure()
+                    connected = not isinstance(exc, aiohttp.ClientConnectorError)
+                    if not self.retry.retry_error(method, attempt, connected=connected):
+                        raise
+
+                except Exception:
+                    self.breaker.failure()
+                    raise
+
+                except BaseException:
+                    # for example, the request is cancelled
+                    self.breaker.cancel()
+                    raise
+
+                else:
+                    if res.status in self.retry.RETRY_STATUS:
+                        self.breaker.failure()
+                    else:
+                        self.breaker.success()
+
+                    expired = relogin and res.status == 401
+                    if not expired and not self.retry.retry_status(method, res.status, attempt):
+                        try:
+                            yield res
+                        finally:
+                            res.release()
+                        return
+
+                    res.release()
+
+            if expired:
+                relogin = False
+                await self.relogin(n_logins)
+                continue
+
+            await asyncio.sleep(self.retry.delay(attempt))
+            attempt += 1
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    @property
+    def about(self):
+        return dict(version=self.version,
+                    username=self._auth['userId'],
+                    host=self.host_url)
+
+
+class AsyncCVPRestClient(object):
+    """
+    The asyncio counterpart to the CVPRestClient.  The instance is used as an
+    async context manager so that the login is performed on entry and the
+    HTTP connections are released on exit, for example:
+
+        async with AsyncCVPRestClient() as cvp:
+            devices = await cvp.api.get('/inventory/devices')
+    """
+
+    def __init__(self, server=None, username=None, password=None, max_inflight=None):
+        self.api = AsyncCvpSession(server=server, username=username, password=password,
+                                   max_inflight=max_inflight)
+
+    extracto_notifications = staticmethod(CVPRestClient.extracto_notifications)
+
+    async def iter_notifications(self, url, extract='value', **kwargs):
+        """
+        The asyncio counterpart to CVPRestClient.iter_notifications.
+        """
+        async with self.api.stream('GET', url, **kwargs) as res:
+            async for item in aiter_notifications(res.content, extract=extract):
+                yield item
+
+    async def iter_notification_records(self, url, **kwargs):
+        """
+        Yields each of the dataset notifications from the API `url`, with the
+        notification timestamp, updates and deletes; see
+        aiter_notification_records.  The analytics API `start` and `end`
+        query parameters, in nanoseconds, select the notifications by time.
+        """
+        async with self.api.stream('GET', url, **kwargs) as res:
+            async for notification in aiter_notification_records(res.content):
+                yield notification
+
+    async def get_notifications(self, url, extract='value', **kwargs):
+        return {
+            item_id: item_value
+            async for item_id, item_value in self.iter_notifications(url, extract, **kwargs)
+        }
+
+    async def __aenter__(self):
+        await self.api.open()
+
+        try:
+            await self.api.login()
+
+        except Exception:
+            await self.api.close()
+            raise
+
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.api.close()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}: {json.dumps(self.api.about, indent=3)}"
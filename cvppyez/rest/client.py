@@ -1,8 +1,18 @@
 import os
 import json
+import time
 import requests
 import importlib
+import threading
+from contextvars import ContextVar
+from urllib.parse import urlsplit
 from first import first
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+
+from cvppyez.rest.notifications import iter_notifications
+from cvppyez.rest.retry import RetryPolicy, breaker_for
+from cvppyez.tracing import span, record
 
 __all__ = ['CVPRestClient']
 
@@ -20,8 +30,46 @@ class CvpClientURLs:
     INVENTORY = '/inventory/devices'
     VERSION = '/cvpInfo/getCvpInfo.do'
 
+    @classmethod
+    def expand(cls, host_url, url):
+        """
+        Return the complete URL for the given `url` value.  If the `url` begins
+        with a shortcut key, for example "$a", then the associated API base URI
+        is used rather than the standard CVP /web value.
+
+        Parameters
+        ----------
+        host_url : str - the CVP server URL, e.g. "https://cvp"
+        url : str - the API URL, optionally beginning with a shortcut key
+
+        Returns
+        -------
+        str
+        """
+        if url.startswith('$'):
+            key, _, url = url.partition('/')
+            api_base = cls.SHORTCUTS[key]
+            url = "/" + url
+        else:
+            api_base = cls.SHORTCUTS[None]
+
+        return f'{host_url}{api_base}{url}'
+
+
+# True while the session login requests are sent, so that a failed login
+# request does not start another login.
+
+in_login = ContextVar('cvp_in_login', default=False)
+
 
 class CvpSession(requests.Session):
+    """
+    The CVP API session.  The session connection pool is sized for the Nornir
+    task threads that share the session, `pool_size` or $CVP_POOL_SIZE.  The
+    failed requests are retried, see RetryPolicy, and the session logs in
+    again when the CVP session has expired.  The requests to a server that
+    keeps failing are stopped by the server CircuitBreaker.
+    """
     ENV = {
         'username': ['CVP_USER', 'USER'],
         'password': ['CVP_PASSWORD', 'PASSWORD'],
@@ -30,7 +78,15 @@ class CvpSession(requests.Session):
 
     URLs = CvpClientURLs
 
-    def __init__(self, server=None, username=None, password=None, quiet=True, login=True):
+    DEFAULT_POOL_SIZE = 100
+
+    # the CVP error code of an expired session, returned by the /web APIs in
+    # place of the 401 status.
+
+    UNAUTHORIZED_ERROR = '112498'
+
+    def __init__(self, server=None, username=None, password=None, quiet=True, login=True,
+                 pool_size=None, retry=None, breaker=None):
 
         super(CvpSession, self).__init__()
         self.host_url = "https://%s" % (self._required_var('server', server))
@@ -39,6 +95,14 @@ class CvpSession(requests.Session):
         self.headers['Content-Type'] = 'application/json'
         self.verify = False
         self.version = None
+        self.hooks['response'].append(self._trace_response)
+
+        self.pool_size = pool_size or int(os.getenv('CVP_POOL_SIZE', self.DEFAULT_POOL_SIZE))
+        self.mount('https://', HTTPAdapter(pool_maxsize=self.pool_size))
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or breaker_for(self.host_url)
+        self.n_logins = 0
+        self._login_lock = threading.Lock()
 
         if quiet:
             self.quiet()
@@ -58,19 +122,124 @@ class CvpSession(requests.Session):
         return self
 
     def login(self):
-        res = self.post(self.URLs.LOGIN, json=self._auth)
-        body = res.json()
-        if 'errorCode' in body:
-            raise RuntimeError(
-                f'Unable to login to {self.host_url}: {body["errorMessage"]}. '
-                'Check credentials or remote-access reachability.'
-            )
-
-        res = self.get(self.URLs.VERSION)
-        res.raise_for_status()
-        self.version = res.json()['version']
+        token = in_login.set(True)
+
+        try:
+            with span('cvp.login', host=urlsplit(self.host_url).hostname):
+                res = self.post(self.URLs.LOGIN, json=self._auth)
+                body = res.json()
+                if 'errorCode' in body:
+                    raise RuntimeError(
+                        f'Unable to login to {self.host_url}: {body["errorMessage"]}. '
+                        'Check credentials or remote-access reachability.'
+                    )
+
+                res = self.get(self.URLs.VERSION)
+                res.raise_for_status()
+                self.version = res.json()['version']
+
+        finally:
+            in_login.reset(token)
+
+        self.n_logins += 1
         return self
 
+    def relogin(self, n_logins):
+        """
+        Login again, unless another thread has logged in since the failed
+        request was sent; `n_logins` is the login count when it was sent.
+        """
+        with self._login_lock:
+            if self.n_logins == n_logins:
+                self.login()
+
+    def request(self, method, url, *args, **kwargs):
+        """
+        This method overrides to retry the failed requests, as decided by the
+        RetryPolicy, and to login again, once, when the session has expired.
+        The login requests do not start another login.
+        """
+        relogin = url != self.URLs.LOGIN and not in_login.get()
+        attempt = 0
+
+        while True:
+            n_logins = self.n_logins
+            self.breaker.allow()
+
+            try:
+                res = super(CvpSession, self).request(method, url, *args, **kwargs)
+
+            except requests.exceptions.SSLError:
+                # a certificate error is not transient.
+                self.breaker.failure()
+                raise
+
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as exc:
+                self.breaker.failure()
+                if not self.retry.retry_error(method, attempt, connected=self._connected(exc)):
+                    raise
+
+            except Exception:
+                self.breaker.failure()
+                raise
+
+            except BaseException:
+                self.breaker.cancel()
+                raise
+
+            else:
+                if res.status_code in self.retry.RETRY_STATUS:
+                    self.breaker.failure()
+                else:
+                    self.breaker.success()
+
+                if relogin and self._expired(res, stream=kwargs.get('stream')):
+                    relogin = False
+                    res.close()
+                    self.relogin(n_logins)
+                    continue
+
+                if not self.retry.retry_status(method, res.status_code, attempt):
+                    return res
+
+                res.close()
+
+            time.sleep(self.retry.delay(attempt))
+            attempt += 1
+
+    @staticmethod
+    def _connected(exc):
+        # True if the connection was made, so the request may have been sent.
+        reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+        return not isinstance(exc, requests.exceptions.ConnectTimeout) and \
+            not isinstance(reason, ConnectTimeoutError)
+
+    def _expired(self, res, stream=False):
+        if res.status_code == 401:
+            return True
+
+        # the error body is small, so a large body is not decoded here.
+
+        if stream or 'json' not in res.headers.get('Content-Type', '') or len(res.content) > 1024:
+            return False
+
+        try:
+            body = res.json()
+        except ValueError:
+            return False
+
+        return isinstance(body, dict) and body.get('errorCode') == self.UNAUTHORIZED_ERROR
+
+    @staticmethod
+    def _trace_response(res, *args, **kwargs):
+        # the elapsed time is from sending the request until the response
+        # headers are parsed; it does not include reading a streamed body.
+
+        url = urlsplit(res.url)
+        record('cvp.request', res.elapsed.total_seconds(), host=url.hostname,
+               ok=res.ok, method=res.request.method, path=url.path,
+               status=res.status_code)
+
     def prepare_request(self, request):
         """
         This method overrides to produce the compelte URL based on the CvpClient
@@ -81,16 +250,7 @@ class CvpSession(requests.Session):
         ----------
         request : Request instance
         """
-        if request.url.startswith('$'):
-            key, _, url = request.url.partition('/')
-            api_base = self.URLs.SHORTCUTS[key]
-            url = "/" + url
-        else:
-            api_base = self.URLs.SHORTCUTS[None]
-            url = request.url
-
-        request.url = f'{self.host_url}{api_base}{url}'
-
+        request.url = self.URLs.expand(self.host_url, request.url)
         return super(CvpSession, self).prepare_request(request)
 
     @property
@@ -102,9 +262,10 @@ class CvpSession(requests.Session):
 
 class CVPRestClient(object):
 
-    def __init__(self, server=None, username=None, password=None, quiet=True, login=True):
+    def __init__(self, server=None, username=None, password=None, quiet=True, login=True,
+                 pool_size=None):
         self.api = CvpSession(server=server, username=username, password=password,
-                              quiet=quiet, login=login)
+                              quiet=quiet, login=login, pool_size=pool_size)
 
     def add_plugin(self, name):
         """
@@ -160,5 +321,39 @@ class CVPRestClient(object):
 
         return items
 
+    def iter_notifications(self, url, extract='value', **kwargs):
+        """
+        This method streams the dataset notifications from the API `url` and
+        yields each notification item as a (key, value) tuple as it is
+        received, rather than first decoding the complete payload.
+
+        Parameters
+        ----------
+        url : str
+            The API URL, for example "$a/DatasetInfo/Devices"
+
+        extract : str ['value', 'key']
+            Deteremins which part of the item payload is yielded
+
+        Other Parameters
+        ----------------
+        Passed to the requests GET, for example `params`.
+
+        Yields
+        ------
+        tuple - item key, item extract value
+        """
+        with self.api.get(url, stream=True, **kwargs) as res:
+            res.raise_for_status()
+            res.raw.decode_content = True
+            yield from iter_notifications(res.raw, extract=extract)
+
+    def get_notifications(self, url, extract='value', **kwargs):
+        """
+        Returns the streamed dataset notifications from the API `url` as a
+        key-value dictionary, see `iter_notifications`.
+        """
+        return dict(self.iter_notifications(url, extract=extract, **kwargs))
+
     def __repr__(self):
         return f"{self.__class__.__name__}: {json.dumps(self.api.about, indent=3)}"
@@ -1,6 +1,3 @@
-from first import first
-
-
 class PluginDevices(object):
     name = 'devices'
 
@@ -11,13 +8,4 @@ class PluginDevices(object):
         self.cvp = cvp
 
     def get_active_devices(self):
-        got = self.cvp.get(self.URLs.ACTIVE_DEVICES)
-        got.raise_for_status()
-        body = got.json()['notifications']
-        res = dict()
-        for item in body:
-            upd = item['updates']
-            sn_key = first(upd)
-            res[sn_key] = upd[sn_key]['value']
-
-        return res
+        return self.cvp.get_notifications(self.URLs.ACTIVE_DEVICES)
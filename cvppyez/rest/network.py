@@ -1,4 +1,5 @@
 from operator import itemgetter
+from collections import defaultdict
 
 
 NODE_USER_TAGS = ('datacenter', 'pod', 'rack')
@@ -11,22 +12,23 @@ def is_tagged(data):
 
 
 def get_topology_edges(cvp):
-    res = cvp.get('$n/topology/edges')
-    edges = cvp.extracto_notifications(res.json(), extract='key')
+    """
+    Returns the dict of each topology edge endpoint, "<node>:<interface>", to
+    the sorted list of its peer endpoints; an endpoint can have more than one
+    peer, for example on a shared segment.  See TopologyGraph for the graph
+    queries.
+    """
+    edge_map = defaultdict(set)
+    for _, edge in cvp.iter_notifications('$n/topology/edges', extract='key'):
+        edge_map[edge['from']].add(edge['to'])
+        edge_map[edge['to']].add(edge['from'])
 
-    edge_map = dict()
-    for edge in edges.values():
-        edge_map[edge['from']] = edge['to']
-        edge_map[edge['to']] = edge['from']
-
-    return edge_map
+    return {endpoint: sorted(peers) for endpoint, peers in edge_map.items()}
 
 
 def get_topology_nodes(cvp):
-    res = cvp.get('$n/topology/nodes')
-    return cvp.extracto_notifications(res.json())
+    return cvp.get_notifications('$n/topology/nodes')
 
 
 def get_topology_node_tags(cvp):
-    res = cvp.get('$n/topology/tags/nodes')
-    return cvp.extracto_notifications(res.json())
+    return cvp.get_notifications('$n/topology/tags/nodes')
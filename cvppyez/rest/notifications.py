@@ -0,0 +1,58 @@
+import ijson
+
+__all__ = ['iter_notifications', 'aiter_notifications', 'aiter_notification_records']
+
+# the JSON path of each notification item "updates" dictionary in the
+# analytics API payload.
+
+NOTIFICATION_UPDATES = 'notifications.item.updates'
+
+# the JSON path of each notification, with the keys "timestamp" (nanoseconds),
+# "updates" and optionally "deletes" and "delete_all".
+
+NOTIFICATION_ITEM = 'notifications.item'
+
+
+def iter_notifications(fp, extract='value'):
+    """
+    This function incrementally parses the dataset notifications payload from
+    the file-like object `fp`, and yields each notification item as a
+    (key, value) tuple.  The complete payload is never decoded into memory,
+    and so the first items are available before the response is completely
+    received.
+
+    Parameters
+    ----------
+    fp : file-like object
+        The payload source, for example the raw HTTP response stream.
+
+    extract : str ['value', 'key']
+        Deteremins which part of the item payload is yielded
+
+    Yields
+    ------
+    tuple - item key, item extract value
+    """
+    for item_id, item_data in ijson.kvitems(fp, NOTIFICATION_UPDATES, use_float=True):
+        yield item_id, item_data[extract]
+
+
+async def aiter_notifications(fp, extract='value'):
+    """
+    The asyncio counterpart to `iter_notifications`; `fp` is an object with an
+    async read() method, for example the aiohttp response content.
+    """
+    items = ijson.kvitems_async(fp, NOTIFICATION_UPDATES, use_float=True)
+    async for item_id, item_data in items:
+        yield item_id, item_data[extract]
+
+
+async def aiter_notification_records(fp):
+    """
+    Incrementally parse the dataset notifications payload from `fp`, as
+    aiter_notifications, and yield each complete notification dict rather
+    than the update items; so that the notification timestamp and deletes are
+    available to the caller.
+    """
+    async for notification in ijson.items_async(fp, NOTIFICATION_ITEM, use_float=True):
+        yield notification
@@ -0,0 +1,151 @@
+"""
+The retry policy and circuit breaker shared by the CvpSession and the
+AsyncCvpSession.  The requests that fail with a connection error or a
+transient server error are retried after a backoff delay with jitter, and
+the circuit breaker fails the requests at once while the CVP server is
+failing, rather than adding to its load.
+"""
+
+import os
+import time
+import random
+import threading
+
+__all__ = ['RetryPolicy', 'CircuitBreaker', 'CircuitOpenError', 'breaker_for']
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class RetryPolicy(object):
+    """
+    This class is used to decide which failed requests are retried, and the
+    delay before each retry: the "full jitter" exponential backoff, a random
+    delay between 0 and min(`max_delay`, `base_delay` * 2 ** attempt).
+
+    Only the idempotent methods are retried after a server error, or after a
+    connection error once the request may have been sent; a POST, for
+    example, is retried only if the connection could not be made.
+
+    Parameters
+    ----------
+    retries : int - the maximum number of retries of a request
+    base_delay : float - the backoff delay of the first retry, seconds
+    max_delay : float - the upper bound of the backoff delay, seconds
+    """
+    DEFAULT_RETRIES = 3
+    DEFAULT_BASE_DELAY = 0.5
+    DEFAULT_MAX_DELAY = 10.0
+
+    RETRY_STATUS = frozenset({500, 502, 503, 504})
+    RETRY_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+    def __init__(self, retries=None, base_delay=None, max_delay=None):
+        self.retries = int(os.getenv('CVP_RETRIES', self.DEFAULT_RETRIES)) \
+            if retries is None else retries
+        self.base_delay = self.DEFAULT_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = self.DEFAULT_MAX_DELAY if max_delay is None else max_delay
+
+    def delay(self, attempt):
+        """ Returns the backoff delay, in seconds, before the retry `attempt` (0-based) """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def retry_status(self, method, status, attempt):
+        """ True if the request that returned the HTTP `status` is retried """
+        return (attempt < self.retries and status in self.RETRY_STATUS
+                and method.upper() in self.RETRY_METHODS)
+
+    def retry_error(self, method, attempt, connected=True):
+        """ True if the request that failed with a connection error is retried """
+        return attempt < self.retries and (not connected or method.upper() in self.RETRY_METHODS)
+
+
+class CircuitBreaker(object):
+    """
+    This class is used to stop sending requests to a failing server.  After
+    `threshold` consecutive failures the circuit is open, and the requests
+    fail at once with CircuitOpenError.  After `reset_timeout` seconds one
+    trial request is allowed; the circuit is closed if it succeeds, and open
+    again if it fails.  Every request that is allowed must end with one of
+    success(), failure() or cancel(), else the trial is never over.
+
+    The breaker is thread-safe, so that it can be shared by the Nornir task
+    threads and by the asyncio sessions to the same server, see breaker_for().
+
+    Parameters
+    ----------
+    threshold : int - the consecutive failures that open the circuit
+    reset_timeout : float - the seconds before a trial request
+    """
+    DEFAULT_THRESHOLD = 5
+    DEFAULT_RESET_TIMEOUT = 30.0
+
+    def __init__(self, threshold=None, reset_timeout=None, name=None):
+        self.threshold = threshold or self.DEFAULT_THRESHOLD
+        self.reset_timeout = self.DEFAULT_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+        self.name = name
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        """
+        Called before each request; raises CircuitOpenError if the request is
+        not allowed.
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return
+
+            if self._trial or time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError(
+                    f'{self.name or "server"}: circuit open after {self.failures} '
+                    'consecutive failures'
+                )
+
+            self._trial = True
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+    def cancel(self):
+        """
+        Called when an allowed request ends without a server outcome, for
+        example when it is cancelled; another trial request is then allowed.
+        """
+        with self._lock:
+            self._trial = False
+
+
+_breakers = dict()
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(host_url):
+    """
+    Returns the CircuitBreaker of the server `host_url`, shared by all of the
+    sessions to the server in this process.
+    """
+    with _breakers_lock:
+        if host_url not in _breakers:
+            _breakers[host_url] = CircuitBreaker(
+                threshold=int(os.getenv('CVP_BREAKER_THRESHOLD', 0)) or None,
+                name=host_url
+            )
+        return _breakers[host_url]
@@ -0,0 +1,433 @@
+"""
+A stub CVP server, used to exercise the inventory and telemetry code without
+a CVP deployment.  The server has N synthetic devices, each with a serial
+number, a "pod" and a "rack" label, leaf-spine topology links, and the
+MAC, ARP and interface status telemetry of one end-host each.  Every
+response is served after an optional simulated latency.  The devices can be
+added, changed and removed, and the topology links changed; each change is
+served as a timestamped dataset notification.
+
+    python -m cvppyez.rest.stub --port 8443 --devices 1000 --latency 0.05
+"""
+
+import ssl
+import json
+import random
+import asyncio
+import argparse
+
+from aiohttp import web
+
+from cvppyez.rest.client import CvpClientURLs
+
+__all__ = ['CvpStub', 'synthetic_devices', 'synthetic_device', 'ssl_context']
+
+
+def synthetic_devices(n_devices, ip_address='127.0.0.1', rack_size=10, pod_size=100):
+    """
+    Returns the list of synthetic device records, dict with the keys fqdn,
+    serialNumber, ipAddress, modelName, version, status, pod and rack.
+    """
+    return [
+        synthetic_device(index, ip_address, rack_size=rack_size, pod_size=pod_size)
+        for index in range(n_devices)
+    ]
+
+
+def synthetic_device(index, ip_address='127.0.0.1', rack_size=10, pod_size=100):
+    """ Returns the synthetic device record for the device `index` """
+    return dict(fqdn=f'sw{index:05d}.bench.local',
+                serialNumber=f'SN{index:08d}',
+                ipAddress=ip_address,
+                modelName='DCS-7050SX3-48YC8' if index % rack_size else 'DCS-7280CR3-32P4',
+                version='4.22.0F',
+                status='active',
+                pod=f'pod{index // pod_size}',
+                rack=f'rack{index // rack_size}')
+
+
+BASE_TIMESTAMP = 1600000000000000000
+
+
+def _notifications(updates, timestamp=BASE_TIMESTAMP):
+    """ Returns the analytics dataset payload for the dict of `updates` """
+    return dict(notifications=[dict(
+        timestamp=timestamp,
+        path_elements=['stub'],
+        updates=updates
+    )])
+
+
+class CvpStub(object):
+    """
+    The stub CVP server.
+
+    Parameters
+    ----------
+    n_devices : int - the number of synthetic devices
+    latency : float - the simulated response latency, in seconds
+    jitter : float - a random latency added to each response, in seconds
+    ip_address : str - the management IP address of every device, so that
+                       the eAPI requests are sent to the stub eAPI server
+
+    Attributes
+    ----------
+    n_requests : int - the number of requests served
+    timestamp : int - the timestamp of the latest change, nanoseconds
+    faults : list[int] - the HTTP error status served, in order, in place of
+                         the next API responses
+    session_expired : bool - when True the API requests are refused with the
+                             401 status until the next login
+    no_telemetry : set[str] - the serial numbers of the devices whose
+                              telemetry is not available
+    """
+    TAG_TYPES = ('pod', 'rack')
+    DEVICES_DATASET = '$a/DatasetInfo/Devices'
+    TOPOLOGY_EDGES = '$n/topology/edges'
+    NET_ELEMENT = '$c/provisioning/getNetElementById.do'
+    DEVICE_TELEMETRY = '$a/Devices/{serial}/versioned-data/{path:.+}'
+
+    def __init__(self, n_devices=100, latency=0.0, jitter=0.0, ip_address='127.0.0.1'):
+        self.devices = synthetic_devices(n_devices, ip_address=ip_address)
+        self.ip_address = ip_address
+        self.latency = latency
+        self.jitter = jitter
+        self.n_requests = 0
+        self.timestamp = BASE_TIMESTAMP
+        self.faults = list()
+        self.session_expired = False
+        self.no_telemetry = set()
+        self._changes = {self.DEVICES_DATASET: list(), self.TOPOLOGY_EDGES: list()}
+        self._edge_changes = dict()
+        self._runner = None
+        self._payloads = dict()
+        self._encode_payloads()
+
+        self._labels = {tag_type: dict() for tag_type in self.TAG_TYPES}
+        for dev in self.devices:
+            for tag_type in self.TAG_TYPES:
+                self._labels[tag_type].setdefault(f'{tag_type}:{dev[tag_type]}', []).append(
+                    dev['fqdn'])
+
+    def _encode_payloads(self):
+        # the large payloads only change with the devices, so they are encoded
+        # once rather than for each request; the stub should not be the
+        # bottleneck.
+
+        payloads = {
+            CvpClientURLs.INVENTORY: self._inventory(),
+            self.DEVICES_DATASET: self._dataset_devices(),
+            '$n/topology/nodes': self._topology_nodes(),
+            '$n/topology/tags/nodes': self._topology_tags(),
+            self.TOPOLOGY_EDGES: self._topology_edges()
+        }
+        self._payloads.update({url: json.dumps(body).encode()
+                               for url, body in payloads.items()})
+
+    # -------------------------------------------------------------------------
+    # device changes
+    # -------------------------------------------------------------------------
+
+    def _change(self, updates=None, deletes=None, dataset=DEVICES_DATASET):
+        self.timestamp += 1000000
+        change = dict(timestamp=self.timestamp, path_elements=['stub'], updates=updates or {})
+        if deletes:
+            change['deletes'] = {key: dict(key=key) for key in deletes}
+
+        self._changes[dataset].append(change)
+        self._encode_payloads()
+
+    def _device(self, serial):
+        return next(dev for dev in self.devices if dev['serialNumber'] == serial)
+
+    def add_devices(self, n_devices):
+        """ Add `n_devices` new synthetic devices, returns their records """
+        first_index = max((int(dev['serialNumber'][2:]) for dev in self.devices), default=-1) + 1
+        added = [synthetic_device(index, self.ip_address)
+                 for index in range(first_index, first_index + n_devices)]
+        self.devices.extend(added)
+        self._change(updates={dev['serialNumber']: self._dataset_item(dev) for dev in added})
+        return added
+
+    def set_status(self, serial, status):
+        """ Set the status, 'active' or 'inactive', of the device `serial` """
+        dev = self._device(serial)
+        dev['status'] = status
+        self._change(updates={serial: self._dataset_item(dev)})
+
+    def remove_device(self, serial):
+        """ Remove the device `serial` from CVP """
+        self.devices.remove(self._device(serial))
+        self._change(deletes=[serial])
+
+    def set_edge(self, from_endpoint, to_endpoint=None):
+        """
+        Link the topology endpoint `from_endpoint`, "<serial>:<interface>", to
+        `to_endpoint`; or remove the link of the endpoint when None.
+        """
+        self._edge_changes[from_endpoint] = to_endpoint
+
+        if to_endpoint:
+            edge = {'from': from_endpoint, 'to': to_endpoint}
+            self._change(updates={from_endpoint: dict(key=edge, value=True)},
+                         dataset=self.TOPOLOGY_EDGES)
+        else:
+            self._change(deletes=[from_endpoint], dataset=self.TOPOLOGY_EDGES)
+
+    # -------------------------------------------------------------------------
+    # payloads
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _inventory_item(dev):
+        return dict(fqdn=dev['fqdn'], hostname=dev['fqdn'].split('.')[0],
+                    serialNumber=dev['serialNumber'], ipAddress=dev['ipAddress'],
+                    modelName=dev['modelName'], version=dev['version'],
+                    status='Registered', parentContainerKey='container_stub')
+
+    def _inventory(self):
+        return [self._inventory_item(dev) for dev in self.devices]
+
+    @staticmethod
+    def _dataset_item(dev):
+        return dict(key=dev['serialNumber'], value=dict(
+            hostname=dev['fqdn'], status=dev['status'], modelName=dev['modelName'],
+            eosVersion=dev['version'], deviceType='EOS'
+        ))
+
+    def _dataset_devices(self):
+        return _notifications({
+            dev['serialNumber']: self._dataset_item(dev)
+            for dev in self.devices
+        }, timestamp=self.timestamp)
+
+    def _topology_nodes(self):
+        return _notifications({
+            dev['serialNumber']: dict(key=dev['serialNumber'], value=dict(
+                hostname=dev['fqdn'], pod=dev['pod'], rack=dev['rack'],
+                userTags=dict(datacenter='bench', pod=dev['pod'], rack=dev['rack'])
+            ))
+            for dev in self.devices
+        })
+
+    def _topology_tags(self):
+        return _notifications({
+            dev['serialNumber']: dict(key=dev['serialNumber'], value=dict(
+                pod=dev['pod'], rack=dev['rack']
+            ))
+            for dev in self.devices
+        })
+
+    def _topology_edges(self):
+        # the first device of each rack is the spine of the rack, each of the
+        # other rack devices has an uplink to it.
+
+        updates = dict()
+        spine = None
+        for dev in self.devices:
+            if spine is None or dev['rack'] != spine['rack']:
+                spine = dev
+                continue
+
+            edge = {'from': f"{dev['serialNumber']}:Ethernet49",
+                    'to': f"{spine['serialNumber']}:Ethernet{len(updates) % 48 + 1}"}
+            updates[edge['from']] = dict(key=edge, value=True)
+
+        # the links changed by set_edge().
+
+        for from_endpoint, to_endpoint in self._edge_changes.items():
+            if to_endpoint:
+                edge = {'from': from_endpoint, 'to': to_endpoint}
+                updates[from_endpoint] = dict(key=edge, value=True)
+            else:
+                updates.pop(from_endpoint, None)
+
+        return _notifications(updates, timestamp=self.timestamp)
+
+    @staticmethod
+    def _telemetry(dev, path):
+        # the device end-host is on Ethernet1, VLAN 10; the address octets are
+        # the device index.
+
+        index = int(dev['serialNumber'][2:])
+        octets = (index >> 8 & 0xff, index & 0xff)
+        macaddr = '00:1c:73:{:02x}:{:02x}:01'.format(*octets)
+        ipaddr = '10.{}.{}.1'.format(*octets)
+
+        if path == 'Smash/bridging/status/smashFdbStatus':
+            key = dict(fid=dict(value=10), addr=macaddr)
+            return {macaddr: dict(key=key, value=dict(key=key, intf='Ethernet1',
+                                                      entryType='learnedDynamicMac'))}
+
+        if path == 'Smash/arp/status/arpEntry':
+            key = dict(addr=ipaddr, intfId='Vlan10')
+            return {ipaddr: dict(key=key, value=dict(key=key, ethAddr=macaddr))}
+
+        if path == 'Sysdb/interface/status/eth/phy/slice/1/intfStatus':
+            return {
+                f'Ethernet{n}': dict(key=f'Ethernet{n}', value=dict(
+                    intfId=f'Ethernet{n}', operStatus='intfOperUp' if n == 1 else 'intfOperDown'
+                ))
+                for n in (1, 2)
+            }
+
+        return None
+
+    # -------------------------------------------------------------------------
+    # request handlers
+    # -------------------------------------------------------------------------
+
+    async def _delay(self):
+        self.n_requests += 1
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+
+    @web.middleware
+    async def fault_middleware(self, request, handler):
+        if request.path == CvpClientURLs.expand('', CvpClientURLs.LOGIN):
+            self.session_expired = False
+            return await handler(request)
+
+        if self.faults:
+            await self._delay()
+            return web.json_response(dict(errorMessage='stub fault'), status=self.faults.pop(0))
+
+        if self.session_expired:
+            await self._delay()
+            return web.json_response(dict(errorMessage='session expired'), status=401)
+
+        return await handler(request)
+
+    async def handle_login(self, request):
+        await self._delay()
+        body = await request.json()
+        res = web.json_response(dict(sessionId='stub', username=body.get('userId')))
+        res.set_cookie('session_id', 'stub')
+        return res
+
+    async def handle_version(self, request):
+        await self._delay()
+        return web.json_response(dict(version='2020.2.0'))
+
+    async def handle_labels(self, request):
+        await self._delay()
+        labels = self._labels.get(request.query.get('type'), {})
+        return web.json_response(dict(labels=[
+            dict(key=key, name=key.partition(':')[2], netElementCount=len(hostnames))
+            for key, hostnames in labels.items()
+        ]))
+
+    async def handle_applied_devices(self, request):
+        await self._delay()
+        label_id = request.query.get('labelId', '')
+        hostnames = self._labels.get(label_id.partition(':')[0], {}).get(label_id, [])
+        return web.json_response(dict(data=[dict(hostName=hostname) for hostname in hostnames],
+                                      total=len(hostnames)))
+
+    async def handle_net_element(self, request):
+        await self._delay()
+        serial = request.query.get('netElementId')
+        dev = next((dev for dev in self.devices if dev['serialNumber'] == serial), None)
+        if dev is None:
+            return web.json_response(dict(errorCode='132801',
+                                          errorMessage=f'Entity does not exist: {serial}'))
+
+        return web.json_response(self._inventory_item(dev))
+
+    async def handle_device_telemetry(self, request):
+        await self._delay()
+        serial = request.match_info['serial']
+        dev = next((dev for dev in self.devices if dev['serialNumber'] == serial), None)
+        updates = dev and serial not in self.no_telemetry and self._telemetry(
+            dev, request.match_info['path'])
+
+        if not updates:
+            raise web.HTTPNotFound()
+
+        return web.json_response(_notifications(updates))
+
+    def payload_handler(self, url):
+        async def handle_payload(request):
+            await self._delay()
+            return web.Response(body=self._payloads[url], content_type='application/json')
+
+        return handle_payload
+
+    def changes_handler(self, url):
+        # the "start" query selects the dataset changes since that time, as the
+        # analytics API; otherwise the current state of the dataset.
+
+        handle_payload = self.payload_handler(url)
+
+        async def handle_changes(request):
+            if 'start' not in request.query:
+                return await handle_payload(request)
+
+            await self._delay()
+            start = int(request.query['start'])
+            return web.json_response(dict(notifications=[
+                change for change in self._changes[url] if change['timestamp'] >= start
+            ]))
+
+        return handle_changes
+
+    def app(self):
+        def path(url):
+            return CvpClientURLs.expand('', url)
+
+        app = web.Application(middlewares=[self.fault_middleware])
+        app.router.add_post(path(CvpClientURLs.LOGIN), self.handle_login)
+        app.router.add_get(path(CvpClientURLs.VERSION), self.handle_version)
+        app.router.add_get(path('/label/getLabels.do'), self.handle_labels)
+        app.router.add_get(path('/label/getAppliedDevices.do'), self.handle_applied_devices)
+        app.router.add_get(path(self.NET_ELEMENT), self.handle_net_element)
+        app.router.add_get(path(self.DEVICE_TELEMETRY), self.handle_device_telemetry)
+        for url in self._payloads:
+            handler = self.changes_handler if url in self._changes else self.payload_handler
+            app.router.add_get(path(url), handler(url))
+
+        return app
+
+    async def start(self, host='127.0.0.1', port=8443, ssl_context=None):
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port, ssl_context=ssl_context).start()
+        return self
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def ssl_context(certfile, keyfile=None):
+    """ Returns the server SSLContext for the `certfile`, or None """
+    if not certfile:
+        return None
+
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(certfile, keyfile)
+    return context
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub CVP server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8443)
+    parser.add_argument('--devices', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--device-ip', default='127.0.0.1')
+    parser.add_argument('--certfile', help='serve HTTPS using this certificate')
+    parser.add_argument('--keyfile')
+    args = parser.parse_args()
+
+    stub = CvpStub(n_devices=args.devices, latency=args.latency, jitter=args.jitter,
+                   ip_address=args.device_ip)
+    web.run_app(stub.app(), host=args.host, port=args.port, access_log=None,
+                ssl_context=ssl_context(args.certfile, args.keyfile), print=None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,483 @@
+"""
+The topology graph of the CVP network topology datasets: the nodes, their
+"pod" and "rack" tags, and the links between the node interfaces.  The graph
+answers the neighbor, blast-radius, shortest-path and pod/rack grouping
+queries without decoding the datasets again, and is stored on local disk so
+that it can be reused by later program runs.
+"""
+
+import os
+import json
+import gzip
+import tempfile
+from array import array
+from pathlib import Path
+from itertools import accumulate
+from collections import defaultdict
+
+from cvppyez.rest.network import NODE_TAGS
+
+__all__ = ['TopologyGraph', 'split_endpoint']
+
+
+TOPOLOGY_NODES = '$n/topology/nodes'
+TOPOLOGY_NODE_TAGS = '$n/topology/tags/nodes'
+TOPOLOGY_EDGES = '$n/topology/edges'
+
+
+def split_endpoint(endpoint):
+    """
+    Returns the (node, interface) of the topology edge endpoint, for example
+    "JPE1234:Ethernet49"; the node ID may contain ":", the interface does not.
+    """
+    node, _, interface = endpoint.rpartition(':')
+    return node, interface
+
+
+class TopologyGraph(object):
+    """
+    This class is used to query the network topology.  Each node is given an
+    integer ID, and the links are stored in compressed sparse row (CSR)
+    arrays: the links of node N are the entries offsets[N] to offsets[N+1]
+    of the `adj` array, the peer node IDs, and the `adj_edge` array, the
+    edge IDs.  Each edge is stored in both directions.
+
+    Edges are added and removed incrementally, see add_edge(), remove_edge()
+    and apply(): the changes are kept in a small overlay consulted by the
+    queries, and are merged into the CSR arrays once the overlay is larger
+    than `compact_ratio` of the edges.
+
+    Nodes are given by their hostname or their node ID, the device serial
+    number; a node known only from an edge is named by its node ID.
+
+    Attributes
+    ----------
+    last_ts : int - the timestamp of the latest edge notification applied,
+                    in nanoseconds; None if not known.
+
+    Examples
+    --------
+        graph = TopologyGraph.from_cvp(cvp)
+        graph.neighbors('spine1')
+        graph.blast_radius(['spine1'], depth=2)
+        graph.shortest_path('leaf1', 'leaf7')
+        graph.save('topology.json.gz')
+    """
+    FORMAT_VERSION = 1
+    COMPACT_MIN = 1024
+
+    def __init__(self, compact_ratio=0.1):
+        self.compact_ratio = compact_ratio
+        self.last_ts = None
+
+        # nodes: the node ID, hostname and tags of each node.
+
+        self.node_ids = list()
+        self.hostnames = list()
+        self.tags = {tag: list() for tag in NODE_TAGS}
+        self._node_index = dict()
+        self._host_index = dict()
+        self._groups = dict()
+
+        # edges: the endpoints of each edge; a removed edge has src -1.
+
+        self._src = array('i')
+        self._dst = array('i')
+        self._ports = list()
+        self._edge_index = dict()
+
+        # the CSR arrays, and the overlay of the changes since they were built.
+
+        self.offsets = array('i', [0])
+        self.adj = array('i')
+        self.adj_edge = array('i')
+        self._added = defaultdict(list)
+        self._n_added = 0
+        self._removed = set()
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    @property
+    def n_edges(self):
+        return len(self._edge_index)
+
+    # -------------------------------------------------------------------------
+    # build
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def build(cls, nodes, node_tags, edges):
+        """
+        Returns the graph of the topology datasets.
+
+        Parameters
+        ----------
+        nodes : dict - the '$n/topology/nodes' items, node ID to value
+        node_tags : dict - the '$n/topology/tags/nodes' items, node ID to value
+        edges : iterable - the '$n/topology/edges' items, (item key, edge) with
+                           the edge "from" and "to" endpoints.
+        """
+        graph = cls()
+
+        for node_id, data in nodes.items():
+            tagged = node_tags.get(node_id) or {}
+            user_tags = data.get('userTags') or {}
+            graph.add_node(node_id, hostname=data.get('hostname'), **{
+                tag: tagged.get(tag) or data.get(tag) or user_tags.get(tag) for tag in NODE_TAGS
+            })
+
+        for key, edge in edges:
+            graph._insert_edge(graph._edge_key(key, edge['from'], edge['to']),
+                               edge['from'], edge['to'])
+
+        graph.compact()
+        return graph
+
+    @classmethod
+    def from_cvp(cls, cvp):
+        """ Returns the graph of the topology datasets, using the CVPRestClient `cvp` """
+        return cls.build(cvp.get_notifications(TOPOLOGY_NODES),
+                         cvp.get_notifications(TOPOLOGY_NODE_TAGS),
+                         cvp.iter_notifications(TOPOLOGY_EDGES, extract='key'))
+
+    @classmethod
+    async def afrom_cvp(cls, cvp):
+        """
+        The asyncio form of from_cvp(), using the AsyncCVPRestClient `cvp`.
+        The edge notifications are applied with their timestamps, so that the
+        graph can then be updated by aupdate().
+        """
+        graph = cls.build(await cvp.get_notifications(TOPOLOGY_NODES),
+                          await cvp.get_notifications(TOPOLOGY_NODE_TAGS), [])
+        await graph.aupdate(cvp)
+        return graph
+
+    async def aupdate(self, cvp):
+        """
+        Apply the edge notifications since the latest applied, using the
+        AsyncCVPRestClient `cvp`; all of the notifications if not known.
+
+        Returns
+        -------
+        int - the number of edges added or removed.
+        """
+        params = dict(start=self.last_ts + 1) if self.last_ts else dict()
+        notifications = [
+            notification async for notification in
+            cvp.iter_notification_records(TOPOLOGY_EDGES, params=params)
+        ]
+        return self.apply(sorted(notifications, key=lambda n: n['timestamp']))
+
+    def add_node(self, node_id, hostname=None, **tags):
+        """ Add the node, or update the node hostname and tags; returns the node integer ID """
+        node = self._node_index.get(node_id)
+
+        if node is None:
+            node = self._node_index[node_id] = len(self.node_ids)
+            self.node_ids.append(node_id)
+            self.hostnames.append(None)
+            for tag in NODE_TAGS:
+                self.tags[tag].append(None)
+
+        if hostname and hostname != self.hostnames[node]:
+            self._host_index.pop(self.hostnames[node], None)
+            self.hostnames[node] = hostname
+            self._host_index[hostname] = node
+            self._groups.clear()
+
+        for tag, value in tags.items():
+            if value:
+                self.tags[tag][node] = value
+                self._groups.pop(tag, None)
+
+        return node
+
+    def add_edge(self, from_endpoint, to_endpoint, key=None):
+        """
+        Add the edge between the two endpoints, "<node ID>:<interface>"; the
+        edge `key` identifies the edge for remove_edge(), by default the
+        endpoints.  Returns False if the edge already exists.
+        """
+        edge = self._insert_edge(self._edge_key(key, from_endpoint, to_endpoint),
+                                 from_endpoint, to_endpoint)
+        if edge is None:
+            return False
+
+        self._added[self._src[edge]].append((self._dst[edge], edge))
+        self._added[self._dst[edge]].append((self._src[edge], edge))
+        self._n_added += 1
+        self._maybe_compact()
+        return True
+
+    def _insert_edge(self, key, from_endpoint, to_endpoint):
+        # adds the edge, but not to the CSR arrays nor the overlay.
+        if key in self._edge_index:
+            return None
+
+        (src_id, src_if), (dst_id, dst_if) = map(split_endpoint, (from_endpoint, to_endpoint))
+        src, dst = self.add_node(src_id), self.add_node(dst_id)
+
+        edge = self._edge_index[key] = len(self._src)
+        self._src.append(src)
+        self._dst.append(dst)
+        self._ports.append((src_if, dst_if))
+        return edge
+
+    def remove_edge(self, key):
+        """ Remove the edge `key`, see add_edge(); returns False if not found """
+        edge = self._edge_index.pop(self._edge_key(key), None)
+        if edge is None:
+            return False
+
+        self._removed.add(edge)
+        self._maybe_compact()
+        return True
+
+    def apply(self, notifications):
+        """
+        Apply the '$n/topology/edges' dataset notifications, each with the
+        timestamp, updates and optional deletes; an update with a false value
+        removes the edge, an update of a known edge key with other endpoints
+        replaces the edge.
+
+        Returns
+        -------
+        int - the number of edges added or removed.
+        """
+        n_changes = 0
+
+        for notification in notifications:
+            if notification.get('delete_all'):
+                n_changes += sum(map(self.remove_edge, list(self._edge_index)))
+
+            # the deletes are either a list of keys, or a dict keyed by them.
+            for key in notification.get('deletes') or ():
+                n_changes += self.remove_edge(key)
+
+            for key, item in notification.get('updates', {}).items():
+                edge = item['key']
+                if item.get('value', True):
+                    endpoints = (edge['from'], edge['to'])
+                    current = self._edge_index.get(self._edge_key(key))
+                    if current is not None and self._endpoints(current) != endpoints:
+                        n_changes += self.remove_edge(key)
+                    n_changes += self.add_edge(edge['from'], edge['to'], key=key)
+                else:
+                    n_changes += self.remove_edge(key)
+
+            self.last_ts = max(self.last_ts or 0, notification['timestamp'])
+
+        return n_changes
+
+    def _endpoints(self, edge):
+        """ Returns the (from, to) endpoints of the edge integer ID """
+        src_if, dst_if = self._ports[edge]
+        return (f'{self.node_ids[self._src[edge]]}:{src_if}',
+                f'{self.node_ids[self._dst[edge]]}:{dst_if}')
+
+    @staticmethod
+    def _edge_key(key, from_endpoint=None, to_endpoint=None):
+        if key is None:
+            key = '|'.join(sorted((from_endpoint, to_endpoint)))
+        return key if isinstance(key, str) else json.dumps(key, sort_keys=True)
+
+    def _maybe_compact(self):
+        if self._n_added + len(self._removed) > max(self.COMPACT_MIN,
+                                                     self.compact_ratio * len(self._edge_index)):
+            self.compact()
+
+    def compact(self):
+        """ Rebuild the CSR arrays with the edge changes, see the class description """
+        n_nodes = len(self.node_ids)
+        for edge in self._removed:
+            self._src[edge] = -1
+
+        degree = [0] * (n_nodes + 1)
+        for src, dst in zip(self._src, self._dst):
+            if src >= 0:
+                degree[src + 1] += 1
+                degree[dst + 1] += 1
+
+        self.offsets = array('i', accumulate(degree))
+        self.adj = array('i', bytes(self.adj.itemsize * self.offsets[-1]))
+        self.adj_edge = array('i', self.adj)
+
+        fill = list(self.offsets[:-1])
+        for edge, (src, dst) in enumerate(zip(self._src, self._dst)):
+            if src < 0:
+                continue
+            for node, peer in ((src, dst), (dst, src)):
+                self.adj[fill[node]] = peer
+                self.adj_edge[fill[node]] = edge
+                fill[node] += 1
+
+        self._added = defaultdict(list)
+        self._n_added = 0
+        self._removed = set()
+
+    # -------------------------------------------------------------------------
+    # queries
+    # -------------------------------------------------------------------------
+
+    def node(self, name):
+        """ Returns the node integer ID of the hostname, or node ID, `name` """
+        node = self._host_index.get(name, self._node_index.get(name))
+        if node is None:
+            raise KeyError(name)
+        return node
+
+    def name(self, node):
+        """ Returns the hostname of the node integer ID, or its node ID if unknown """
+        return self.hostnames[node] or self.node_ids[node]
+
+    def _links(self, node):
+        """ Yields the (peer, edge) of each link of the node integer ID """
+        if node + 1 < len(self.offsets):
+            start, end = self.offsets[node], self.offsets[node + 1]
+            for peer, edge in zip(self.adj[start:end], self.adj_edge[start:end]):
+                if edge not in self._removed:
+                    yield peer, edge
+
+        for peer, edge in self._added.get(node, ()):
+            if edge not in self._removed:
+                yield peer, edge
+
+    def neighbors(self, name):
+        """ Returns the sorted list of the hostnames linked to the node `name` """
+        return sorted({self.name(peer) for peer, _ in self._links(self.node(name))})
+
+    def links(self, name):
+        """ Returns the sorted list of (interface, peer hostname, peer interface) of the node """
+        node = self.node(name)
+        links = list()
+
+        for peer, edge in self._links(node):
+            src_if, dst_if = self._ports[edge]
+            if self._src[edge] != node:
+                src_if, dst_if = dst_if, src_if
+            links.append((src_if, self.name(peer), dst_if))
+
+        return sorted(links)
+
+    def blast_radius(self, names, depth=1):
+        """
+        Returns the nodes within `depth` links of any of the nodes `names`,
+        for example the devices affected by the failure of the nodes.
+
+        Returns
+        -------
+        dict - hostname to the number of links from the nearest of the nodes;
+               the nodes `names` are not included.
+        """
+        hops = {self.node(name): 0 for name in names}
+        frontier = list(hops)
+
+        for hop in range(1, depth + 1):
+            next_frontier = list()
+            for node in frontier:
+                for peer, _ in self._links(node):
+                    if peer not in hops:
+                        hops[peer] = hop
+                        next_frontier.append(peer)
+            frontier = next_frontier
+
+        return {self.name(node): hop for node, hop in hops.items() if hop}
+
+    def shortest_path(self, from_name, to_name):
+        """
+        Returns the list of hostnames on a shortest path between the two nodes,
+        both included; None if the nodes are not connected.
+        """
+        src, dst = self.node(from_name), self.node(to_name)
+        parent = array('i', [-1]) * len(self.node_ids)
+        parent[src] = src
+        frontier = [src]
+
+        while frontier and parent[dst] < 0:
+            next_frontier = list()
+            for node in frontier:
+                for peer, _ in self._links(node):
+                    if parent[peer] < 0:
+                        parent[peer] = node
+                        next_frontier.append(peer)
+            frontier = next_frontier
+
+        if parent[dst] < 0:
+            return None
+
+        path = [dst]
+        while path[-1] != src:
+            path.append(parent[path[-1]])
+
+        return [self.name(node) for node in reversed(path)]
+
+    def groups(self, tag):
+        """ Returns the dict of tag value, e.g. each pod, to the sorted hostnames """
+        if tag not in self._groups:
+            groups = defaultdict(list)
+            for node, value in enumerate(self.tags[tag]):
+                if value:
+                    groups[value].append(self.name(node))
+            self._groups[tag] = {value: sorted(names) for value, names in groups.items()}
+
+        return self._groups[tag]
+
+    def group_of(self, name, tag):
+        """ Returns the tag value of the node, e.g. its rack; None if not tagged """
+        return self.tags[tag][self.node(name)]
+
+    # -------------------------------------------------------------------------
+    # storage
+    # -------------------------------------------------------------------------
+
+    def save(self, path):
+        """ Store the graph in the gzip JSON file `path`; the file is replaced atomically """
+        path = Path(path).expanduser()
+        live = sorted(self._edge_index.items(), key=lambda item: item[1])
+        data = dict(
+            version=self.FORMAT_VERSION,
+            last_ts=self.last_ts,
+            nodes=[self.node_ids, self.hostnames, [self.tags[tag] for tag in NODE_TAGS]],
+            edges=[[key for key, _ in live],
+                   [self._src[edge] for _, edge in live],
+                   [self._dst[edge] for _, edge in live],
+                   [self._ports[edge] for _, edge in live]]
+        )
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix='.topology-')
+
+        try:
+            with gzip.open(os.fdopen(fd, 'wb'), 'wt', compresslevel=1) as ofile:
+                ofile.write(json.dumps(data, separators=(',', ':')))
+
+            os.replace(tmp_name, path)
+
+        except Exception:
+            os.unlink(tmp_name)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """ Returns the graph stored by save() """
+        with gzip.open(Path(path).expanduser(), 'rt') as ifile:
+            data = json.load(ifile)
+
+        if data.get('version') != cls.FORMAT_VERSION:
+            raise RuntimeError('Unsupported topology file version', data.get('version'))
+
+        graph = cls()
+        graph.last_ts = data['last_ts']
+
+        node_ids, hostnames, tag_values = data['nodes']
+        for node_id, hostname, *tags in zip(node_ids, hostnames, *tag_values):
+            graph.add_node(node_id, hostname=hostname, **dict(zip(NODE_TAGS, tags)))
+
+        keys, srcs, dsts, ports = data['edges']
+        graph._src = array('i', srcs)
+        graph._dst = array('i', dsts)
+        graph._ports = [tuple(edge_ports) for edge_ports in ports]
+        graph._edge_index = {key: edge for edge, key in enumerate(keys)}
+        graph.compact()
+        return graph
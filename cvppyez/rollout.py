@@ -0,0 +1,188 @@
+"""
+The staged rollout of a configuration push: the devices are pushed in waves,
+and the rollout is halted when a wave has too many failed devices.  The hash
+of the configuration last pushed to each device is kept in a local file so
+that the devices already configured are skipped by the next push.
+"""
+
+import os
+import json
+import math
+import hashlib
+import tempfile
+from pathlib import Path
+
+from nornir.core.task import AggregatedResult
+
+from cvppyez.eapi.config import config_lines
+from cvppyez.nornir.inventory_cache import InventoryCache
+from cvppyez.nornir.inventory_index import filter_hosts
+
+__all__ = ['ConfigHashes', 'parse_waves', 'plan_waves', 'plan_group_waves', 'run_waves']
+
+
+class ConfigHashes(object):
+    """
+    This class is used to store the hash of the configuration last pushed to
+    each device.  The hash is taken from the configuration lines, see
+    config_lines(), so that comments and blank lines do not change the hash.
+
+    Parameters
+    ----------
+    path : str
+        The hash file, by default "push-config-hashes.json" in the cvp-pyez
+        cache directory.
+    """
+    FILENAME = 'push-config-hashes.json'
+
+    def __init__(self, path=None):
+        self.path = Path(path or Path(InventoryCache.DEFAULT_DIR) / self.FILENAME).expanduser()
+        self.hashes = self._load()
+        self._recorded = dict()
+
+    @staticmethod
+    def digest(configuration):
+        return hashlib.sha256('\n'.join(config_lines(configuration)).encode()).hexdigest()
+
+    def unchanged(self, hostname, digest):
+        """ True if the configuration with `digest` was last pushed to the host """
+        return self.hashes.get(hostname) == digest
+
+    def record(self, hostnames, digest):
+        for hostname in hostnames:
+            self.hashes[hostname] = self._recorded[hostname] = digest
+
+    def save(self):
+        """
+        Store the recorded hashes; merged into the current file content so that
+        the hashes recorded by a concurrent push are kept.  The file is replaced
+        atomically.
+        """
+        if not self._recorded:
+            return
+
+        hashes = dict(self._load(), **self._recorded)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix='.push-config-')
+
+        try:
+            with os.fdopen(fd, 'w') as ofile:
+                json.dump(hashes, ofile)
+
+            os.replace(tmp_name, self.path)
+
+        except Exception:
+            os.unlink(tmp_name)
+            raise
+
+    def _load(self):
+        try:
+            with self.path.open() as ifile:
+                return json.load(ifile)
+
+        except (OSError, ValueError):
+            return dict()
+
+
+def parse_waves(spec):
+    """
+    Parse the rollout waves from the string form, for example "1,10%,100%".
+    Each wave is the cumulative number, or percentage, of devices pushed by
+    the end of the wave.
+
+    Returns
+    -------
+    list[tuple] - (size, is_percent) for each wave
+    """
+    waves = list()
+    for item in filter(None, map(str.strip, (spec or '').split(','))):
+        size = item[:-1] if item.endswith('%') else item
+        if not size.isdigit() or not int(size) or (item.endswith('%') and int(size) > 100):
+            raise RuntimeError(f'Invalid wave: "{item}"', spec)
+        waves.append((int(size), item.endswith('%')))
+
+    return waves
+
+
+def plan_waves(hostnames, waves):
+    """
+    Returns the list of waves, each a list of hostnames, from the `waves` as
+    returned by parse_waves().  The hosts are taken in name order, and the
+    hosts not in any wave are added as the last wave.
+    """
+    hostnames = sorted(hostnames)
+    plan, offset = list(), 0
+
+    for size, is_percent in waves:
+        end = min(math.ceil(len(hostnames) * size / 100) if is_percent else size, len(hostnames))
+        if end > offset:
+            plan.append(hostnames[offset:end])
+            offset = end
+
+    if offset < len(hostnames):
+        plan.append(hostnames[offset:])
+
+    return plan
+
+
+def plan_group_waves(hosts, group_names):
+    """
+    Returns the list of waves, each a list of hostnames, with one wave for
+    each of the `group_names` in the given order; a host is pushed in the
+    wave of its first listed group.  The "*" name is the wave of the hosts in
+    none of the other listed groups, by default the last wave.
+
+    Parameters
+    ----------
+    hosts : dict - hostname to nornir Host
+    group_names : list[str]
+    """
+    if '*' not in group_names:
+        group_names = list(group_names) + ['*']
+
+    waves = {name: list() for name in group_names}
+
+    for hostname in sorted(hosts):
+        # the host groups are the group names, as set by the inventory.
+        host_groups = set(hosts[hostname].groups)
+        wave = next((name for name in group_names if name in host_groups), '*')
+        waves[wave].append(hostname)
+
+    return [hostnames for hostnames in waves.values() if hostnames]
+
+
+def run_waves(nr, waves, run_func, max_failures=0, warn=print):
+    """
+    Run the rollout waves one after the other, and halt the rollout when the
+    percentage of failed hosts in a wave is over `max_failures`.
+
+    Parameters
+    ----------
+    nr : Nornir
+    waves : list[list[str]] - the hostnames of each wave
+    run_func : callable(nr) -> AggregatedResult
+        Used to run the task on the filtered Nornir instance of each wave.
+    max_failures : float - the percentage of failed hosts allowed per wave
+    warn : callable - used to report the wave results
+
+    Returns
+    -------
+    tuple - the AggregatedResult of the hosts run, and the list of hostnames
+    not run because the rollout was halted.
+    """
+    results = AggregatedResult(name='rollout')
+
+    for wave_n, hostnames in enumerate(waves, start=1):
+        res = run_func(filter_hosts(nr, set(hostnames)))
+        results.name = res.name
+        results.update(res)
+
+        n_failed = len(res.failed_hosts)
+        warn(f'Wave {wave_n} of {len(waves)}: {len(hostnames)} devices, {n_failed} failed')
+
+        if n_failed * 100 > max_failures * len(hostnames) and wave_n < len(waves):
+            halted = [hostname for wave in waves[wave_n:] for hostname in wave]
+            warn(f'WARNING: rollout halted, {len(halted)} devices not configured')
+            return results, halted
+
+    return results, []
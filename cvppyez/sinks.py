@@ -0,0 +1,156 @@
+"""
+The result sinks used to store the per-host outputs of a fleet run, for
+example the show command outputs of cvp-get run.  Each host output is written
+when the host task completes so that the outputs are not held in memory
+until the end of the run:
+
+    files   - a JSON file per host, <hostname>.json, in the output directory
+    jsonl   - a single JSON Lines file, one {"host": .., "result": ..} line
+              per host; compressed when the file name ends with ".gz" or
+              ".zst" (requires the zstandard package).
+    parquet - a Parquet file of (host, key, output) rows, one row for each
+              top-level key of the host output, with the output JSON
+              encoded; requires the pyarrow package.
+
+The sinks are thread-safe, so that they can be used by the Nornir task
+threads.
+"""
+
+import io
+import json
+import gzip
+import threading
+from pathlib import Path
+
+__all__ = ['FileSink', 'JsonLinesSink', 'ParquetSink', 'SINKS', 'open_sink']
+
+
+class Sink(object):
+    """ The base class of the result sinks """
+
+    def write(self, hostname, result):
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class FileSink(Sink):
+    """
+    Writes each host result to the JSON file <hostname>.json in `path`, the
+    output directory.
+    """
+    DEFAULT_PATH = '.'
+
+    def __init__(self, path=None):
+        self.path = Path(path or self.DEFAULT_PATH)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def write(self, hostname, result):
+        with (self.path / f'{hostname}.json').open('w') as ofile:
+            json.dump(result, ofile, indent=3)
+
+
+class JsonLinesSink(Sink):
+    """
+    Writes each host result as a line of the JSON Lines file `path`.  The
+    file is compressed per the file name suffix, ".gz" or ".zst".
+    """
+    DEFAULT_PATH = 'results.jsonl'
+
+    def __init__(self, path=None):
+        self.path = Path(path or self.DEFAULT_PATH)
+        self._lock = threading.Lock()
+
+        if self.path.suffix == '.gz':
+            self._ofile = gzip.open(self.path, 'wt')
+
+        elif self.path.suffix == '.zst':
+            try:
+                import zstandard
+            except ImportError:
+                raise RuntimeError('zstandard package is required for ".zst" output', str(path))
+
+            self._ofile = io.TextIOWrapper(
+                zstandard.ZstdCompressor().stream_writer(self.path.open('wb'))
+            )
+
+        else:
+            self._ofile = self.path.open('w')
+
+    def write(self, hostname, result):
+        line = json.dumps(dict(host=hostname, result=result), separators=(',', ':'))
+        with self._lock:
+            self._ofile.write(line + '\n')
+
+    def close(self):
+        with self._lock:
+            self._ofile.close()
+
+
+class ParquetSink(Sink):
+    """
+    Writes the host results to the Parquet file `path`, as rows of (host,
+    key, output); the rows are written in row groups of up to `batch_rows`
+    rows so that the memory used does not depend on the number of hosts.
+    """
+    DEFAULT_PATH = 'results.parquet'
+    DEFAULT_BATCH_ROWS = 10000
+
+    def __init__(self, path=None, batch_rows=None):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError('pyarrow package is required for the parquet sink', str(path))
+
+        self._pa = pyarrow
+        self.path = Path(path or self.DEFAULT_PATH)
+        self.batch_rows = batch_rows or self.DEFAULT_BATCH_ROWS
+        self.schema = pyarrow.schema([('host', pyarrow.string()),
+                                      ('key', pyarrow.string()),
+                                      ('output', pyarrow.string())])
+        self._writer = pyarrow.parquet.ParquetWriter(str(self.path), self.schema,
+                                                     compression='zstd')
+        self._rows = list()
+        self._lock = threading.Lock()
+
+    def write(self, hostname, result):
+        items = result.items() if isinstance(result, dict) else [(None, result)]
+        rows = [(hostname, key, json.dumps(output)) for key, output in items]
+
+        with self._lock:
+            self._rows.extend(rows)
+            if len(self._rows) >= self.batch_rows:
+                self._flush()
+
+    def _flush(self):
+        if self._rows:
+            columns = list(zip(*self._rows))
+            self._writer.write_table(self._pa.Table.from_arrays(
+                [self._pa.array(column, type=self._pa.string()) for column in columns],
+                schema=self.schema
+            ))
+            self._rows = list()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._writer.close()
+
+
+SINKS = dict(files=FileSink, jsonl=JsonLinesSink, parquet=ParquetSink)
+
+
+def open_sink(name, path=None):
+    """
+    Returns the result sink `name`, one of SINKS, that writes to `path`; the
+    sink default path if not given.
+    """
+    return SINKS[name](path)
@@ -0,0 +1,229 @@
+"""
+The snapshot store of the collected device outputs, for example the running
+configurations and the logs.  The outputs are stored as compressed blobs
+named by the hash of their content, so that an output that did not change is
+not written again, and a SQLite index records each (host, kind, timestamp)
+snapshot and its blob:
+
+    <store>/index.db
+    <store>/objects/ab/ab12...ef
+
+The blobs are compressed with zstd when the zstandard package is installed,
+otherwise with gzip; either is read back.
+"""
+
+import os
+import gzip
+import time
+import sqlite3
+import difflib
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+__all__ = ['SnapshotStore']
+
+
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    host TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    ts REAL NOT NULL,
+    digest TEXT NOT NULL,
+    changed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_host ON snapshots (host, kind, ts);
+CREATE INDEX IF NOT EXISTS snapshots_ts ON snapshots (kind, ts);
+CREATE TABLE IF NOT EXISTS latest (
+    host TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    ts REAL NOT NULL,
+    digest TEXT NOT NULL,
+    changed INTEGER NOT NULL,
+    PRIMARY KEY (host, kind)
+);
+"""
+
+
+class SnapshotStore(object):
+    """
+    This class is used to store the device output snapshots.  The latest
+    snapshot digest of every host is loaded when the store is opened, so that
+    storing an unchanged output needs neither a blob write nor an index read.
+    The store can be used by the task threads of the Nornir engine; the index
+    changes are committed when the store is closed.
+
+    Parameters
+    ----------
+    path : str - the store directory, created if it does not exist.
+
+    Examples
+    --------
+        with SnapshotStore('snapshots') as store:
+            changed = store.put('sw1', 'config', running_config)
+
+        store.changed_since(time.time() - 3600, kind='config')
+    """
+
+    def __init__(self, path):
+        self.path = Path(path).expanduser()
+        self.objects = self.path / 'objects'
+        self.objects.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path / 'index.db'), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._latest = {
+            (host, kind): digest
+            for host, kind, digest in self._db.execute('SELECT host, kind, digest FROM latest')
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # -------------------------------------------------------------------------
+    # blobs
+    # -------------------------------------------------------------------------
+
+    def _blob_path(self, digest):
+        return self.objects / digest[:2] / digest
+
+    def _write_blob(self, digest, data):
+        path = self._blob_path(digest)
+        if path.exists():
+            return
+
+        if zstandard:
+            data = zstandard.ZstdCompressor().compress(data)
+        else:
+            data = gzip.compress(data, mtime=0)
+
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix='.blob-')
+
+        try:
+            with os.fdopen(fd, 'wb') as ofile:
+                ofile.write(data)
+
+            os.replace(tmp_name, path)
+
+        except Exception:
+            os.unlink(tmp_name)
+            raise
+
+    def read_blob(self, digest):
+        """ Returns the content, str, of the blob `digest` """
+        data = self._blob_path(digest).read_bytes()
+
+        if data.startswith(ZSTD_MAGIC):
+            if not zstandard:
+                raise RuntimeError('zstandard package is required to read blob', digest)
+            data = zstandard.ZstdDecompressor().decompress(data)
+        else:
+            data = gzip.decompress(data)
+
+        return data.decode()
+
+    # -------------------------------------------------------------------------
+    # snapshots
+    # -------------------------------------------------------------------------
+
+    def put(self, host, kind, content, ts=None):
+        """
+        Store the snapshot of the host output `content`.
+
+        Parameters
+        ----------
+        host : str - the hostname
+        kind : str - the kind of output, for example 'config'
+        content : str
+        ts : float - the snapshot timestamp, by default now.
+
+        Returns
+        -------
+        bool - True if the content changed since the last snapshot of the host.
+        """
+        data = content.encode()
+        digest = hashlib.sha256(data).hexdigest()
+        ts = time.time() if ts is None else ts
+        changed = self._latest.get((host, kind)) != digest
+
+        if changed:
+            self._write_blob(digest, data)
+
+        with self._lock:
+            self._latest[(host, kind)] = digest
+            row = (host, kind, ts, digest, int(changed))
+            self._db.execute('INSERT INTO snapshots VALUES (?, ?, ?, ?, ?)', row)
+            self._db.execute('INSERT OR REPLACE INTO latest VALUES (?, ?, ?, ?, ?)', row)
+
+        return changed
+
+    def get(self, host, kind, ts=None):
+        """
+        Returns the content of the host latest snapshot, or of the latest
+        snapshot at or before `ts`; None if there is no snapshot.
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT digest FROM snapshots WHERE host = ? AND kind = ? AND ts <= ? '
+                'ORDER BY ts DESC LIMIT 1', (host, kind, float('inf') if ts is None else ts)
+            ).fetchone()
+
+        return self.read_blob(row[0]) if row else None
+
+    def history(self, host, kind):
+        """ Returns the list of (ts, digest) of each change of the host output """
+        with self._lock:
+            return self._db.execute(
+                'SELECT ts, digest FROM snapshots WHERE host = ? AND kind = ? AND changed '
+                'ORDER BY ts', (host, kind)
+            ).fetchall()
+
+    def changed(self, kind):
+        """ Returns the hostnames whose latest snapshot changed from the one before """
+        with self._lock:
+            return [host for host, in self._db.execute(
+                'SELECT host FROM latest WHERE kind = ? AND changed ORDER BY host', (kind,)
+            )]
+
+    def changed_since(self, ts, kind):
+        """ Returns the hostnames whose output changed in a snapshot after `ts` """
+        with self._lock:
+            return [host for host, in self._db.execute(
+                'SELECT DISTINCT host FROM snapshots WHERE kind = ? AND ts > ? AND changed '
+                'ORDER BY host', (kind, ts)
+            )]
+
+    def diff(self, host, kind):
+        """
+        Returns the unified diff, str, of the last change of the host output;
+        empty-string if the output has not changed.
+        """
+        changes = self.history(host, kind)[-2:]
+        if len(changes) < 2:
+            return ''
+
+        (old_ts, old_digest), (new_ts, new_digest) = changes
+        return ''.join(difflib.unified_diff(
+            self.read_blob(old_digest).splitlines(keepends=True),
+            self.read_blob(new_digest).splitlines(keepends=True),
+            fromfile=f'{host}@{time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(old_ts))}',
+            tofile=f'{host}@{time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(new_ts))}'
+        ))
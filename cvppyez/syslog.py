@@ -0,0 +1,140 @@
+import re
+import os
+import time
+from collections import namedtuple, Counter
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+__all__ = ['LogMessage', 'iter_chunks', 'parse_chunk', 'parse_lines', 'Throughput']
+
+
+LogMessage = namedtuple('LogMessage', [
+    'date',         # human
+    'timestamp',    # numeric
+    'host',         # device hostname
+    'agent',        # agent process generating the event
+    'type',         # event type
+    'interface',    # interface name found in message or empty-string
+    'message'       # str - message component
+])
+
+EST = timezone(timedelta(hours=-5), 'EST')
+
+_MONTHS = {
+    month: index for index, month in enumerate(
+        ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+         'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), start=1)
+}
+
+re_event_type = re.compile(r"%([\w-]+)")
+re_ifname = re.compile(r'(Ethernet[0-9/]+|Port-Channel[0-9]+)')
+
+
+@lru_cache(maxsize=4096)
+def _hour_info(year, month, day, hour):
+    """
+    Returns the values that only change once per hour, so that they are
+    computed once per hour of log messages rather than once per message.  The
+    log time is taken as UTC for the human date (EST, "%Y-%m-%d (%a) %I:%M:%S %p"),
+    and as local time for the numeric timestamp.
+
+    Returns
+    -------
+    tuple - (timestamp of the hour, EST date prefix, EST AM/PM)
+    """
+    dt = datetime(year, month, day, hour)
+    est = dt.replace(tzinfo=timezone.utc).astimezone(EST)
+    return dt.timestamp(), est.strftime("%Y-%m-%d (%a) %I:"), est.strftime("%p")
+
+
+def parse_lines(lines, year):
+    """
+    Parse the EOS syslog `lines` into LogMessage items.  Lines that do not
+    have the expected syslog format are skipped.
+
+    Parameters
+    ----------
+    lines : iterable of str
+    year : int - the log messages do not include the year
+
+    Yields
+    ------
+    LogMessage
+    """
+    for line in lines:
+        if line.startswith('Warning'):
+            continue
+
+        try:
+            # 'Dec 14 09:36:58' - the day is space padded
+            minute, second = int(line[10:12]), int(line[13:15])
+            ts_hour, date_prefix, am_pm = _hour_info(
+                year, _MONTHS[line[:3]], int(line[4:6]), int(line[7:9]))
+
+            host_agent, _, log_str_data = line[16:].strip().partition(': ')
+            hostname, agent = host_agent.split()
+            ev_type = re_event_type.search(log_str_data).group(1)
+
+        except (KeyError, ValueError, AttributeError):
+            continue
+
+        if_names = re_ifname.findall(log_str_data) or []
+
+        if ev_type == 'LLDP-5-NEIGHBOR_NEW' and len(if_names) > 1:
+            if_names.pop(0)
+
+        yield LogMessage(f'{date_prefix}{minute:02d}:{second:02d} {am_pm}',
+                         ts_hour + minute * 60 + second,
+                         hostname, agent, ev_type,
+                         ','.join(if_names),
+                         log_str_data)
+
+
+def iter_chunks(filename, chunk_size):
+    """
+    Split the file into chunks of approximately `chunk_size` bytes, aligned
+    to line boundaries, so that each chunk can be parsed independently.
+
+    Yields
+    ------
+    tuple - (offset, length) of each chunk
+    """
+    file_size = os.path.getsize(filename)
+
+    with open(filename, 'rb') as ifile:
+        offset = 0
+        while offset < file_size:
+            ifile.seek(offset + chunk_size)
+            ifile.readline()
+            end = min(ifile.tell(), file_size)
+            yield offset, end - offset
+            offset = end
+
+
+def parse_chunk(filename, offset, length, year):
+    """
+    Parse the chunk of the log file; this function is run in a worker process.
+
+    Returns
+    -------
+    tuple - (list of LogMessage, Counter of event types, number of lines)
+    """
+    with open(filename, 'rb') as ifile:
+        ifile.seek(offset)
+        lines = ifile.read(length).decode(errors='replace').splitlines()
+
+    logs = list(parse_lines(lines, year))
+    return logs, Counter(log.type for log in logs), len(lines)
+
+
+class Throughput(object):
+    """ Used to report the lines per second processing rate """
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.n_lines = 0
+
+    def __str__(self):
+        elapsed = max(time.monotonic() - self.start, 1e-6)
+        return (f'{self.n_lines:,} lines in {elapsed:.2f}s '
+                f'({self.n_lines / elapsed:,.0f} lines/sec)')
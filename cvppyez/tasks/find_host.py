@@ -0,0 +1,781 @@
+"""
+The cvp-pyez find-host device tasks: find an end-host by MAC address or IP
+address, searching either the device tables or the host index.
+"""
+
+import math
+import asyncio
+import threading
+from operator import attrgetter
+
+from cvppyez.eapi import run_engine
+from cvppyez.validators import validate_macaddr
+from cvppyez.nornir.inventory_index import filter_hosts
+from cvppyez.tracing import span
+
+__all__ = ['FoundMacaddrs', 'nr_find_host_by_ipaddr', 'nr_find_host_by_macaddr',
+           'nr_find_host_by_ipaddr_pipelined', 'nr_task_collect_host_tables',
+           'aio_task_collect_host_tables', 'index_find_host_by_macaddr',
+           'index_find_host_by_ipaddr', 'telemetry_find_host_by_macaddr',
+           'telemetry_find_host_by_ipaddr', 'telemetry_find_macaddrs']
+
+
+# the pipelined IP search holds the MAC table searches until the first ARP
+# hit; the devices search only their ARP table in at most this many rounds.
+
+ARP_MIN_PROBES = 10
+ARP_PROBE_ROUNDS = 10
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                          FIND HOST BY IP ADDR
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+
+def nr_task_find_ipaddr(task, ipaddr, progress=None):
+    """
+
+    Parameters
+    ----------
+    task
+    ipaddr
+    progress
+
+    Returns
+    -------
+
+    """
+
+    # use NAPALM driver to execute the command, but use the direct pyEAPI
+    # device so we get back structured data and not Command text
+
+    with span('connect', host=task.host.name):
+        np_dev = task.host.get_connection("napalm", task.nornir.config)
+
+    try:
+        with span('eapi', host=task.host.name):
+            cmd_res = np_dev.device.run_commands(
+                commands=[
+                    f'show ip arp {ipaddr}'
+                ]
+            )
+    except Exception as exc:
+        print(f"\nERROR: {task.host.name}: {str(exc)}")
+        return None
+
+    if progress:
+        progress()
+
+    return parse_arp_entries(cmd_res[0])
+
+
+async def aio_task_find_ipaddr(task, ipaddr, progress=None):
+    """ The asyncio engine form of nr_task_find_ipaddr """
+    try:
+        cmd_res = await task.eapi.run_commands(
+            commands=[
+                f'show ip arp {ipaddr}'
+            ]
+        )
+    except Exception as exc:
+        print(f"\nERROR: {task.host.name}: {str(exc)}")
+        return None
+
+    if progress:
+        progress()
+
+    return parse_arp_entries(cmd_res[0])
+
+
+def parse_arp_entries(cmd_output):
+    """
+    Returns the list of tuples (str: macaddr, str: interface name) from the
+    "show ip arp" command output, or None if there are no entries.
+    """
+    r_items = [
+        (entry['hwAddress'], entry['interface'])
+        for entry in cmd_output['ipV4Neighbors']
+    ]
+
+    return r_items if len(r_items) else None
+
+
+def nr_find_host_by_ipaddr(nr, ipaddr, progress, engine=None):
+    """
+    This function will execute the find-ip function against all hosts in the
+    `nr` Nornir object.  Any found item will be returned as a list of dict;
+    where each dict contains the hostname, macaddr, and interface where the IP
+    addr was found.
+
+    Parameters
+    ----------
+    nr : Nornir instance
+    ipaddr : str - IP address to find
+    progress : callable - to indicate progress
+    engine : str - the task execution engine, one of ENGINES
+
+    Returns
+    -------
+    list[dict] as described.
+    """
+
+    res = run_engine(engine, nr, nr_task_find_ipaddr, aio_task_find_ipaddr,
+                     ipaddr=ipaddr, progress=progress)
+
+    # there will be a result for each of the hosts in the `inv` instance. We
+    # want to filter on only those results that are not None.  So the code
+    # below uses the built-in filter() to obtain the host item result to
+    # determine if it is None or not (as returned by the find_mac task.  If the
+    # results are not None then we iterate through the list of found entries
+    # for that device.
+
+    return [
+        dict(hostname=found.host.name, macaddr=item[0], interface=item[1])
+        for found in filter(attrgetter('result'), res.values())
+        for item in found.result
+    ]
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                          FIND HOST BY MACADDR
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+def nr_task_find_mac(task, macaddr, all_ports, progress):
+    """
+    This Nornir task is used to locate the given `macaddr` on the device.  If
+    the MACADDR is found on Eth interfaces, then this function will return a
+    list of tuples (int: vlan-id, str: interface name).  If the MACADDR is not
+    found then this function will return None.
+
+    Notes
+    -----
+    There is a filter match on interface name starts with 'Eth' so we don't
+    include Port-Channels.  This is for demo-purposes only; and your specific
+    filtering criteria could vary.
+
+    Parameters
+    ----------
+    task : Nornir.task
+    macaddr : str - the MACADDR value to find
+    all_ports : bool - do not filter on Eth
+    progress : function to declare progress
+
+    Returns
+    -------
+    list[tuple] or None as described.
+    """
+
+    # use NAPALM driver to execute the command
+
+    with span('connect', host=task.host.name):
+        np_dev = task.host.get_connection("napalm", task.nornir.config)
+
+    # but use the direct pyEAPI device so we get back structured data and not
+    # Command text
+
+    try:
+        with span('eapi', host=task.host.name):
+            cmd_res = np_dev.device.run_commands(
+                commands=[
+                    f'show mac address-table address {macaddr}'
+                ]
+            )
+
+    except Exception as exc:
+        print(f"\nERROR: host {task.host.name}: {str(exc)}")
+        return None
+
+    progress()
+
+    return parse_mac_entries(cmd_res[0], all_ports)
+
+
+async def aio_task_find_mac(task, macaddr, all_ports, progress):
+    """ The asyncio engine form of nr_task_find_mac """
+    try:
+        cmd_res = await task.eapi.run_commands(
+            commands=[
+                f'show mac address-table address {macaddr}'
+            ]
+        )
+
+    except Exception as exc:
+        print(f"\nERROR: host {task.host.name}: {str(exc)}")
+        return None
+
+    progress()
+
+    return parse_mac_entries(cmd_res[0], all_ports)
+
+
+def parse_mac_entries(cmd_output, all_ports):
+    """
+    Returns the list of tuples (int: vlan-id, str: interface name) from the
+    "show mac address-table address" command output, or None if the MACADDR
+    is not found.  Unless `all_ports`, only the Eth interfaces are included.
+    """
+
+    # filter matching on ETh interfaces only
+
+    r_items = [
+        (entry['vlanId'], entry['interface'])
+        for entry in cmd_output['unicastTable']['tableEntries']
+        if all_ports or entry['interface'].startswith('Eth')
+    ]
+
+    return r_items if len(r_items) else None
+
+
+def nr_find_host_by_macaddr(nr, macaddr, all_ports, progress, engine=None):
+    """
+    This function will execute the find-mac function against all hosts in the
+    `inv` Nornir object.  Any found item will be returned as a list of dict; where
+    each dict contains the hostname, vlan, and interface where the MACADDR was found.
+
+    Parameters
+    ----------
+    nr : Nornir instance
+    macaddr : str - MACADDR to find
+    all_ports : bool - do not filter on Eth
+    progress : callable - indicates progress
+    engine : str - the task execution engine, one of ENGINES
+
+    Returns
+    -------
+    list[dict] as described.
+    """
+
+    res = run_engine(engine, nr, nr_task_find_mac, aio_task_find_mac,
+                     macaddr=macaddr, all_ports=all_ports, progress=progress)
+
+    # there will be a result for each of the hosts in the `inv` instance. We
+    # want to filter on only those results that are not None.  So the code
+    # below uses the built-in filter() to obtain the host item result to
+    # determine if it is None or not (as returned by the find_mac task.  If the
+    # results are not None then we iterate through the list of found entries
+    # for that device.
+
+    return [
+        dict(hostname=found.host.name, vlan=item[0], interface=item[1])
+        for found in filter(attrgetter('result'), res.values())
+        for item in found.result
+    ]
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                     FIND HOST BY IP ADDR, PIPELINED
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+class FoundMacaddrs(object):
+    """
+    The collection of MACADDRs found in the ARP tables, shared across the
+    task workers, so that each device can search for the MACADDRs found by
+    any other device.
+
+    Until the first MACADDR is found only `max_probes` devices search their
+    ARP table at a time, and the other devices wait for either a found
+    MACADDR or a free probe slot.  When the fleet is no larger than the
+    worker limit all of the devices would otherwise start with an empty
+    snapshot, and each would need a second eAPI call for the MAC tables.
+
+    Parameters
+    ----------
+    max_probes : int - the number of devices that search only the ARP table
+                       before the first MACADDR is found
+    """
+
+    def __init__(self, max_probes):
+        self._cond = threading.Condition()
+        self._macaddrs = dict()
+        self._max_probes = max_probes
+        self._probes = 0
+        self._event = None
+
+    def _try_acquire(self):
+        # called with the lock held; returns None when the caller must wait.
+        if self._macaddrs:
+            return list(self._macaddrs), False
+
+        if self._probes < self._max_probes:
+            self._probes += 1
+            return [], True
+
+        return None
+
+    def _notify(self):
+        # called with the lock held
+        self._cond.notify_all()
+        if self._event:
+            self._event.set()
+            self._event = None
+
+    def acquire(self):
+        """
+        Blocks until a MACADDR is found or a probe slot is free.  Returns the
+        tuple of the MACADDRs to search, and whether the caller holds a probe
+        slot that must be given back with `release`.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._macaddrs or self._probes < self._max_probes)
+            return self._try_acquire()
+
+    async def aacquire(self):
+        """ The asyncio form of `acquire`, which does not block the event loop """
+        while True:
+            with self._cond:
+                acquired = self._try_acquire()
+                if acquired is not None:
+                    return acquired
+
+                if not self._event:
+                    self._event = asyncio.Event()
+                event = self._event
+
+            await event.wait()
+
+    def release(self, is_probe):
+        if not is_probe:
+            return
+
+        with self._cond:
+            self._probes -= 1
+            self._notify()
+
+    def add(self, macaddrs):
+        with self._cond:
+            self._macaddrs.update(dict.fromkeys(macaddrs))
+            if self._macaddrs:
+                self._notify()
+
+    def snapshot(self):
+        with self._cond:
+            return list(self._macaddrs)
+
+
+def nr_task_find_ipaddr_pipelined(task, ipaddr, found_macaddrs, all_ports, progress=None):
+    """
+    This Nornir task is used to locate the given `ipaddr` in the device ARP
+    table, and in the same eAPI call locate each of the MACADDRs that have
+    already been found by any device.  If this device, or any other device in
+    the meantime, finds a MACADDR that has not yet been searched then a second
+    eAPI call is used to search for those MACADDRs.
+
+    Parameters
+    ----------
+    task : Nornir.task
+    ipaddr : str - the IP address to find
+    found_macaddrs : FoundMacaddrs - shared collection of found MACADDRs
+    all_ports : bool - do not filter on Eth
+    progress : function to declare progress
+
+    Returns
+    -------
+    dict - 'arp': list of (macaddr, interface) or None, 'macs': dict of macaddr
+    to list of (vlan-id, interface).  None if the commands failed.
+    """
+
+    with span('connect', host=task.host.name):
+        np_dev = task.host.get_connection("napalm", task.nornir.config)
+    eos_dev = np_dev.device
+
+    with span('wait', host=task.host.name):
+        macaddrs, is_probe = found_macaddrs.acquire()
+
+    try:
+        with span('eapi', host=task.host.name):
+            cmd_res = eos_dev.run_commands(
+                commands=[f'show ip arp {ipaddr}'] + [
+                    f'show mac address-table address {macaddr}'
+                    for macaddr in macaddrs
+                ]
+            )
+
+        arp_items = parse_arp_entries(cmd_res[0])
+        if arp_items:
+            found_macaddrs.add(item[0] for item in arp_items)
+
+        mac_items = dict(zip(macaddrs, cmd_res[1:]))
+
+        remaining = [macaddr for macaddr in found_macaddrs.snapshot()
+                     if macaddr not in mac_items]
+
+        if remaining:
+            with span('eapi', host=task.host.name):
+                cmd_res = eos_dev.run_commands(
+                    commands=[f'show mac address-table address {macaddr}'
+                              for macaddr in remaining]
+                )
+            mac_items.update(zip(remaining, cmd_res))
+
+    except Exception as exc:
+        print(f"\nERROR: {task.host.name}: {str(exc)}")
+        return None
+
+    finally:
+        found_macaddrs.release(is_probe)
+        if progress:
+            progress()
+
+    return dict(arp=arp_items, macs={
+        macaddr: parse_mac_entries(cmd_output, all_ports)
+        for macaddr, cmd_output in mac_items.items()
+    })
+
+
+async def aio_task_find_ipaddr_pipelined(task, ipaddr, found_macaddrs, all_ports, progress=None):
+    """ The asyncio engine form of nr_task_find_ipaddr_pipelined """
+
+    eapi = task.eapi
+    macaddrs, is_probe = await found_macaddrs.aacquire()
+
+    try:
+        cmd_res = await eapi.run_commands(
+            commands=[f'show ip arp {ipaddr}'] + [
+                f'show mac address-table address {macaddr}'
+                for macaddr in macaddrs
+            ]
+        )
+
+        arp_items = parse_arp_entries(cmd_res[0])
+        if arp_items:
+            found_macaddrs.add(item[0] for item in arp_items)
+
+        mac_items = dict(zip(macaddrs, cmd_res[1:]))
+
+        remaining = [macaddr for macaddr in found_macaddrs.snapshot()
+                     if macaddr not in mac_items]
+
+        if remaining:
+            cmd_res = await eapi.run_commands(
+                commands=[f'show mac address-table address {macaddr}'
+                          for macaddr in remaining]
+            )
+            mac_items.update(zip(remaining, cmd_res))
+
+    except Exception as exc:
+        print(f"\nERROR: {task.host.name}: {str(exc)}")
+        return None
+
+    finally:
+        found_macaddrs.release(is_probe)
+        if progress:
+            progress()
+
+    return dict(arp=arp_items, macs={
+        macaddr: parse_mac_entries(cmd_output, all_ports)
+        for macaddr, cmd_output in mac_items.items()
+    })
+
+
+def nr_task_find_macaddrs(task, host_macaddrs, all_ports):
+    """
+    This Nornir task is used to locate the MACADDRs given for this host in
+    `host_macaddrs` using a single eAPI call.
+
+    Returns
+    -------
+    dict - 'macs': dict of macaddr to list of (vlan-id, interface).
+    """
+
+    with span('connect', host=task.host.name):
+        np_dev = task.host.get_connection("napalm", task.nornir.config)
+    macaddrs = host_macaddrs[task.host.name]
+
+    try:
+        with span('eapi', host=task.host.name):
+            cmd_res = np_dev.device.run_commands(
+                commands=[f'show mac address-table address {macaddr}'
+                          for macaddr in macaddrs]
+            )
+
+    except Exception as exc:
+        print(f"\nERROR: {task.host.name}: {str(exc)}")
+        return None
+
+    return dict(arp=None, macs={
+        macaddr: parse_mac_entries(cmd_output, all_ports)
+        for macaddr, cmd_output in zip(macaddrs, cmd_res)
+    })
+
+
+async def aio_task_find_macaddrs(task, host_macaddrs, all_ports):
+    """ The asyncio engine form of nr_task_find_macaddrs """
+
+    macaddrs = host_macaddrs[task.host.name]
+
+    try:
+        cmd_res = await task.eapi.run_commands(
+            commands=[f'show mac address-table address {macaddr}'
+                      for macaddr in macaddrs]
+        )
+
+    except Exception as exc:
+        print(f"\nERROR: {task.host.name}: {str(exc)}")
+        return None
+
+    return dict(arp=None, macs={
+        macaddr: parse_mac_entries(cmd_output, all_ports)
+        for macaddr, cmd_output in zip(macaddrs, cmd_res)
+    })
+
+
+def nr_find_host_by_ipaddr_pipelined(nr, ipaddr, all_ports, progress, engine=None,
+                                     macaddrs=None):
+    """
+    This function will find the `ipaddr` in the device ARP tables, and all of
+    the found MACADDRs in the device MAC tables, using a single sweep across
+    all hosts in the `nr` Nornir object.
+
+    Until the first MACADDR is found only a limited number of devices search
+    their ARP table, see FoundMacaddrs; the other devices wait, and then
+    search the ARP table and the found MACADDRs in the same eAPI call.  The
+    devices that completed before a MACADDR was found by another device are
+    searched for that MACADDR in a follow-up run limited to those devices.
+
+    Parameters
+    ----------
+    nr : Nornir instance
+    ipaddr : str - IP address to find
+    all_ports : bool - do not filter on Eth
+    progress : callable - to indicate progress
+    engine : str - the task execution engine, one of ENGINES
+    macaddrs : list[str] - the MACADDRs already found, for example from the
+                           CVP telemetry; searched by every device.
+
+    Returns
+    -------
+    tuple - list[dict] of ARP entries; each dict contains the hostname, macaddr,
+    and interface, and list[dict] of MAC entries; each dict contains the
+    hostname, macaddr, vlan, and interface.
+    """
+
+    found_macaddrs = FoundMacaddrs(max_probes=max(
+        ARP_MIN_PROBES, math.ceil(len(nr.inventory.hosts) / ARP_PROBE_ROUNDS)
+    ))
+    found_macaddrs.add(macaddrs or [])
+
+    res = run_engine(engine, nr, nr_task_find_ipaddr_pipelined, aio_task_find_ipaddr_pipelined,
+                     ipaddr=ipaddr, found_macaddrs=found_macaddrs, all_ports=all_ports,
+                     progress=progress)
+
+    host_results = {host: h_res.result for host, h_res in res.items() if h_res.result}
+
+    all_macaddrs = found_macaddrs.snapshot()
+    host_macaddrs = {
+        host: missing for host, missing in (
+            (host, [macaddr for macaddr in all_macaddrs if macaddr not in h_result['macs']])
+            for host, h_result in host_results.items()
+        )
+        if missing
+    }
+
+    if host_macaddrs:
+        res = run_engine(
+            engine, filter_hosts(nr, host_macaddrs),
+            nr_task_find_macaddrs, aio_task_find_macaddrs,
+            host_macaddrs=host_macaddrs, all_ports=all_ports
+        )
+        for host, h_res in res.items():
+            if h_res.result:
+                host_results[host]['macs'].update(h_res.result['macs'])
+
+    ip_res = [
+        dict(hostname=host, macaddr=item[0], interface=item[1])
+        for host, h_result in host_results.items()
+        for item in h_result['arp'] or []
+    ]
+
+    mac_res = [
+        dict(hostname=host, macaddr=macaddr, vlan=item[0], interface=item[1])
+        for host, h_result in host_results.items()
+        for macaddr, items in h_result['macs'].items()
+        for item in items or []
+    ]
+
+    return ip_res, mac_res
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                          FIND HOST FROM INDEX
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+def nr_task_collect_host_tables(task, index, progress):
+    """
+    This Nornir task is used to collect the complete MAC address table and
+    ARP table from the device, in a single eAPI call, and store them into the
+    host index.
+
+    Parameters
+    ----------
+    task : Nornir.task
+    index : HostIndex - the host index to update
+    progress : function to declare progress
+
+    Returns
+    -------
+    bool - True if the device tables changed since the last snapshot, None
+    if the tables could not be collected.
+    """
+
+    with span('connect', host=task.host.name):
+        np_dev = task.host.get_connection("napalm", task.nornir.config)
+
+    try:
+        with span('eapi', host=task.host.name):
+            mac_table, arp_table = np_dev.device.run_commands(
+                commands=[
+                    'show mac address-table',
+                    'show ip arp'
+                ]
+            )
+
+    except Exception as exc:
+        print(f"\nERROR: host {task.host.name}: {str(exc)}")
+        progress()
+        return None
+
+    changed = index.update_device(task.host.name, mac_table, arp_table)
+    progress()
+    return changed
+
+
+async def aio_task_collect_host_tables(task, index, progress):
+    """ The asyncio engine form of nr_task_collect_host_tables """
+    try:
+        mac_table, arp_table = await task.eapi.run_commands(
+            commands=[
+                'show mac address-table',
+                'show ip arp'
+            ]
+        )
+
+    except Exception as exc:
+        print(f"\nERROR: host {task.host.name}: {str(exc)}")
+        progress()
+        return None
+
+    changed = index.update_device(task.host.name, mac_table, arp_table)
+    progress()
+    return changed
+
+
+def index_find_host_by_macaddr(index, macaddrs, all_ports, match_hostname=None):
+    """
+    This function will find the `macaddrs` in the host index.  Any found item
+    will be returned as a list of dict; where each dict contains the hostname,
+    macaddr, vlan, and interface where the MACADDR was found.
+
+    Parameters
+    ----------
+    index : HostIndex
+    macaddrs : list[str] - MACADDRs to find
+    all_ports : bool - do not filter on Eth
+    match_hostname : callable - if provided, used to filter on hostname
+
+    Returns
+    -------
+    list[dict] as described.
+    """
+    return [
+        item for item in index.find_macaddrs(macaddrs)
+        if (all_ports or item['interface'].startswith('Eth'))
+        and (not match_hostname or match_hostname(item['hostname']))
+    ]
+
+
+def index_find_host_by_ipaddr(index, ipaddrs, match_hostname=None):
+    """
+    This function will find the `ipaddrs` in the host index.  Any found item
+    will be returned as a list of dict; where each dict contains the hostname,
+    ipaddr, macaddr, and interface where the IP addr was found.
+    """
+    return [
+        item for item in index.find_ipaddrs(ipaddrs)
+        if not match_hostname or match_hostname(item['hostname'])
+    ]
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                          FIND HOST FROM TELEMETRY
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+def telemetry_find_host_by_macaddr(hosts, macaddr, all_ports):
+    """
+    This function will find the `macaddr` in the CVP telemetry MAC tables of
+    the `hosts`, see TelemetryPlanner.  The hosts that are not covered by the
+    telemetry are to be searched by nr_find_host_by_macaddr.
+
+    Returns
+    -------
+    tuple - list[dict] as nr_find_host_by_macaddr, set of uncovered hostnames
+    """
+    from cvppyez.planner import query_telemetry
+
+    command = f'show mac address-table address {macaddr}'
+    found = query_telemetry(hosts, [command])
+
+    return [
+        dict(hostname=hostname, vlan=item[0], interface=item[1])
+        for hostname, h_outputs in found.outputs.items()
+        for item in parse_mac_entries(h_outputs[command], all_ports) or []
+    ], found.uncovered
+
+
+def telemetry_find_host_by_ipaddr(hosts, ipaddr):
+    """
+    This function will find the `ipaddr` in the CVP telemetry ARP tables of
+    the `hosts`, and collect their MAC tables in the same pass so that any
+    found MACADDR is then found without another query; see
+    telemetry_find_macaddrs.
+
+    Returns
+    -------
+    tuple - list[dict] as nr_find_host_by_ipaddr, dict of hostname to the
+    MAC table output, set of uncovered hostnames
+    """
+    from cvppyez.planner import query_telemetry
+
+    arp_command, mac_command = f'show ip arp {ipaddr}', 'show mac address-table'
+    found = query_telemetry(hosts, [arp_command, mac_command])
+
+    ip_res = [
+        dict(hostname=hostname, macaddr=item[0], interface=item[1])
+        for hostname, h_outputs in found.outputs.items()
+        for item in parse_arp_entries(h_outputs[arp_command]) or []
+    ]
+
+    mac_tables = {
+        hostname: h_outputs[mac_command]
+        for hostname, h_outputs in found.outputs.items()
+    }
+
+    return ip_res, mac_tables, found.uncovered
+
+
+def telemetry_find_macaddrs(mac_tables, macaddrs, all_ports):
+    """
+    This function will find the `macaddrs` in the `mac_tables`, as returned
+    by telemetry_find_host_by_ipaddr.  Any found item will be returned as a
+    list of dict; where each dict contains the hostname, macaddr, vlan, and
+    interface where the MACADDR was found.
+    """
+    macaddrs = {(validate_macaddr(macaddr) or macaddr).lower() for macaddr in macaddrs}
+
+    return [
+        dict(hostname=hostname, macaddr=entry['macAddress'], vlan=entry['vlanId'],
+             interface=entry['interface'])
+        for hostname, mac_table in mac_tables.items()
+        for entry in mac_table['unicastTable']['tableEntries']
+        if entry['macAddress'] in macaddrs
+        and (all_ports or entry['interface'].startswith('Eth'))
+    ]
@@ -0,0 +1,289 @@
+"""
+The cvp-pyez get device tasks: collect the logs, the running configuration,
+or the show command outputs from the device into a hostname specific file.
+"""
+
+from nornir.core.task import Task
+from nornir.plugins.tasks.files import write_file
+
+from cvppyez.tracing import span
+from cvppyez.sinks import FileSink
+
+__all__ = ['nr_task_get_logs', 'aio_task_get_logs', 'nr_task_get_running_config',
+           'aio_task_get_running_config', 'nr_task_get_show_commands',
+           'aio_task_get_show_commands', 'write_host_result', 'write_host_file',
+           'save_host_output']
+
+
+LOGS_TIMEOUT = 10 * 60
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                               GET LOGS
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+def nr_task_get_logs(task, timeframe, progress=None, store=None):
+    """
+    This Nornir task is used to collect the logs from the device and then
+    save them to a hostname specific file, or to the snapshot `store`.
+
+
+    Parameters
+    ----------
+    task : Nornir Task
+    timeframe : str - per EOS logging command
+    progress : callable - used to indicate progress
+    store : SnapshotStore - used in place of the hostname specific file
+
+    Returns
+    -------
+    bool - with the `store`, True if the logs changed since the last snapshot.
+    """
+
+    # use NAPALM driver to execute the command.  Using the underlying pyEapi
+    # device object and allowing for up to 10min to collect the logging data.
+    # This time increase was done because some devices are ~slow~; and some
+    # have lots of logs.
+    # TODO: make the timeout a Command option.
+
+    hostname = task.host.name
+
+    try:
+        with span('connect', host=task.host.name):
+            np_dev = task.host.get_connection("napalm", task.nornir.config)
+
+    except Exception as exc:
+        print(f"\nERROR: unable to connect to device: {hostname}.\n")
+        if progress:
+            progress()
+        return
+
+    eos_dev = np_dev.device
+    eos_dev.connection.transport.timeout = LOGS_TIMEOUT       # extend for longer timeout period!
+
+    try:
+        with span('eapi', host=task.host.name):
+            cmd_res = eos_dev.run_commands(
+                commands=[
+                    f'show logging last {timeframe}'
+                ],
+                encoding='text'
+            )
+
+    except Exception as exc:
+        if progress:
+            progress()
+
+        print(f"\nERROR: {hostname}: {str(exc)}\n")
+        return
+
+    # save the collected log output (text) to a file.
+    # TODO: add Command option to indicate directory to store; maybe
+    #       even the logging filename format.
+
+    output = cmd_res[0]['output']
+    changed = save_host_output(task, 'log', output, store)
+
+    if progress:
+        progress()
+
+    return changed
+
+
+async def aio_task_get_logs(task, timeframe, progress=None, store=None):
+    """ The asyncio engine form of nr_task_get_logs """
+
+    hostname = task.host.name
+
+    try:
+        cmd_res = await task.eapi.run_commands(
+            commands=[
+                f'show logging last {timeframe}'
+            ],
+            encoding='text',
+            timeout=LOGS_TIMEOUT
+        )
+
+    except Exception as exc:
+        if progress:
+            progress()
+
+        print(f"\nERROR: {hostname}: {str(exc)}\n")
+        return
+
+    changed = save_host_output(task, 'log', cmd_res[0]['output'], store)
+
+    if progress:
+        progress()
+
+    return changed
+
+
+def nr_task_get_running_config(task, progress=None, store=None):
+    """
+    This Nornir task is used to collect the running configuration from the
+    device and then save it to a hostname specific file, or to the snapshot
+    `store`.
+
+
+    Parameters
+    ----------
+    task : Nornir Task
+    progress : callable - used to indicate progress
+    store : SnapshotStore - used in place of the hostname specific file
+
+    Returns
+    -------
+    bool - with the `store`, True if the config changed since the last snapshot.
+    """
+
+    with span('connect', host=task.host.name):
+        np_dev = task.host.get_connection("napalm", task.nornir.config)
+    eos_dev = np_dev.device
+
+    # collect the logs from the last 1 day
+    # TODO: make the collection period a Command option.
+
+    with span('eapi', host=task.host.name):
+        cmd_res = eos_dev.run_commands(
+            commands=[
+                'show running-config'
+            ],
+            encoding='text'
+        )
+
+    # save the collected log output (text) to a file.
+    # TODO: add Command option to indicate directory to store; maybe
+    #       even the logging filename format.
+
+    output = cmd_res[0]['output']
+    changed = save_host_output(task, 'config', output, store)
+
+    if progress:
+        progress()
+
+    return changed
+
+
+async def aio_task_get_running_config(task, progress=None, store=None):
+    """ The asyncio engine form of nr_task_get_running_config """
+
+    cmd_res = await task.eapi.run_commands(
+        commands=[
+            'show running-config'
+        ],
+        encoding='text'
+    )
+
+    changed = save_host_output(task, 'config', cmd_res[0]['output'], store)
+
+    if progress:
+        progress()
+
+    return changed
+
+
+def nr_task_get_show_commands(task, plan, progress=None, sink=None, telemetry=None):
+    """
+    This Nornir task is used to execute the command plan on the device and
+    save the outputs to the result sink, by default as JSON into a hostname
+    specific file.  The command outputs answered from the CVP telemetry are
+    not executed; when all of them are, the device is not connected.
+
+    Parameters
+    ----------
+    task : Nornir Task
+    plan : CommandPlan - the compiled show commands
+    progress : callable - used to indicate progress
+    sink : Sink - the result sink, see cvppyez.sinks
+    telemetry : dict - hostname to dict of command to JSON output, as
+                       TelemetryResult.outputs
+
+    Returns
+    -------
+    dict - command name to error message, for each command that failed.
+    """
+    known = telemetry_outputs(task.host, telemetry)
+
+    if plan.remaining(known):
+        with span('connect', host=task.host.name):
+            np_dev = task.host.get_connection("napalm", task.nornir.config)
+        eos_dev = np_dev.device
+        with span('eapi', host=task.host.name):
+            output = plan.execute(eos_dev, known)
+    else:
+        output = plan.execute(None, known)
+
+    write_host_result(task.host, output, sink)
+
+    if progress:
+        progress()
+
+    return plan.errors(output)
+
+
+async def aio_task_get_show_commands(task, plan, progress=None, sink=None, telemetry=None):
+    """ The asyncio engine form of nr_task_get_show_commands """
+
+    output = await plan.aexecute(task.eapi, telemetry_outputs(task.host, telemetry))
+    write_host_result(task.host, output, sink)
+
+    if progress:
+        progress()
+
+    return plan.errors(output)
+
+
+def telemetry_outputs(host, telemetry=None):
+    """ Returns the CommandPlan known outputs of the `host` from the `telemetry` """
+    return {
+        (command, 'json'): output
+        for command, output in (telemetry or {}).get(host.name, {}).items()
+    }
+
+
+def write_host_result(host, result, sink=None):
+    """
+    Write the host `result` to the `sink`, by default the FileSink.  The
+    result is not kept in the task result, so that it is released once
+    written.
+    """
+    with span('write_result', host=host.name):
+        (sink or FileSink()).write(host.name, result)
+
+
+def write_host_file(host, filename, content):
+    """ The asyncio engine form of the Nornir write_file task """
+    with span('write_file', host=host.name), open(filename, 'w+') as ofile:
+        ofile.write(content)
+
+
+# the hostname specific file extension of each kind of output.
+
+OUTPUT_FILE_EXT = dict(log='log', config='cfg')
+
+
+def save_host_output(task, kind, content, store=None):
+    """
+    Save the host output of `kind` to the snapshot `store`, or when there is
+    no store, to the hostname specific file.
+
+    Returns
+    -------
+    bool - with the `store`, True if the output changed since the last
+    snapshot; otherwise None.
+    """
+    host = task.host
+
+    if store:
+        with span('snapshot', host=host.name):
+            return store.put(host.name, kind, content)
+
+    filename = f'{host.name}.{OUTPUT_FILE_EXT[kind]}'
+
+    if isinstance(task, Task):
+        task.run(task=write_file, filename=filename, content=content)
+    else:
+        write_host_file(host, filename=filename, content=content)
@@ -0,0 +1,121 @@
+"""
+The cvp-pyez get-interfaces device tasks: run the interface commands on the
+device and save the outputs to the result sink, by default a hostname
+specific JSON file.
+"""
+
+from collections import defaultdict
+
+from cvppyez.tracing import span
+from cvppyez.commands import run_commands_batched, arun_commands_batched
+from cvppyez.tasks.get import write_host_result
+
+__all__ = ['nr_task_run_interface_commands', 'aio_task_run_interface_commands',
+           'interface_commands_by_encoding']
+
+
+def nr_task_run_interface_commands(task, commands, dev_ifs, batch_size=None, progress=None,
+                                   sink=None):
+    """
+    This Nornir task is used to execute the interface commands on the device
+    and save the results to the result sink, by default a hostname specific
+    JSON file.  The commands are
+    grouped by encoding and executed in batches of up to `batch_size` commands
+    per eAPI call.  If a command fails, the error is stored in place of that
+    command output.
+
+    Parameters
+    ----------
+    task : Nornir Task
+    commands : list[dict] - the command items from the YAML file
+    dev_ifs : dict - hostname to set of interface names
+    batch_size : int - maximum number of commands per eAPI call
+    progress : callable - used to indicate progress
+    sink : Sink - the result sink, see cvppyez.sinks
+
+    Returns
+    -------
+    dict - interface name to dict of command name to error message, for each
+    command that failed.
+    """
+
+    with span('connect', host=task.host.name):
+        np_dev = task.host.get_connection("napalm", task.nornir.config)
+    eos_dev = np_dev.device
+
+    hostname = task.host.name
+    cmd_outputs, cmd_errors = defaultdict(dict), defaultdict(dict)
+
+    for encoding, cmd_list in interface_commands_by_encoding(commands, dev_ifs[hostname]).items():
+        with span('eapi', host=hostname):
+            cmd_results = run_commands_batched(
+                eos_dev,
+                commands=[eos_cmd for _, _, eos_cmd in cmd_list],
+                encoding=encoding,
+                batch_size=batch_size
+            )
+
+        store_outputs(cmd_outputs, cmd_errors, cmd_list, cmd_results)
+
+    write_host_result(task.host, cmd_outputs, sink)
+
+    if progress:
+        progress()
+
+    return dict(cmd_errors)
+
+
+async def aio_task_run_interface_commands(task, commands, dev_ifs, batch_size=None, progress=None,
+                                          sink=None):
+    """ The asyncio engine form of nr_task_run_interface_commands """
+
+    hostname = task.host.name
+    cmd_outputs, cmd_errors = defaultdict(dict), defaultdict(dict)
+
+    for encoding, cmd_list in interface_commands_by_encoding(commands, dev_ifs[hostname]).items():
+        cmd_results = await arun_commands_batched(
+            task.eapi,
+            commands=[eos_cmd for _, _, eos_cmd in cmd_list],
+            encoding=encoding,
+            batch_size=batch_size
+        )
+
+        store_outputs(cmd_outputs, cmd_errors, cmd_list, cmd_results)
+
+    write_host_result(task.host, cmd_outputs, sink)
+
+    if progress:
+        progress()
+
+    return dict(cmd_errors)
+
+
+def store_outputs(cmd_outputs, cmd_errors, cmd_list, cmd_results):
+    """
+    Store the command results of the `cmd_list` into `cmd_outputs`; the
+    error of a failed command is stored in place of its output, and into
+    `cmd_errors`.
+    """
+    for (if_name, name, _), (ok, output) in zip(cmd_list, cmd_results):
+        cmd_outputs[if_name][name] = output if ok else dict(error=output)
+        if not ok:
+            cmd_errors[if_name][name] = output
+
+
+def interface_commands_by_encoding(commands, if_names):
+    """
+    Group the (interface, command) pairs by encoding so that each group is
+    executed in as few eAPI calls as possible.
+
+    Returns
+    -------
+    dict - encoding to list of tuple(interface name, command name, EOS command)
+    """
+    by_encoding = defaultdict(list)
+
+    for if_name in if_names:
+        for cmd_item in commands:
+            eos_cmd = cmd_item['command'].substitute(interface=if_name)
+            by_encoding[cmd_item['encoding']].append((if_name, cmd_item['name'], eos_cmd))
+
+    return by_encoding
@@ -0,0 +1,76 @@
+"""
+The cvp-pyez push-config device tasks: push the configuration to the device
+using a configuration session.
+"""
+
+from nornir.core.task import Result
+
+from cvppyez.tracing import span
+from cvppyez.eapi.config import push_config, apush_config
+
+__all__ = ['nr_task_push_config', 'aio_task_push_config']
+
+
+def session_result(host, session):
+    """ Returns the task Result of the configuration `session` """
+    if session.aborted:
+        print(f'WARNING: clearing pending sessions: {" ".join(session.aborted)}')
+
+    return Result(host=host, diff=session.diff, changed=len(session.diff) > 0)
+
+
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# !
+# !                               NORNIR
+# !
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+
+def nr_task_push_config(task, dry_run, configuration, progress):
+    """
+    This Nornir task is used to push the configuration to the device using a
+    configuration session, see ConfigSession; the pending configuration
+    sessions are aborted only if the device is at its session limit.
+
+    Parameters
+    ----------
+    task : Nornir Task
+    dry_run : bool
+    configuration : str - the config to push
+    progress : callable - used to indicate progress
+
+    Returns
+    -------
+    Result - with the session configuration diff.
+    """
+
+    with span('connect', host=task.host.name):
+        nr_device = task.host.get_connection("napalm", task.nornir.config)
+    eos_device = nr_device.device
+
+    try:
+        with span('eapi', host=task.host.name):
+            session = push_config(eos_device, configuration=configuration, dry_run=dry_run)
+        res = session_result(task.host, session)
+
+    except Exception as exc:
+        res = Result(host=task.host, failed=True,
+                     result=str(exc), exception=exc)
+
+    progress()
+    return res
+
+
+async def aio_task_push_config(task, dry_run, configuration, progress):
+    """
+    The asyncio engine form of nr_task_push_config.
+    """
+    try:
+        session = await apush_config(task.eapi, configuration=configuration, dry_run=dry_run)
+        res = session_result(task.host, session)
+
+    except Exception as exc:
+        res = Result(host=task.host, failed=True,
+                     result=str(exc), exception=exc)
+
+    progress()
+    return res
@@ -0,0 +1,350 @@
+import os
+import json
+import math
+import time
+import threading
+from contextlib import contextmanager
+from collections import defaultdict
+
+__all__ = ['Tracer', 'get_tracer', 'enable_tracing', 'span', 'record',
+           'aiohttp_trace_config', 'TracingProcessor', 'print_trace_report']
+
+
+def percentile(sorted_values, pct):
+    """ Returns the `pct` percentile of the `sorted_values`; nearest-rank """
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+class Tracer(object):
+    """
+    This class is used to record the duration of each phase of a program run,
+    for example the CVP login, building the inventory, or the eAPI request to
+    each device.  Each record, a span, has the phase name, the host the phase
+    was run for (None when not host specific), the start time, the duration,
+    whether the phase succeeded, and any other attributes.
+
+    A disabled Tracer does not record anything, so the instrumentation costs
+    nearly nothing when tracing is not enabled.
+
+    Parameters
+    ----------
+    enabled : bool
+    """
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.spans = list()
+        self.start = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, phase, duration, host=None, ok=True, start=None, **attrs):
+        if not self.enabled:
+            return
+
+        item = dict(phase=phase, host=host, start=start or (time.time() - duration),
+                    duration=duration, ok=ok)
+        if attrs:
+            item['attrs'] = attrs
+
+        with self._lock:
+            self.spans.append(item)
+
+    @contextmanager
+    def span(self, phase, host=None, **attrs):
+        """
+        Record the duration of the with-block as the `phase`.  The span is
+        recorded as failed if the block raises an exception.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        start, t0 = time.time(), time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(phase, time.perf_counter() - t0, host=host, ok=ok,
+                        start=start, **attrs)
+
+    # -------------------------------------------------------------------------
+    # reports
+    # -------------------------------------------------------------------------
+
+    def phase_durations(self):
+        """ Returns dict of phase name to sorted list of durations """
+        by_phase = defaultdict(list)
+        for item in self.spans:
+            by_phase[item['phase']].append(item['duration'])
+
+        return {phase: sorted(durations) for phase, durations in by_phase.items()}
+
+    def summary(self):
+        """
+        Returns dict of phase name to dict of count, errors, total, max and
+        each of the PERCENTILES (p50, ...).
+        """
+        errors = defaultdict(int)
+        for item in self.spans:
+            if not item['ok']:
+                errors[item['phase']] += 1
+
+        return {
+            phase: dict(
+                count=len(durations),
+                errors=errors[phase],
+                total=sum(durations),
+                max=durations[-1],
+                **{f'p{pct}': percentile(durations, pct) for pct in self.PERCENTILES}
+            )
+            for phase, durations in self.phase_durations().items()
+        }
+
+    def host_totals(self):
+        """ Returns dict of hostname to dict of phase name to total duration """
+        totals = defaultdict(lambda: defaultdict(float))
+        for item in self.spans:
+            if item['host']:
+                totals[item['host']][item['phase']] += item['duration']
+
+        return totals
+
+    def slowest_hosts(self, count=10, phase='task'):
+        """
+        Returns the list of (hostname, duration, dict of phase durations) for
+        the `count` hosts with the longest `phase` duration.
+        """
+        totals = self.host_totals()
+        return sorted(
+            ((host, phases.get(phase, sum(phases.values())), dict(phases))
+             for host, phases in totals.items()),
+            key=lambda item: item[1], reverse=True
+        )[:count]
+
+    def report(self):
+        """ Returns the complete JSON report as a dict """
+        return dict(
+            start=self.start,
+            duration=time.time() - self.start,
+            summary=self.summary(),
+            slowest_hosts=[
+                dict(host=host, duration=duration, phases=phases)
+                for host, duration, phases in self.slowest_hosts()
+            ],
+            spans=self.spans
+        )
+
+    def write_json(self, filename):
+        with open(filename, 'w+') as ofile:
+            json.dump(self.report(), ofile, indent=3)
+
+    def prometheus_text(self, prefix='cvppyez'):
+        """
+        Returns the metrics in the Prometheus text exposition format, for use
+        with the node-exporter textfile collector.
+        """
+        lines = [
+            f'# HELP {prefix}_phase_duration_seconds Duration of each run phase.',
+            f'# TYPE {prefix}_phase_duration_seconds summary'
+        ]
+
+        for phase, stats in sorted(self.summary().items()):
+            for pct in self.PERCENTILES:
+                lines.append(f'{prefix}_phase_duration_seconds{{phase="{phase}",'
+                             f'quantile="{pct / 100}"}} {stats[f"p{pct}"]:.6f}')
+            lines.append(f'{prefix}_phase_duration_seconds_sum{{phase="{phase}"}} {stats["total"]:.6f}')
+            lines.append(f'{prefix}_phase_duration_seconds_count{{phase="{phase}"}} {stats["count"]}')
+
+        lines.extend([
+            f'# HELP {prefix}_phase_errors_total Number of failed phases.',
+            f'# TYPE {prefix}_phase_errors_total counter'
+        ])
+        for phase, stats in sorted(self.summary().items()):
+            lines.append(f'{prefix}_phase_errors_total{{phase="{phase}"}} {stats["errors"]}')
+
+        lines.extend([
+            f'# HELP {prefix}_host_phase_seconds Total duration of each phase per host.',
+            f'# TYPE {prefix}_host_phase_seconds gauge'
+        ])
+        for host, phases in sorted(self.host_totals().items()):
+            for phase, duration in sorted(phases.items()):
+                lines.append(f'{prefix}_host_phase_seconds{{host="{host}",phase="{phase}"}} {duration:.6f}')
+
+        lines.extend([
+            f'# HELP {prefix}_run_timestamp_seconds Time the run started.',
+            f'# TYPE {prefix}_run_timestamp_seconds gauge',
+            f'{prefix}_run_timestamp_seconds {self.start:.3f}'
+        ])
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, filename):
+        # the textfile collector may read the file at any time, so the file is
+        # written under a temporary name and then renamed.
+
+        tmp_filename = f'{filename}.{threading.get_ident()}.tmp'
+        with open(tmp_filename, 'w+') as ofile:
+            ofile.write(self.prometheus_text())
+
+        os.replace(tmp_filename, filename)
+
+    def summary_table(self):
+        """ Returns the phase summary as table rows, for use with tabulate """
+        return [
+            [phase, stats['count'], stats['errors']] + [
+                f'{stats[f"p{pct}"]:.3f}' for pct in self.PERCENTILES
+            ] + [f'{stats["max"]:.3f}', f'{stats["total"]:.3f}']
+            for phase, stats in sorted(self.summary().items(),
+                                       key=lambda item: item[1]['total'], reverse=True)
+        ]
+
+    def summary_headers(self):
+        return ['Phase', 'Count', 'Errors'] + [
+            f'p{pct} (s)' for pct in self.PERCENTILES
+        ] + ['Max (s)', 'Total (s)']
+
+
+# the tracer used by the instrumented code; disabled unless enable_tracing()
+# is called.
+
+_tracer = Tracer(enabled=False)
+
+
+def get_tracer():
+    return _tracer
+
+
+def enable_tracing():
+    """ Enable the tracer and return it """
+    global _tracer
+    _tracer = Tracer(enabled=True)
+    return _tracer
+
+
+def span(phase, host=None, **attrs):
+    """ Record the with-block duration using the current tracer """
+    return _tracer.span(phase, host=host, **attrs)
+
+
+def record(phase, duration, host=None, ok=True, **attrs):
+    """ Record the phase duration using the current tracer """
+    _tracer.record(phase, duration, host=host, ok=ok, **attrs)
+
+
+def print_trace_report(tracer, json_file=None, prom_file=None, n_hosts=10):
+    """
+    Print the phase percentile summary and the slowest hosts, and write the
+    JSON report and Prometheus textfile when the filenames are given.
+    """
+    from tabulate import tabulate
+
+    if json_file:
+        tracer.write_json(json_file)
+
+    if prom_file:
+        tracer.write_prometheus(prom_file)
+
+    print("\nTIMING SUMMARY:\n")
+    print(tabulate(headers=tracer.summary_headers(), tabular_data=tracer.summary_table()))
+
+    slowest = tracer.slowest_hosts(count=n_hosts)
+    if slowest:
+        print(f"\nSLOWEST {len(slowest)} HOSTS:\n")
+        print(tabulate(
+            headers=['Host', 'Duration (s)', 'Phases (s)'],
+            tabular_data=[
+                [host, f'{duration:.3f}', ', '.join(
+                    f'{phase}={value:.3f}' for phase, value in
+                    sorted(phases.items(), key=lambda item: item[1], reverse=True)
+                )]
+                for host, duration, phases in slowest
+            ]
+        ))
+
+    for filename in filter(None, (json_file, prom_file)):
+        print(f"\nTIMING REPORT: {filename}")
+
+
+def aiohttp_trace_config(prefix):
+    """
+    Returns an aiohttp TraceConfig that records the "<prefix>.connect" phase
+    for each new connection (TCP and TLS), and the "<prefix>.request" phase
+    for each request, using the current tracer.  The phase host is the URL
+    host, unless the request is made with trace_request_ctx=dict(host=name).
+    """
+    import aiohttp
+
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_request_start(session, trace_ctx, params):
+        trace_ctx.t0 = time.perf_counter()
+        trace_ctx.host = (trace_ctx.trace_request_ctx or {}).get('host') or params.url.host
+
+    async def on_connection_create_start(session, trace_ctx, params):
+        trace_ctx.t_conn = time.perf_counter()
+
+    async def on_connection_create_end(session, trace_ctx, params):
+        record(f'{prefix}.connect', time.perf_counter() - trace_ctx.t_conn,
+               host=trace_ctx.host)
+
+    async def on_request_end(session, trace_ctx, params):
+        record(f'{prefix}.request', time.perf_counter() - trace_ctx.t0,
+               host=trace_ctx.host, path=params.url.path,
+               status=params.response.status)
+
+    async def on_request_exception(session, trace_ctx, params):
+        record(f'{prefix}.request', time.perf_counter() - trace_ctx.t0,
+               host=trace_ctx.host, ok=False, path=params.url.path,
+               error=type(params.exception).__name__)
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
+
+
+class TracingProcessor(object):
+    """
+    Nornir processor that records the "task" phase for each host, and a phase
+    for each subtask, for example "write_file", using the current tracer.
+    """
+
+    def __init__(self):
+        self._starts = dict()
+        self._lock = threading.Lock()
+
+    def _start(self, task, host):
+        with self._lock:
+            self._starts[(id(task), host.name)] = time.perf_counter()
+
+    def _end(self, phase, task, host, result):
+        with self._lock:
+            t0 = self._starts.pop((id(task), host.name), None)
+        if t0 is not None:
+            record(phase, time.perf_counter() - t0, host=host.name, ok=not result.failed,
+                   task=task.name)
+
+    def task_started(self, task):
+        pass
+
+    def task_completed(self, task, result):
+        pass
+
+    def task_instance_started(self, task, host):
+        self._start(task, host)
+
+    def task_instance_completed(self, task, host, result):
+        self._end('task', task, host, result)
+
+    def subtask_instance_started(self, task, host):
+        self._start(task, host)
+
+    def subtask_instance_completed(self, task, host, result):
+        self._end(task.name, task, host, result)
@@ -24,5 +24,12 @@ setup(
     author='Jeremy Schulman',
     packages=find_packages(),
     install_requires=requirements(),
-    scripts=[str(script) for script in Path('bin').iterdir()]
+    extras_require={
+        'zstd': ['zstandard'],
+        'parquet': ['pyarrow']
+    },
+    scripts=[str(script) for script in Path('bin').iterdir()],
+    entry_points={
+        'console_scripts': ['cvp = cvppyez.cli:main']
+    }
 )
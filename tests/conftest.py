@@ -0,0 +1,39 @@
+import shutil
+import socket
+import subprocess
+
+import pytest
+from nornir.core import Nornir
+from nornir.core.deserializer.inventory import Inventory
+from nornir.core.deserializer.configuration import Config
+
+
+def make_nornir(hostnames, **defaults):
+    """
+    Returns the Nornir instance with the `hostnames` inventory; the host
+    attributes not set by the `defaults` are the nornir defaults.
+    """
+    return Nornir(inventory=Inventory.deserialize(
+        hosts=dict.fromkeys(hostnames, {}), groups={}, defaults=defaults
+    ), config=Config.deserialize())
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope='session')
+def stub_cert(tmp_path_factory):
+    """ Returns the (certfile, keyfile) of a self-signed certificate for the stubs """
+    if not shutil.which('openssl'):
+        pytest.skip('openssl is not available')
+
+    workdir = tmp_path_factory.mktemp('cert')
+    certfile, keyfile = workdir / 'cert.pem', workdir / 'key.pem'
+    subprocess.run([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+        '-subj', '/CN=localhost', '-keyout', str(keyfile), '-out', str(certfile)
+    ], check=True, capture_output=True)
+    return str(certfile), str(keyfile)
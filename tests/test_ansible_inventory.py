@@ -0,0 +1,41 @@
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from cvppyez.ansible import cvp_inventory
+
+DEVICES = [dict(fqdn='sw1.lab', ipAddress='10.0.0.1'), dict(fqdn='sw2.lab', ipAddress='10.0.0.2')]
+
+
+def test_write_inventory():
+    ofile = io.StringIO()
+    cvp_inventory.write_inventory(ofile, DEVICES, groups={
+        cvp_inventory.group_name('pod:pod1'): ['sw2.lab', 'sw9.lab']
+    })
+    inventory = json.loads(ofile.getvalue())
+
+    assert inventory['_meta']['hostvars']['sw1.lab'] == dict(ansible_host='10.0.0.1',
+                                                             ansible_network_os='eos')
+    assert inventory['pod_pod1'] == dict(hosts=['sw2.lab'])
+    assert inventory['all'] == dict(children=['ungrouped', 'pod_pod1'],
+                                    hosts=['sw1.lab', 'sw2.lab'])
+
+
+def test_refresh_cache_once(tmp_path, monkeypatch):
+    builds = list()
+
+    def build_inventory(ofile):
+        builds.append(1)
+        cvp_inventory.write_inventory(ofile, DEVICES, groups={})
+
+    monkeypatch.setattr(cvp_inventory, 'build_inventory', build_inventory)
+    path = str(tmp_path / 'cache' / 'inventory.json')
+
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda n: cvp_inventory.refresh_cache(path, ttl=60), range(4)))
+
+    assert len(builds) == 1
+    assert cvp_inventory.is_fresh(path, ttl=60)
+
+    cvp_inventory.refresh_cache(path, ttl=60, force=True)
+    assert len(builds) == 2
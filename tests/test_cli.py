@@ -0,0 +1,122 @@
+import os
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from cvppyez.cli.main import cli, COMMANDS
+
+# the packages that the programs import only to run a command; the help and
+# the usage errors must not import them.
+
+HEAVY_MODULES = ('nornir', 'napalm', 'aiohttp', 'tabulate', 'alive_progress', 'yaml', 'maya')
+
+# the import time of `cvp <command> --help`, excluding the interpreter
+# startup; the heavy packages alone are over a second.
+
+IMPORT_BUDGET_MS = 150
+
+RUN_CLI = """
+import sys, json
+from cvppyez.cli.main import cli
+try:
+    cli(sys.argv[1:], prog_name='cvp')
+except SystemExit:
+    pass
+print(json.dumps(sorted(sys.modules)))
+"""
+
+REPO_DIR = Path(__file__).parent.parent
+
+CVP_ENV = dict(CVP_SERVER='cvp.test', CVP_USER='user', CVP_PASSWORD='password')
+
+
+def run_cli(*args, env=None, python_opts=()):
+    """ Run the cvp program in a new interpreter, returns (modules, stderr) """
+    res = subprocess.run([sys.executable, *python_opts, '-c', RUN_CLI, *args],
+                         capture_output=True, text=True, cwd=REPO_DIR,
+                         env=dict(os.environ, **(env or {})))
+    return set(json.loads(res.stdout.splitlines()[-1])), res.stderr
+
+
+def import_time_ms(*args):
+    """
+    Returns the import time, in milliseconds, of the cvp program run with
+    `args`; the modules imported by the interpreter startup are excluded.
+    """
+    def top_level_imports(stderr):
+        imports = dict()
+        for line in stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line.split('|')
+            if not name.startswith('  '):
+                imports[name.strip()] = int(cumulative)
+        return imports
+
+    startup = top_level_imports(subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'pass'], capture_output=True, text=True
+    ).stderr)
+
+    _, stderr = run_cli(*args, python_opts=('-X', 'importtime'))
+    return sum(usec for name, usec in top_level_imports(stderr).items()
+               if name not in startup) / 1000
+
+
+@pytest.mark.parametrize('args', [
+    ['--help'],
+    *[[name, '--help'] for name in COMMANDS],
+    ['find-host', 'mac', '--help'],
+    ['get', 'run', '--help'],
+    ['daemon', 'start', '--help']
+])
+def test_help_does_not_import_heavy_modules(args):
+    modules, _ = run_cli(*args)
+    assert not {name.partition('.')[0] for name in modules} & set(HEAVY_MODULES)
+
+    # only the subcommand that is run is imported
+    lazy_modules = {module.partition(':')[0] for module, _ in COMMANDS.values()}
+    wanted = {COMMANDS[args[0]][0].partition(':')[0]} if args[0] in COMMANDS else set()
+    assert modules & lazy_modules == wanted
+
+
+def test_usage_error_does_not_import_heavy_modules():
+    modules, stderr = run_cli('find-host', 'mac', 'not-a-macaddr', env=CVP_ENV)
+    assert 'is not a valid MAC address' in stderr
+    assert not {name.partition('.')[0] for name in modules} & set(HEAVY_MODULES)
+
+
+def test_tracing_does_not_import_heavy_modules():
+    # the library modules import tracing.span, so only the report and the
+    # aiohttp tracing import their packages.
+    res = subprocess.run([sys.executable, '-c', 'import sys, json, cvppyez.tracing; '
+                          'print(json.dumps(sorted(sys.modules)))'],
+                         capture_output=True, text=True, cwd=REPO_DIR, check=True)
+    modules = set(json.loads(res.stdout))
+    assert not {name.partition('.')[0] for name in modules} & set(HEAVY_MODULES)
+
+
+@pytest.mark.parametrize('args', [['--help'], ['get', 'run', '--help']])
+def test_import_time_budget(args):
+    run_cli(*args)                          # compile the modules first
+    elapsed = min(import_time_ms(*args) for _ in range(3))
+    assert elapsed < IMPORT_BUDGET_MS, f'{elapsed:.0f}ms import time'
+
+
+def test_group_help_lists_commands():
+    res = CliRunner().invoke(cli, ['--help'])
+    assert res.exit_code == 0
+    for name, (_, short_help) in COMMANDS.items():
+        assert f'{name}  ' in res.output and short_help in res.output
+
+
+def test_missing_environment(monkeypatch):
+    for ev_name in CVP_ENV:
+        monkeypatch.delenv(ev_name, raising=False)
+
+    res = CliRunner().invoke(cli, ['get', 'configs'])
+    assert res.exit_code == 2
+    assert 'Missing Environment variable' in res.output
@@ -0,0 +1,79 @@
+import asyncio
+
+from pyeapi.eapilib import CommandError
+
+from cvppyez.commands import run_commands_batched, arun_commands_batched, CommandPlan
+
+
+class FakeDevice(object):
+    """ Runs the commands as the eAPI does, stopping at the first 'bad' command """
+
+    def __init__(self, with_output=True):
+        self.with_output = with_output
+        self.calls = 0
+
+    def run_commands(self, commands, encoding='json'):
+        self.calls += 1
+        outputs = [{}]
+        for command in commands:
+            if command.startswith('bad'):
+                raise CommandError(1002, f"'{command}' failed",
+                                   output=outputs + [dict(errors=['invalid'])]
+                                   if self.with_output else None)
+            outputs.append(dict(command=command))
+        return outputs[1:]
+
+
+COMMANDS = ['show 1', 'bad 2', 'show 3', 'bad 4', 'show 5']
+
+
+def check_results(results):
+    assert [ok for ok, _ in results] == [True, False, True, False, True]
+    assert results[2] == (True, dict(command='show 3'))
+
+
+def test_run_commands_batched_resumes_after_failure():
+    dev = FakeDevice()
+    check_results(run_commands_batched(dev, COMMANDS, batch_size=50))
+    assert dev.calls == 3
+
+
+def test_run_commands_batched_without_error_output():
+    dev = FakeDevice(with_output=False)
+    check_results(run_commands_batched(dev, COMMANDS, batch_size=50))
+    assert dev.calls == 1 + len(COMMANDS)
+
+
+def test_arun_commands_batched_resumes_after_failure():
+    dev = FakeDevice()
+
+    class FakeEapi(object):
+        async def run_commands(self, commands, encoding='json'):
+            return dev.run_commands(commands, encoding)
+
+    check_results(asyncio.run(arun_commands_batched(FakeEapi(), COMMANDS, batch_size=2)))
+    assert dev.calls == 3
+
+
+def test_command_plan_errors():
+    plan = CommandPlan([dict(name='one', command='show 1'), dict(name='two', command='bad 2'),
+                        dict(name='again', command='bad 2')])
+    outputs = plan.execute(FakeDevice())
+
+    assert outputs['one'] == dict(command='show 1')
+    assert set(CommandPlan.errors(outputs)) == {'two', 'again'}
+
+
+def test_command_plan_known_outputs():
+    plan = CommandPlan([dict(name='mac', command='show mac address-table'),
+                        dict(name='one', command='show 1')])
+    known = {('show mac address-table', 'json'): dict(unicastTable={})}
+    dev = FakeDevice()
+
+    assert plan.execute(dev, known) == dict(mac=dict(unicastTable={}),
+                                            one=dict(command='show 1'))
+    assert dev.calls == 1
+
+    known[('show 1', 'json')] = dict(command='known')
+    assert plan.remaining(known) == {}
+    assert plan.execute(None, known)['one'] == dict(command='known')
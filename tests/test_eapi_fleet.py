@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from pyeapi.eapilib import CommandError
+from nornir.core.exceptions import NornirExecutionError
+
+from cvppyez.eapi import EapiFleet
+from cvppyez.eapi.stub import EapiStub
+from cvppyez.eapi.config import apush_config
+
+from conftest import make_nornir, free_port
+
+
+class RecordingProcessor(object):
+    def __init__(self):
+        self.events = list()
+
+    def task_started(self, task):
+        self.events.append(('started', task.name))
+
+    def task_completed(self, task, result):
+        self.events.append(('completed', task.name, len(result)))
+
+    def task_instance_started(self, task, host):
+        self.events.append(('host_started', host.name))
+
+    def task_instance_completed(self, task, host, result):
+        self.events.append(('host_completed', host.name, result.failed))
+
+
+async def aio_task_version(task, command='show version'):
+    return (await task.eapi.run_commands([command]))[0]['version']
+
+
+def run_fleet(nr, task, **kwargs):
+    async def run():
+        stub = await EapiStub().start(port=port)
+        try:
+            async with EapiFleet(transport='http') as fleet:
+                return await fleet.run(nr, task, **kwargs)
+        finally:
+            await stub.stop()
+
+    port = free_port()
+    nr.inventory.defaults.port = port
+    return asyncio.run(run())
+
+
+def make_fleet_nornir(hostnames):
+    return make_nornir(hostnames, hostname='127.0.0.1', username='admin', password='admin')
+
+
+def test_fleet_run():
+    nr = make_fleet_nornir(['sw1', 'sw2', 'sw3'])
+    processor = RecordingProcessor()
+    nr = nr.with_processors([processor])
+
+    res = run_fleet(nr, aio_task_version)
+
+    assert not res.failed
+    assert {host: h_res.result for host, h_res in res.items()} == dict.fromkeys(
+        ['sw1', 'sw2', 'sw3'], '4.22.0F')
+    assert processor.events[0] == ('started', 'aio_task_version')
+    assert processor.events[-1] == ('completed', 'aio_task_version', 3)
+    assert sorted(event[1] for event in processor.events if event[0] == 'host_completed') == [
+        'sw1', 'sw2', 'sw3']
+
+
+def test_fleet_run_failed_hosts():
+    nr = make_fleet_nornir(['sw1', 'sw2'])
+
+    res = run_fleet(nr, aio_task_version, command='show bogus')
+    assert set(res.failed_hosts) == {'sw1', 'sw2'}
+    assert isinstance(res['sw1'].exception, CommandError)
+    assert set(nr.data.failed_hosts) == {'sw1', 'sw2'}
+
+    # the failed hosts are skipped unless on_failed
+
+    assert len(run_fleet(nr, aio_task_version)) == 0
+    assert not run_fleet(nr, aio_task_version, on_failed=True).failed
+
+    with pytest.raises(NornirExecutionError):
+        run_fleet(nr, aio_task_version, command='show bogus', on_failed=True,
+                  raise_on_error=True)
+
+
+def test_push_config_abort_failure_keeps_error():
+    class FailingEapi(object):
+        async def run_commands(self, commands, encoding='json'):
+            if commands[-1].endswith('abort'):
+                raise ConnectionError('abort failed')
+            raise CommandError(1002, 'invalid command')
+
+    with pytest.raises(CommandError):
+        asyncio.run(apush_config(FailingEapi(), 'bogus config', dry_run=True))
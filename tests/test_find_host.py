@@ -0,0 +1,34 @@
+import asyncio
+import threading
+
+from cvppyez.tasks import find_host
+
+
+def test_found_macaddrs_holds_until_first_hit():
+    found = find_host.FoundMacaddrs(max_probes=1)
+    assert found.acquire() == ([], True)
+
+    waiter = dict()
+    thread = threading.Thread(target=lambda: waiter.update(res=found.acquire()))
+    thread.start()
+    thread.join(0.1)
+    assert thread.is_alive()
+
+    found.add(['00:1c:73:00:00:01'])
+    thread.join(1)
+    assert waiter['res'] == (['00:1c:73:00:00:01'], False)
+
+
+def test_found_macaddrs_async_probe_released():
+    async def run():
+        found = find_host.FoundMacaddrs(max_probes=1)
+        assert await found.aacquire() == ([], True)
+
+        waiter = asyncio.ensure_future(found.aacquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+
+        found.release(True)
+        assert await asyncio.wait_for(waiter, 1) == ([], True)
+
+    asyncio.run(run())
@@ -0,0 +1,30 @@
+from cvppyez.hostindex import HostIndex
+
+
+MAC_TABLE = dict(unicastTable=dict(tableEntries=[
+    dict(macAddress='00:1c:73:00:00:01', vlanId=10, interface='Ethernet1', entryType='dynamic')
+]))
+
+ARP_TABLE = dict(ipV4Neighbors=[
+    dict(address='10.0.0.1', hwAddress='00:1c:73:00:00:01', interface='Vlan10')
+])
+
+
+def test_lookup(tmp_path):
+    index = HostIndex(str(tmp_path / 'hosts.db'))
+    assert index.update_device('sw1', MAC_TABLE, ARP_TABLE) is True
+    assert index.update_device('sw1', MAC_TABLE, ARP_TABLE) is False
+
+    found = index.find_macaddrs(['001c.7300.0001'])
+    assert [(item['hostname'], item['interface']) for item in found] == [('sw1', 'Ethernet1')]
+
+    found = index.find_ipaddrs(['10.0.0.1', '10.0.0.2'])
+    assert [item['macaddr'] for item in found] == ['00:1c:73:00:00:01']
+
+
+def test_lookup_ends_transaction(tmp_path):
+    index = HostIndex(str(tmp_path / 'hosts.db'))
+    index.update_device('sw1', MAC_TABLE, ARP_TABLE)
+    index.find_macaddrs(['00:1c:73:00:00:01'])
+
+    assert not index.db.in_transaction
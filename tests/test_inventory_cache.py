@@ -0,0 +1,49 @@
+import time
+
+from cvppyez.nornir.inventory_cache import InventoryCache
+
+
+def wait_for(func, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if func():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_fresh_cache_is_used(tmp_path):
+    cache = InventoryCache(key=dict(server='cvp'), ttl=300, cache_dir=tmp_path)
+    cache.save(dict(hosts=dict(sw1={})))
+
+    assert cache.get(lambda: dict(hosts={})) == dict(hosts=dict(sw1={}))
+
+
+def test_serve_stale_does_not_wait_for_refresh(tmp_path):
+    cache = InventoryCache(key=dict(server='cvp'), ttl=0, cache_dir=tmp_path)
+    cache.save(dict(hosts=dict(old={})))
+
+    def slow_build():
+        time.sleep(1)
+        return dict(hosts=dict(new={}))
+
+    t0 = time.monotonic()
+    assert cache.get(slow_build, serve_stale=True) == dict(hosts=dict(old={}))
+    assert time.monotonic() - t0 < 0.5
+
+    assert wait_for(lambda: cache.load()[0] == dict(hosts=dict(new={})))
+
+
+def test_failed_refresh_keeps_cache(tmp_path, capfd):
+    cache = InventoryCache(key=dict(server='cvp'), ttl=0, cache_dir=tmp_path)
+    cache.save(dict(hosts=dict(old={})))
+
+    def failed_build():
+        raise RuntimeError('CVP unreachable')
+
+    assert cache.get(failed_build, serve_stale=True) == dict(hosts=dict(old={}))
+    assert cache.refresh(failed_build) is None
+    assert cache.load()[0] == dict(hosts=dict(old={}))
+
+    out, err = capfd.readouterr()
+    assert 'Traceback' not in out + err
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from nornir.core.inventory import Host, ParentGroups
+
+from cvppyez.matcher import parse_select, SelectTerm
+from cvppyez.nornir.inventory_index import InventoryIndex, filter_hosts
+from cvppyez.nornir.plugin_inventory import host_data
+from cvppyez.rest.stub import synthetic_devices
+
+from conftest import make_nornir
+
+
+def make_hosts(n_devices):
+    return {
+        dev['fqdn']: Host(dev['fqdn'], hostname=dev['ipAddress'], data=host_data(dev),
+                          groups=ParentGroups([f"pod:{dev['pod']}", f"rack:{dev['rack']}"]))
+        for dev in synthetic_devices(n_devices)
+    }
+
+
+def select(index, *specs, use_regex=False):
+    return index.select([parse_select(spec, use_regex=use_regex) for spec in specs])
+
+
+def test_select_fields():
+    index = InventoryIndex(make_hosts(200))
+
+    assert len(select(index)) == 200
+    assert select(index, 'serial=SN00000007') == {'sw00007.bench.local'}
+    assert select(index, 'serial=SN99999999') == set()
+    assert len(select(index, 'model=DCS-7280*')) == 20
+    assert len(select(index, 'group=pod:pod1')) == 100
+
+    # the patterns of a term are ORed, the terms are ANDed.
+
+    assert len(select(index, 'group=rack:rack0,rack:rack1')) == 20
+    assert select(index, 'model=DCS-7280*', 'group=rack:rack0,rack:rack1') == {
+        'sw00000.bench.local', 'sw00010.bench.local'
+    }
+    assert select(index, 'name=sw0001[0-2]*', 'version=4.22.*') == {
+        'sw00010.bench.local', 'sw00011.bench.local', 'sw00012.bench.local'
+    }
+
+
+def test_select_regex():
+    index = InventoryIndex(make_hosts(200))
+
+    assert len(select(index, 'model=dcs-72', use_regex=True)) == 20
+    assert select(index, 'name=sw0000[1-3]', 'status=act', use_regex=True) == {
+        'sw00001.bench.local', 'sw00002.bench.local', 'sw00003.bench.local'
+    }
+
+    term = SelectTerm('name', ['sw00001', 'sw00002'], use_regex=False)
+    assert index.lookup(term) == set()
+
+
+def test_parse_select():
+    assert parse_select('model=DCS-7050*, DCS-7280*') == SelectTerm(
+        'model', ['DCS-7050*', 'DCS-7280*'], False)
+    assert parse_select('name=(sp|tr).*,x', use_regex=True) == SelectTerm(
+        'name', ['(sp|tr).*,x'], True)
+
+    for spec in ('vendor=arista', 'model=', 'model'):
+        with pytest.raises(ValueError):
+            parse_select(spec)
+
+    with pytest.raises(ValueError):
+        parse_select('name=sw[', use_regex=True)
+
+
+def test_filter_hosts():
+    nr = make_nornir([f'sw{n}' for n in range(1, 6)])
+    nr_sel = filter_hosts(nr, {'sw4', 'sw2', 'sw9'})
+
+    assert list(nr_sel.inventory.hosts) == ['sw2', 'sw4']
+    assert len(nr.inventory.hosts) == 5
+    assert nr_sel.run(task=lambda task: task.host.name)['sw4'].result == 'sw4'
+
+
+def test_select_large_inventory():
+    index = InventoryIndex(make_hosts(50000))
+    terms = [parse_select('model=DCS-7280*'), parse_select('group=pod:pod4*')]
+
+    start = time.perf_counter()
+    selected = index.select(terms)
+    elapsed = time.perf_counter() - start
+
+    assert len(selected) == 1110
+    assert elapsed < 0.05
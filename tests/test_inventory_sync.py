@@ -0,0 +1,65 @@
+import asyncio
+
+from cvppyez.rest import AsyncCVPRestClient
+from cvppyez.rest.stub import CvpStub, ssl_context
+from cvppyez.nornir.inventory_sync import InventorySync
+
+from conftest import free_port
+
+
+def run_with_stub(stub, stub_cert, func):
+    async def run():
+        port = free_port()
+        await stub.start(port=port, ssl_context=ssl_context(*stub_cert))
+        try:
+            async with AsyncCVPRestClient(server=f'127.0.0.1:{port}', username='cvp',
+                                          password='cvp') as cvp:
+                return await func(cvp)
+        finally:
+            await stub.stop()
+
+    return asyncio.run(run())
+
+
+def test_inventory_sync(stub_cert):
+    stub = CvpStub(n_devices=20)
+    inv_sync = InventorySync(groupby_tags=['pod'], warn=lambda msg: None)
+
+    async def check(cvp):
+        assert len(await inv_sync.sync(cvp)) == 20
+        assert inv_sync.hosts['sw00003.bench.local'] == dict(
+            hostname='127.0.0.1', groups=['pod:pod0'],
+            data=dict(serial='SN00000003', model='DCS-7050SX3-48YC8', version='4.22.0F',
+                      status='Registered')
+        )
+        assert await inv_sync.sync(cvp) == set()
+
+        stub.set_status('SN00000003', 'inactive')
+        stub.remove_device('SN00000004')
+        added = stub.add_devices(2)
+        n_requests = stub.n_requests
+
+        assert await inv_sync.sync(cvp) == {
+            'sw00003.bench.local', 'sw00004.bench.local', added[0]['fqdn'], added[1]['fqdn']}
+
+        # the dataset changes, and a lookup for each of the new devices
+        assert stub.n_requests - n_requests == 3
+
+        assert len(inv_sync.hosts) == 20
+        assert 'sw00003.bench.local' not in inv_sync.hosts
+        assert inv_sync.hosts[added[0]['fqdn']] == dict(
+            hostname='127.0.0.1',
+            data=dict(serial='SN00000020', model='DCS-7280CR3-32P4', version='4.22.0F',
+                      status='Registered')
+        )
+        assert inv_sync.last_ts == stub.timestamp
+
+        stub.set_status('SN00000003', 'active')
+        assert await inv_sync.sync(cvp) == {'sw00003.bench.local'}
+
+        # the full sync agrees with the incremental syncs
+        hosts = dict(inv_sync.hosts)
+        await inv_sync.sync(cvp, full=True)
+        assert set(inv_sync.hosts) == set(hosts)
+
+    run_with_stub(stub, stub_cert, check)
@@ -0,0 +1,66 @@
+import asyncio
+
+from cvppyez.planner import TelemetryPlanner, TelemetryQuery
+from cvppyez.rest import AsyncCVPRestClient
+from cvppyez.rest.stub import CvpStub, ssl_context
+from cvppyez.tasks.find_host import parse_arp_entries, parse_mac_entries
+
+from conftest import free_port
+from test_inventory_index import make_hosts
+
+
+def test_planner_query():
+    query = TelemetryPlanner.query
+
+    assert query('show mac address-table') == TelemetryQuery('mac', None)
+    assert query('show  mac address-table address 001C.7300.0001') == TelemetryQuery(
+        'mac', '00:1c:73:00:00:01')
+    assert query('show ip arp 10.0.0.1') == TelemetryQuery('arp', '10.0.0.1')
+    assert query('show interfaces status') == TelemetryQuery('interfaces', None)
+
+    assert query('show ip arp vrf all') is None
+    assert query('show mac address-table', encoding='text') is None
+    assert query('show version') is None
+
+
+def test_planner_execute(stub_cert):
+    stub = CvpStub(n_devices=5)
+    stub.no_telemetry.add('SN00000003')
+    hosts = make_hosts(5)
+
+    commands = ['show mac address-table address 00:1c:73:00:02:01', 'show ip arp 10.0.4.1',
+                'show interfaces status', 'show mac address-table']
+
+    async def run():
+        port = free_port()
+        await stub.start(port=port, ssl_context=ssl_context(*stub_cert))
+        try:
+            async with AsyncCVPRestClient(server=f'127.0.0.1:{port}', username='cvp',
+                                          password='cvp') as cvp:
+                n_requests = stub.n_requests
+                found = await TelemetryPlanner(cvp).aexecute(hosts, commands)
+
+                # the devices dataset, and each source once for each device
+                assert stub.n_requests - n_requests == 1 + 3 * 5
+                return found
+
+        finally:
+            await stub.stop()
+
+    found = asyncio.run(run())
+
+    assert found.uncovered == {'sw00003.bench.local'}
+    assert len(found.outputs) == 4
+
+    mac_found = {
+        hostname: parse_mac_entries(h_outputs[commands[0]], all_ports=False)
+        for hostname, h_outputs in found.outputs.items()
+    }
+    assert mac_found == {'sw00000.bench.local': None, 'sw00001.bench.local': None,
+                         'sw00002.bench.local': [(10, 'Ethernet1')], 'sw00004.bench.local': None}
+
+    outputs = found.outputs['sw00004.bench.local']
+    assert parse_arp_entries(outputs[commands[1]]) == [('00:1c:73:00:04:01', 'Vlan10')]
+    assert len(outputs[commands[3]]['unicastTable']['tableEntries']) == 1
+    assert outputs[commands[2]]['interfaceStatuses'] == dict(
+        Ethernet1=dict(linkStatus='connected'), Ethernet2=dict(linkStatus='notconnect'))
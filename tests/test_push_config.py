@@ -0,0 +1,197 @@
+import asyncio
+
+import pytest
+from pyeapi.eapilib import CommandError
+from nornir.core.deserializer.inventory import Inventory
+
+from cvppyez.eapi.config import push_config, apush_config
+from cvppyez.rollout import ConfigHashes, parse_waves, plan_waves, plan_group_waves, run_waves
+
+from conftest import make_nornir
+
+CONFIG = """
+! banner
+hostname sw1
+interface Ethernet1
+   description uplink
+"""
+
+
+class FakeDevice(object):
+    """ Runs the configuration session commands as the eAPI does """
+
+    def __init__(self, pending=(), max_pending=None, diff='+hostname sw1'):
+        self.sessions = {name: dict(state='pending') for name in pending}
+        self.max_pending = max_pending
+        self.diff = diff
+        self.requests = list()
+
+    def run_commands(self, commands, encoding='json'):
+        self.requests.append((commands, encoding))
+        outputs = [{}]
+
+        for command in commands:
+            if command == 'show configuration sessions':
+                output = dict(sessions=dict(self.sessions))
+            elif command.startswith('show session-config'):
+                output = dict(output=f'--- system:/running-config\n+++ session\n{self.diff}')
+            elif command.startswith('configure session') and command.endswith(' abort'):
+                self.sessions.pop(command.split()[2], None)
+                output = {}
+            elif command.startswith('configure session'):
+                name = command.split()[2]
+                if name not in self.sessions and len(self.sessions) == self.max_pending:
+                    raise CommandError(1002, 'maximum number of pending sessions',
+                                       output=outputs + [dict(errors=['limit'])])
+                self.sessions[name] = dict(state='pending')
+                output = {}
+            else:
+                output = {}
+
+            if encoding == 'text' and 'output' not in output:
+                output = dict(output='')
+            outputs.append(output)
+
+        return outputs[1:]
+
+
+def test_push_config_dry_run():
+    dev = FakeDevice(pending=['old'])
+    session = push_config(dev, CONFIG, dry_run=True)
+
+    assert session.diff == '+hostname sw1'
+    assert session.aborted == []
+    assert len(dev.requests) == 2
+    assert dev.requests[0][0][2:] == ['hostname sw1', 'interface Ethernet1',
+                                      'description uplink', 'end']
+    assert dev.requests[1][0] == [f'show session-config named {session.name} diffs',
+                                  f'configure session {session.name} abort']
+
+    # the pending session of another operator is left alone
+    assert list(dev.sessions) == ['old']
+
+
+def test_push_config_commit():
+    dev = FakeDevice()
+
+    class FakeEapi(object):
+        async def run_commands(self, commands, encoding='json'):
+            return dev.run_commands(commands, encoding)
+
+    session = asyncio.run(apush_config(FakeEapi(), CONFIG, dry_run=False))
+
+    assert session.diff == '+hostname sw1'
+    assert len(dev.requests) == 3
+    assert dev.requests[2] == ([
+        'copy startup-config flash:rollback-0',
+        f'configure session {session.name}',
+        'hostname sw1', 'interface Ethernet1', 'description uplink',
+        'commit',
+        'write memory'
+    ], 'text')
+
+
+def test_push_config_no_diff_not_committed():
+    dev = FakeDevice(pending=['old'], diff='')
+    session = push_config(dev, CONFIG, dry_run=False)
+
+    assert session.diff == ''
+    assert len(dev.requests) == 2
+    assert not any(command in ('commit', 'write memory') or command.startswith('copy')
+                   for commands, _ in dev.requests for command in commands)
+    assert list(dev.sessions) == ['old']
+
+
+def test_push_config_pending_session_limit():
+    dev = FakeDevice(pending=['old1', 'old2'], max_pending=2)
+    session = push_config(dev, CONFIG, dry_run=True)
+
+    # the first request fails, the pending sessions are aborted and the first
+    # request is run again.
+
+    assert len(dev.requests) == 4
+    assert session.aborted == ['old1', 'old2']
+    assert session.diff == '+hostname sw1'
+    assert not dev.sessions
+
+
+def test_push_config_failure_aborts_session():
+    dev = FakeDevice(max_pending=0)
+
+    with pytest.raises(CommandError):
+        push_config(dev, CONFIG, dry_run=False)
+
+    assert len(dev.requests) == 2
+    assert dev.requests[1][0][-1].endswith(' abort')
+
+
+def test_parse_waves():
+    assert parse_waves('1, 10%,100%') == [(1, False), (10, True), (100, True)]
+
+    for spec in ('0', '10x', '120%'):
+        with pytest.raises(RuntimeError):
+            parse_waves(spec)
+
+
+def test_plan_waves():
+    hostnames = [f'sw{n:02}' for n in range(20)]
+
+    waves = plan_waves(reversed(hostnames), parse_waves('1,10%,50%'))
+    assert waves == [hostnames[:1], hostnames[1:2], hostnames[2:10], hostnames[10:]]
+    assert plan_waves(hostnames, []) == [hostnames]
+
+
+def test_plan_group_waves():
+    # the hosts of the inventory have the group names
+    inventory = Inventory.deserialize(hosts=dict(
+        sw1=dict(groups=['site-a']), sw2=dict(), sw3=dict(groups=['lab']),
+        sw4=dict(groups=['site-a'])
+    ), groups=dict.fromkeys(['lab', 'site-a'], {}), defaults={})
+
+    assert plan_group_waves(inventory.hosts, ['lab', 'site-a']) == [
+        ['sw3'], ['sw1', 'sw4'], ['sw2']]
+    assert plan_group_waves(inventory.hosts, ['*', 'lab']) == [
+        ['sw1', 'sw2', 'sw4'], ['sw3']]
+
+
+def test_run_waves_halts_on_failures():
+    nr = make_nornir([f'sw{n}' for n in range(1, 8)])
+
+    def task_fail_sw2(task):
+        if task.host.name == 'sw2':
+            raise RuntimeError('push failed')
+
+    waves = [['sw1'], ['sw2', 'sw3'], ['sw4', 'sw5', 'sw6', 'sw7']]
+    messages = list()
+
+    res, halted = run_waves(nr, waves, lambda nr_wave: nr_wave.run(task=task_fail_sw2),
+                            max_failures=50, warn=messages.append)
+    assert sorted(res) == [f'sw{n}' for n in range(1, 8)]
+    assert not halted
+
+    res, halted = run_waves(nr, waves, lambda nr_wave: nr_wave.run(task=task_fail_sw2,
+                                                                   on_failed=True),
+                            max_failures=10, warn=messages.append)
+    assert sorted(res) == ['sw1', 'sw2', 'sw3']
+    assert halted == ['sw4', 'sw5', 'sw6', 'sw7']
+    assert messages[-1] == 'WARNING: rollout halted, 4 devices not configured'
+
+
+def test_config_hashes(tmp_path):
+    hash_file = tmp_path / 'hashes.json'
+    hashes = ConfigHashes(hash_file)
+    digest = hashes.digest(CONFIG)
+
+    # comments and blank lines do not change the hash
+    assert digest == hashes.digest('hostname sw1\n\ninterface Ethernet1\n description uplink')
+
+    hashes.record(['sw1'], digest)
+    other = ConfigHashes(hash_file)
+    other.record(['sw2'], 'other')
+    other.save()
+    hashes.save()
+
+    hashes = ConfigHashes(hash_file)
+    assert hashes.unchanged('sw1', digest)
+    assert not hashes.unchanged('sw2', digest)
+    assert hashes.hashes['sw2'] == 'other'
@@ -0,0 +1,212 @@
+import asyncio
+import threading
+
+import pytest
+import requests
+
+from cvppyez.rest import AsyncCVPRestClient
+from cvppyez.rest.aioclient import AsyncCvpSession
+from cvppyez.rest.client import CvpSession
+from cvppyez.rest.retry import RetryPolicy, CircuitBreaker, CircuitOpenError
+from cvppyez.rest.stub import CvpStub, ssl_context
+
+from conftest import free_port
+
+NO_DELAY = RetryPolicy(retries=3, base_delay=0)
+
+
+@pytest.fixture
+def stub_server(stub_cert, monkeypatch):
+    """ Runs the CVP stub in a background thread; yields (stub, server) """
+
+    # requests uses the CA bundle of the environment in place of the session
+    # verify=False.
+
+    for ev_name in ('REQUESTS_CA_BUNDLE', 'CURL_CA_BUNDLE'):
+        monkeypatch.delenv(ev_name, raising=False)
+
+    stub, port = CvpStub(n_devices=5), free_port()
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    async def run():
+        await stub.start(port=port, ssl_context=ssl_context(*stub_cert))
+        started.set()
+
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(run(), loop)
+    started.wait(5)
+
+    yield stub, f'127.0.0.1:{port}'
+
+    asyncio.run_coroutine_threadsafe(stub.stop(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+
+
+def test_retry_policy():
+    retry = RetryPolicy(retries=2, base_delay=1, max_delay=3)
+    assert all(0 <= retry.delay(attempt) <= 3 for attempt in range(10))
+
+    assert retry.retry_status('GET', 503, attempt=1)
+    assert not retry.retry_status('GET', 503, attempt=2)
+    assert not retry.retry_status('GET', 404, attempt=0)
+    assert not retry.retry_status('POST', 503, attempt=0)
+
+    assert retry.retry_error('POST', attempt=0, connected=False)
+    assert not retry.retry_error('POST', attempt=0, connected=True)
+
+
+def test_circuit_breaker(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('cvppyez.rest.retry.time.monotonic', lambda: now[0])
+    breaker = CircuitBreaker(threshold=2, reset_timeout=10)
+
+    breaker.failure()
+    breaker.allow()
+    breaker.failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    # one trial request after the reset timeout; its failure opens the circuit
+
+    now[0] += 10
+    breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    now[0] += 10
+    breaker.allow()
+    breaker.success()
+    breaker.allow()
+    assert not breaker.is_open
+
+
+def test_session_retries_and_relogin(stub_server):
+    stub, server = stub_server
+    api = CvpSession(server=server, username='cvp', password='cvp', retry=NO_DELAY)
+    assert api.n_logins == 1
+    assert api.get_adapter(api.host_url).poolmanager.connection_pool_kw['maxsize'] == 100
+
+    stub.faults.extend([503, 502])
+    assert api.get(api.URLs.VERSION).json() == dict(version='2020.2.0')
+
+    # the POST is not retried after a server error
+
+    stub.faults.append(503)
+    assert api.post('/label/getLabels.do').status_code == 503
+
+    stub.session_expired = True
+    assert api.get(api.URLs.VERSION).ok
+    assert api.n_logins == 2
+
+    # the retries are exhausted
+    stub.faults.extend([503] * 4)
+    assert api.get(api.URLs.VERSION).status_code == 503
+
+
+def test_session_circuit_breaker(stub_server):
+    stub, server = stub_server
+    api = CvpSession(server=server, username='cvp', password='cvp', retry=NO_DELAY,
+                     breaker=CircuitBreaker(threshold=3, reset_timeout=60))
+
+    stub.faults.extend([503] * 3)
+    n_requests = stub.n_requests
+    with pytest.raises(CircuitOpenError):
+        api.get(api.URLs.VERSION)
+
+    assert stub.n_requests - n_requests == 3
+
+
+def test_session_connection_error_retried():
+    port = free_port()
+    api = CvpSession(server=f'127.0.0.1:{port}', username='cvp', password='cvp',
+                     login=False, retry=RetryPolicy(retries=2, base_delay=0),
+                     breaker=CircuitBreaker(threshold=10))
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        api.post(api.URLs.VERSION)
+
+    assert api.breaker.failures == 3
+
+
+def test_async_session_retries_and_relogin(stub_cert):
+    stub = CvpStub(n_devices=5)
+
+    async def run():
+        port = free_port()
+        await stub.start(port=port, ssl_context=ssl_context(*stub_cert))
+        try:
+            async with AsyncCVPRestClient(server=f'127.0.0.1:{port}', username='cvp',
+                                          password='cvp') as cvp:
+                cvp.api.retry = NO_DELAY
+
+                stub.faults.extend([503, 504])
+                assert await cvp.api.get(cvp.api.URLs.VERSION) == dict(version='2020.2.0')
+
+                stub.session_expired = True
+                results = await asyncio.gather(*[
+                    cvp.get_notifications(CvpStub.DEVICES_DATASET) for _ in range(5)
+                ])
+                assert all(len(items) == 5 for items in results)
+
+                # the concurrent requests share one login
+                assert cvp.api.n_logins == 2
+
+        finally:
+            await stub.stop()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize('exc', [requests.exceptions.SSLError('bad certificate'),
+                                 requests.exceptions.InvalidHeader('bad header'),
+                                 KeyboardInterrupt()])
+def test_session_breaker_trial_ends(monkeypatch, exc):
+    api = CvpSession(server='127.0.0.1:1', username='cvp', password='cvp', login=False,
+                     retry=NO_DELAY, breaker=CircuitBreaker(threshold=1, reset_timeout=0))
+    api.breaker.failure()
+    assert api.breaker.is_open
+
+    def request(*args, **kwargs):
+        raise exc
+
+    monkeypatch.setattr(requests.Session, 'request', request)
+
+    # the half-open trial request fails; the next trial is still allowed
+
+    with pytest.raises(type(exc)):
+        api.get(api.URLs.VERSION)
+
+    api.breaker.allow()
+    api.breaker.success()
+    assert not api.breaker.is_open
+
+
+def test_async_session_breaker_trial_cancelled():
+    async def run():
+        # the server accepts the connection and never responds
+        server = await asyncio.start_server(lambda reader, writer: None, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+
+        api = AsyncCvpSession(server=f'127.0.0.1:{port}', username='cvp', password='cvp',
+                              retry=NO_DELAY,
+                              breaker=CircuitBreaker(threshold=1, reset_timeout=0))
+        api.breaker.failure()
+        await api.open()
+
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(api.get(api.URLs.VERSION), 0.2)
+
+        finally:
+            await api.close()
+            server.close()
+
+        api.breaker.allow()
+
+    asyncio.run(run())
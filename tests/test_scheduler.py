@@ -0,0 +1,49 @@
+import time
+import threading
+
+from cvppyez.nornir.scheduler import AdaptiveScheduler, run_task
+
+from conftest import make_nornir
+
+
+def test_mixed_latency_fleet_is_not_throttled():
+    # 20 near devices and 280 far devices, none failing; the far devices
+    # must not be treated as congested compared to the near devices.
+
+    latency = dict.fromkeys((f'near{n}' for n in range(20)), 0.02)
+    latency.update(dict.fromkeys((f'far{n}' for n in range(280)), 0.1))
+
+    def task(task):
+        time.sleep(latency[task.host.name])
+
+    scheduler = AdaptiveScheduler(max_workers=100)
+    res = scheduler.run(make_nornir(latency), task)
+
+    assert not res.failed
+    assert len(res) == 300
+    assert scheduler.n_backoffs == 0
+    assert scheduler.peak >= 50
+
+
+def test_run_task_applies_group_caps(monkeypatch):
+    monkeypatch.delenv('CVP_SCHEDULER', raising=False)
+    monkeypatch.setenv('CVP_GROUP_CAPS', 'site-a=2')
+
+    nr = make_nornir([f'sw{n}' for n in range(12)])
+    for host in nr.inventory.hosts.values():
+        host.groups.append('site-a')
+
+    lock, in_flight, peak = threading.Lock(), [0], [0]
+
+    def task(task):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.01)
+        with lock:
+            in_flight[0] -= 1
+
+    res = run_task(nr, task)
+
+    assert not res.failed and len(res) == 12
+    assert peak[0] == 2
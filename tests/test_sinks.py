@@ -0,0 +1,60 @@
+import gzip
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cvppyez.sinks import JsonLinesSink, ParquetSink, open_sink
+
+RESULT = {'version': {'version': '4.22.0F'}, 'interfaces': {'error': 'invalid command'}}
+
+
+def write_hosts(sink, n_hosts=50):
+    with sink, ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda n: sink.write(f'sw{n}', RESULT), range(n_hosts)))
+
+
+def test_file_sink(tmp_path):
+    write_hosts(open_sink('files', tmp_path / 'out'), n_hosts=3)
+    assert json.loads((tmp_path / 'out' / 'sw1.json').read_text()) == RESULT
+
+
+@pytest.mark.parametrize('filename, open_func', [('res.jsonl', open), ('res.jsonl.gz', gzip.open)])
+def test_json_lines_sink(tmp_path, filename, open_func):
+    write_hosts(JsonLinesSink(tmp_path / filename))
+
+    with open_func(tmp_path / filename, 'rt') as ifile:
+        records = [json.loads(line) for line in ifile]
+
+    assert sorted(rec['host'] for rec in records) == sorted(f'sw{n}' for n in range(50))
+    assert all(rec['result'] == RESULT for rec in records)
+
+
+def test_json_lines_sink_zstd(tmp_path):
+    zstandard = pytest.importorskip('zstandard')
+    write_hosts(JsonLinesSink(tmp_path / 'res.jsonl.zst'), n_hosts=3)
+
+    data = zstandard.ZstdDecompressor().decompressobj().decompress(
+        (tmp_path / 'res.jsonl.zst').read_bytes())
+    assert len(data.decode().splitlines()) == 3
+
+
+def test_parquet_sink(tmp_path):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    write_hosts(ParquetSink(tmp_path / 'res.parquet', batch_rows=7))
+
+    table = parquet.read_table(str(tmp_path / 'res.parquet'))
+    assert table.num_rows == 100
+    row = table.slice(0, 1).to_pylist()[0]
+    assert json.loads(row['output']) == RESULT[row['key']]
+
+
+def test_parquet_sink_requires_pyarrow(tmp_path):
+    try:
+        import pyarrow     # noqa: F401
+        pytest.skip('pyarrow is installed')
+    except ImportError:
+        pass
+
+    with pytest.raises(RuntimeError):
+        open_sink('parquet', tmp_path / 'res.parquet')
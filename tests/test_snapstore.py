@@ -0,0 +1,69 @@
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+
+from cvppyez.snapstore import SnapshotStore
+
+CONFIG = '! config\nhostname sw1\n'
+
+
+def blob_files(store):
+    return [path for path in store.objects.rglob('*') if path.is_file()]
+
+
+def test_put_deduplicates(tmp_path):
+    with SnapshotStore(tmp_path) as store:
+        assert store.put('sw1', 'config', CONFIG, ts=1)
+        assert store.put('sw2', 'config', CONFIG, ts=1)
+        assert not store.put('sw1', 'config', CONFIG, ts=2)
+        assert len(blob_files(store)) == 1
+
+        assert store.put('sw1', 'config', CONFIG + 'end\n', ts=3)
+        assert len(blob_files(store)) == 2
+
+    # the latest digests are loaded when the store is opened again
+
+    with SnapshotStore(tmp_path) as store:
+        assert not store.put('sw1', 'config', CONFIG + 'end\n', ts=4)
+        assert store.put('sw1', 'log', CONFIG, ts=4)
+        assert store.get('sw1', 'config') == CONFIG + 'end\n'
+        assert store.get('sw1', 'config', ts=2) == CONFIG
+        assert store.get('sw3', 'config') is None
+        assert [ts for ts, _ in store.history('sw1', 'config')] == [1, 3]
+
+
+def test_changed(tmp_path):
+    with SnapshotStore(tmp_path) as store:
+        for host in ('sw1', 'sw2', 'sw3'):
+            store.put(host, 'config', CONFIG, ts=1)
+
+        store.put('sw1', 'config', CONFIG, ts=2)
+        store.put('sw2', 'config', CONFIG + 'end\n', ts=2)
+
+        assert store.changed('config') == ['sw2', 'sw3']
+        assert store.changed_since(1, 'config') == ['sw2']
+        assert store.changed_since(0, 'config') == ['sw1', 'sw2', 'sw3']
+
+        assert store.diff('sw1', 'config') == ''
+        assert store.diff('sw2', 'config').splitlines()[-1] == '+end'
+
+
+def test_blobs_compressed(tmp_path):
+    with SnapshotStore(tmp_path) as store:
+        store.put('sw1', 'config', CONFIG * 100)
+        blob, = blob_files(store)
+        assert blob.stat().st_size < len(CONFIG) * 10
+        assert store.read_blob(blob.name) == CONFIG * 100
+
+        # gzip blobs are read whatever the store compression
+
+        blob.write_bytes(gzip.compress(b'gzip blob'))
+        assert store.read_blob(blob.name) == 'gzip blob'
+
+
+def test_put_from_threads(tmp_path):
+    with SnapshotStore(tmp_path) as store:
+        with ThreadPoolExecutor(8) as pool:
+            changed = list(pool.map(lambda n: store.put(f'sw{n}', 'config', CONFIG), range(100)))
+
+        assert all(changed)
+        assert len(store.changed('config')) == 100
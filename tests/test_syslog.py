@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from cvppyez.syslog import iter_chunks, parse_chunk, parse_lines, _hour_info
+
+# the US Eastern time zone, without the zoneinfo database; the numeric
+# timestamp is local time, so the local time zone is fixed for the tests.
+
+LOCAL_TZ = 'EST5EDT,M3.2.0,M11.1.0'
+
+LINES = [
+    'Dec 14 09:36:58 leaf1 Lldp: %LLDP-5-NEIGHBOR_NEW: LLDP neighbor with chassisId '
+    '001c.7301.0203 and portId "Ethernet49" added on interface Ethernet1',
+    'Jan  1 03:04:05 spine1 Ebra: %LINEPROTO-5-UPDOWN: Line protocol on Interface '
+    'Ethernet49/1, changed state to up',
+    'Warning: the log file was truncated',
+    'Jul  4 12:00:00 leaf2 Lag+LacpAgent: %LACP-4-MEMBER_DOWN: Port-Channel10 member down',
+    'Mar 10 06:59:59 leaf3 Ebra: the line without an event type',
+    'not a syslog line',
+    'Dec 31 23:59:59 leaf3 ConfigAgent: %SYS-5-CONFIG_I: Configured from console by admin'
+]
+
+# the date and timestamp of the LINES in 2019, computed by the previous
+# strptime and maya parsing: the log time is UTC for the EST date, and
+# local time for the timestamp.
+
+BASELINE = [
+    ('2019-12-14 (Sat) 04:36:58 AM', 1576334218.0, 'leaf1', 'Lldp', 'LLDP-5-NEIGHBOR_NEW',
+     'Ethernet1'),
+    ('2018-12-31 (Mon) 10:04:05 PM', 1546329845.0, 'spine1', 'Ebra', 'LINEPROTO-5-UPDOWN',
+     'Ethernet49/1'),
+    ('2019-07-04 (Thu) 07:00:00 AM', 1562256000.0, 'leaf2', 'Lag+LacpAgent',
+     'LACP-4-MEMBER_DOWN', 'Port-Channel10'),
+    ('2019-12-31 (Tue) 06:59:59 PM', 1577854799.0, 'leaf3', 'ConfigAgent', 'SYS-5-CONFIG_I', '')
+]
+
+
+@pytest.fixture
+def local_tz(monkeypatch):
+    monkeypatch.setenv('TZ', LOCAL_TZ)
+    time.tzset()
+    _hour_info.cache_clear()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+    _hour_info.cache_clear()
+
+
+def test_parse_lines_baseline(local_tz):
+    logs = list(parse_lines(LINES, 2019))
+
+    assert [log[:6] for log in logs] == BASELINE
+    assert logs[0].message.startswith('%LLDP-5-NEIGHBOR_NEW: LLDP neighbor')
+
+
+def test_iter_chunks_line_boundaries(tmp_path, local_tz):
+    filename = tmp_path / 'messages'
+    filename.write_text('\n'.join(LINES * 20) + '\n')
+    content = filename.read_bytes()
+
+    chunks = list(iter_chunks(filename, chunk_size=100))
+    assert len(chunks) > 1
+
+    offset = 0
+    for chunk_offset, length in chunks:
+        assert chunk_offset == offset
+        assert content[chunk_offset + length - 1:chunk_offset + length] == b'\n'
+        offset += length
+    assert offset == len(content)
+
+    results = [parse_chunk(filename, offset, length, 2019) for offset, length in chunks]
+    assert sum(n_lines for _, _, n_lines in results) == len(LINES) * 20
+    assert [log[:6] for logs, _, _ in results for log in logs] == BASELINE * 20
@@ -0,0 +1,166 @@
+import time
+import asyncio
+from unittest import mock
+
+from cvppyez.rest import AsyncCVPRestClient
+from cvppyez.rest.network import get_topology_edges
+from cvppyez.rest.stub import CvpStub, ssl_context
+from cvppyez.rest.topology import TopologyGraph, split_endpoint, TOPOLOGY_EDGES
+
+from conftest import free_port
+
+
+def edge_item(from_endpoint, to_endpoint):
+    return f'{from_endpoint}|{to_endpoint}', {'from': from_endpoint, 'to': to_endpoint}
+
+
+# two spines in rack r0 and four leafs in racks r1 and r2, all in pod1; the
+# rack of leaf4 is overridden by its node tags.  leaf4 has no uplink to
+# spine2, and both spines share the segment of the "TAP" endpoint.
+
+NODES = {
+    f'SN{n}': dict(hostname=name, userTags=dict(pod='pod1', rack=rack))
+    for n, (name, rack) in enumerate([('spine1', 'r0'), ('spine2', 'r0'), ('leaf1', 'r1'),
+                                      ('leaf2', 'r1'), ('leaf3', 'r2'), ('leaf4', 'r2')])
+}
+
+EDGES = [
+    edge_item(f'SN{leaf}:Ethernet{spine + 49}', f'SN{spine}:Ethernet{leaf}')
+    for leaf in range(2, 6) for spine in range(2)
+    if (leaf, spine) != (5, 1)
+] + [
+    edge_item('TAP:Ethernet1', 'SN0:Ethernet48'),
+    edge_item('TAP:Ethernet1', 'SN1:Ethernet48')
+]
+
+
+def make_graph():
+    return TopologyGraph.build(NODES, {'SN5': dict(rack='r3')}, EDGES)
+
+
+def test_topology_queries():
+    graph = make_graph()
+
+    assert len(graph) == 7 and graph.n_edges == 9
+    assert graph.neighbors('spine1') == ['TAP', 'leaf1', 'leaf2', 'leaf3', 'leaf4']
+    assert graph.neighbors('SN5') == ['spine1']
+    assert graph.links('leaf1') == [('Ethernet49', 'spine1', 'Ethernet2'),
+                                    ('Ethernet50', 'spine2', 'Ethernet2')]
+    assert graph.neighbors('TAP') == ['spine1', 'spine2']
+
+    assert graph.blast_radius(['spine1']) == dict(leaf1=1, leaf2=1, leaf3=1, leaf4=1, TAP=1)
+    assert graph.blast_radius(['leaf4'], depth=2) == dict(spine1=1, leaf1=2, leaf2=2, leaf3=2,
+                                                          TAP=2)
+
+    assert graph.shortest_path('leaf4', 'spine2') in (['leaf4', 'spine1', 'leaf1', 'spine2'],
+                                                      ['leaf4', 'spine1', 'leaf2', 'spine2'],
+                                                      ['leaf4', 'spine1', 'leaf3', 'spine2'],
+                                                      ['leaf4', 'spine1', 'TAP', 'spine2'])
+    assert graph.shortest_path('leaf1', 'leaf1') == ['leaf1']
+
+    assert graph.groups('rack') == dict(r0=['spine1', 'spine2'], r1=['leaf1', 'leaf2'],
+                                        r2=['leaf3'], r3=['leaf4'])
+    assert graph.group_of('leaf4', 'pod') == 'pod1'
+
+
+def test_topology_updates(tmp_path):
+    graph = make_graph()
+
+    assert graph.apply([dict(timestamp=10, updates={
+        'SN5:Ethernet50': dict(key={'from': 'SN5:Ethernet50', 'to': 'SN1:Ethernet5'}, value=True),
+        'SN9:Ethernet1': dict(key={'from': 'SN9:Ethernet1', 'to': 'SN2:Ethernet1'}, value=True)
+    }, deletes=['SN2:Ethernet49|SN0:Ethernet2'])]) == 3
+
+    assert graph.last_ts == 10
+    assert graph.neighbors('leaf4') == ['spine1', 'spine2']
+    assert graph.neighbors('leaf1') == ['SN9', 'spine2']
+    assert graph.shortest_path('SN9', 'leaf3') == ['SN9', 'leaf1', 'spine2', 'leaf3']
+
+    graph.remove_edge('SN9:Ethernet1')
+    graph.compact()
+    assert graph.neighbors('leaf1') == ['spine2']
+    assert graph.shortest_path('SN9', 'leaf1') is None
+
+    graph.save(tmp_path / 'topology.json.gz')
+    loaded = TopologyGraph.load(tmp_path / 'topology.json.gz')
+
+    assert loaded.n_edges == graph.n_edges == 9
+    assert loaded.last_ts == 10
+    for name in ('spine1', 'spine2', 'leaf1', 'leaf4', 'TAP'):
+        assert loaded.links(name) == graph.links(name)
+    assert loaded.groups('rack') == graph.groups('rack')
+
+
+def test_topology_from_cvp_updates(stub_cert):
+    # 20 devices in two racks; the first device of each rack is the spine.
+    stub = CvpStub(n_devices=20)
+
+    async def edge_keys(cvp):
+        return {key async for key, _ in cvp.iter_notifications(TOPOLOGY_EDGES, extract='key')}
+
+    async def run():
+        port = free_port()
+        await stub.start(port=port, ssl_context=ssl_context(*stub_cert))
+        try:
+            async with AsyncCVPRestClient(server=f'127.0.0.1:{port}', username='cvp',
+                                          password='cvp') as cvp:
+                graph = await TopologyGraph.afrom_cvp(cvp)
+                assert graph.n_edges == 18 and graph.last_ts == stub.timestamp
+                assert graph.neighbors('sw00001.bench.local') == ['sw00000.bench.local']
+
+                # the uplink of sw00001 is moved to the rack 1 spine, and the
+                # uplink of sw00002 is removed.
+
+                stub.set_edge('SN00000001:Ethernet49', 'SN00000010:Ethernet40')
+                stub.set_edge('SN00000002:Ethernet49')
+
+                assert await graph.aupdate(cvp) == 3
+                assert graph.last_ts == stub.timestamp
+                assert graph.neighbors('sw00001.bench.local') == ['sw00010.bench.local']
+                assert graph.neighbors('sw00002.bench.local') == []
+                assert 'sw00001.bench.local' in graph.neighbors('sw00010.bench.local')
+                assert await graph.aupdate(cvp) == 0
+
+                # the edge keys of the dataset are the keys of the graph edges.
+
+                keys = await edge_keys(cvp)
+                assert len(keys) == graph.n_edges == 17
+                assert all(graph.remove_edge(key) for key in keys)
+                assert graph.n_edges == 0
+
+        finally:
+            await stub.stop()
+
+    asyncio.run(run())
+
+
+def test_get_topology_edges_multiple_peers():
+    cvp = mock.Mock()
+    cvp.iter_notifications.return_value = iter(EDGES)
+    edges = get_topology_edges(cvp)
+
+    assert edges['TAP:Ethernet1'] == ['SN0:Ethernet48', 'SN1:Ethernet48']
+    assert edges['SN0:Ethernet48'] == ['TAP:Ethernet1']
+
+
+def test_split_endpoint():
+    assert split_endpoint('00:1c:73:01:02:03:Ethernet1/1') == ('00:1c:73:01:02:03', 'Ethernet1/1')
+
+
+def test_topology_large_fabric():
+    # 1000 spines and 100 uplinks from each of 1000 leafs, 100k edges; the
+    # leafs are connected to the spines with the same last digit.
+
+    edges = [
+        edge_item(f'L{leaf}:Ethernet{uplink}', f'S{(leaf + uplink * 10) % 1000}:Ethernet{leaf}')
+        for leaf in range(1000) for uplink in range(100)
+    ]
+    graph = TopologyGraph.build({}, {}, edges)
+    assert graph.n_edges == 100000
+
+    start = time.perf_counter()
+    assert len(graph.neighbors('S7')) == 100
+    assert len(graph.blast_radius(['S7'], depth=2)) > 100
+    assert len(graph.shortest_path('L0', 'L990')) == 3
+    assert graph.shortest_path('L0', 'L999') is None
+    assert time.perf_counter() - start < 0.5